@@ -11,8 +11,50 @@ PROLOG_KB = BASE_DIR / "app" / "prolog" / "kb.pl"
 
 # Database
 DATABASE_URL = "sqlite+aiosqlite:///./chatbot.db"
+DATABASE_ECHO = os.getenv("DATABASE_ECHO", "0") == "1"  # Log every SQL statement
 
 # API settings
 API_TITLE = "Ilocos Tourism Chatbot API"
 API_VERSION = "1.0.0"
-API_DESCRIPTION = "Tourism chatbot with Prolog knowledge base integration"
\ No newline at end of file
+API_DESCRIPTION = "Tourism chatbot with Prolog knowledge base integration"
+
+# Chat history retention
+HISTORY_RETENTION_DAYS = int(os.getenv("HISTORY_RETENTION_DAYS", "90"))
+HISTORY_PURGE_BATCH_SIZE = int(os.getenv("HISTORY_PURGE_BATCH_SIZE", "500"))
+HISTORY_BACKFILL_BATCH_SIZE = int(os.getenv("HISTORY_BACKFILL_BATCH_SIZE", "500"))  # Chats per transaction
+
+# Worker threads for CPU-bound search/routing work, kept off the event loop
+BLOCKING_WORKERS = int(os.getenv("BLOCKING_WORKERS", "4"))
+
+# Logging
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json")  # "json" or "text"
+
+# Route cache: origins are snapped to a geohash cell (6 = ~1.2 x 0.6 km)
+ROUTE_CACHE_GEOHASH_PRECISION = int(os.getenv("ROUTE_CACHE_GEOHASH_PRECISION", "6"))
+ROUTE_CACHE_SIZE = int(os.getenv("ROUTE_CACHE_SIZE", "4096"))
+ROUTE_CACHE_TTL_SECONDS = int(os.getenv("ROUTE_CACHE_TTL_SECONDS", "600"))
+
+# Itinerary planner: exact ordering up to this many stops, 2-opt beyond
+ITINERARY_EXACT_MAX_STOPS = int(os.getenv("ITINERARY_EXACT_MAX_STOPS", "10"))
+ITINERARY_TIME_BUDGET_MS = int(os.getenv("ITINERARY_TIME_BUDGET_MS", "1000"))
+
+# How often each worker checks the database for catalog changes made elsewhere
+# (an Excel import, another worker's edit) and reloads; 0 disables the check
+CATALOG_REFRESH_SECONDS = float(os.getenv("CATALOG_REFRESH_SECONDS", "2.0"))
+
+# Startup profiling: STARTUP_PROFILE=1 prints per-phase lifespan timings once warm-up is done;
+# `python -m app.utils.startup` also reports the import tree and checks the cold-start target
+STARTUP_PROFILE = os.getenv("STARTUP_PROFILE", "0") == "1"
+STARTUP_TARGET_MS = float(os.getenv("STARTUP_TARGET_MS", "1000"))
+STARTUP_IMPORT_THRESHOLD_MS = float(os.getenv("STARTUP_IMPORT_THRESHOLD_MS", "5"))
+
+# Catalog list responses: clients may reuse a copy this long before revalidating with its ETag
+CATALOG_CACHE_MAX_AGE_SECONDS = int(os.getenv("CATALOG_CACHE_MAX_AGE_SECONDS", "60"))
+CATALOG_PAGE_MAX_LIMIT = int(os.getenv("CATALOG_PAGE_MAX_LIMIT", "100"))  # Largest ?limit= on list endpoints
+
+# Response compression: preferred encodings (br/zstd need their optional packages) and the smallest body worth compressing
+COMPRESSION_ENCODINGS = tuple(
+    name.strip() for name in os.getenv("COMPRESSION_ENCODINGS", "zstd,br,gzip").split(",") if name.strip()
+)
+COMPRESSION_MIN_BYTES = int(os.getenv("COMPRESSION_MIN_BYTES", "1024"))
@@ -1,9 +1,11 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, create_engine
+from sqlalchemy import Column, Integer, String, DateTime, Text, Index, ForeignKey, select, func, delete, exists, create_engine
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
 from datetime import datetime
-from app.config import DATABASE_URL
+import json
+from app.config import DATABASE_URL, DATABASE_ECHO, EXCEL_FILE, HISTORY_BACKFILL_BATCH_SIZE
 
 Base = declarative_base()
 
@@ -16,15 +18,314 @@ class ChatHistory(Base):
     bot_response = Column(Text)
     matched_items = Column(Text)  # JSON string of matched items
     timestamp = Column(DateTime, default=datetime.utcnow)
+    
+    # Composite indexes backing keyset pagination on (timestamp, id)
+    __table_args__ = (
+        Index("ix_chat_history_timestamp_id", "timestamp", "id"),
+        Index("ix_chat_history_session_timestamp_id", "session_id", "timestamp", "id"),
+    )
+
+class ChatMatchedItem(Base):
+    """One row per item shown in a chat turn (normalised matched_items)"""
+    __tablename__ = "chat_matched_items"
+    
+    chat_id = Column(Integer, ForeignKey("chat_history.id", ondelete="CASCADE"), primary_key=True)
+    rank = Column(Integer, primary_key=True)  # 0-based position in the response
+    item_id = Column(String, nullable=False)
+    
+    __table_args__ = (
+        Index("ix_chat_matched_items_item_id", "item_id", "chat_id"),
+    )
+
+class ItemImpression(Base):
+    """Running per-item recommendation counters, updated on every chat turn"""
+    __tablename__ = "item_impressions"
+    
+    item_id = Column(String, primary_key=True)
+    impressions = Column(Integer, nullable=False, default=0)
+    top_rank_count = Column(Integer, nullable=False, default=0)  # Times shown as the first result
+    last_seen = Column(DateTime)
+    
+    __table_args__ = (
+        Index("ix_item_impressions_impressions", "impressions"),
+    )
+
+class DataMigration(Base):
+    """Progress of a one-off data backfill; completed_at is set once it has finished"""
+    __tablename__ = "data_migrations"
+    
+    name = Column(String, primary_key=True)
+    last_id = Column(Integer, nullable=False, default=0)  # Highest source row id processed
+    completed_at = Column(DateTime)
+
+# Catalog (tourist spots and cuisine). These tables are the system of record;
+# the Excel workbook is only an import/export format (app/services/catalog_excel.py)
+
+# Columns of a catalog row, in workbook order
+CATALOG_COLUMNS = [
+    "id", "name", "type", "location", "description_keywords", "full_description",
+    "best_time_to_visit", "photo", "related_items", "nearest_hub",
+]
+
+class CatalogItem(Base):
+    __tablename__ = "catalog_items"
+    
+    id = Column(String, primary_key=True)
+    position = Column(Integer, nullable=False)  # Display order (workbook row order)
+    name = Column(String, nullable=False)
+    type = Column(String, nullable=False)
+    location = Column(String)
+    description_keywords = Column(Text)  # Raw comma-separated text, split into catalog_keywords
+    full_description = Column(Text)
+    best_time_to_visit = Column(String)
+    photo = Column(String)
+    related_items = Column(Text)  # Raw comma-separated text, split into catalog_related
+    nearest_hub = Column(String)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        Index("ix_catalog_items_type_position", "type", "position"),
+        Index("ix_catalog_items_location", "location"),
+    )
+
+class CatalogKeyword(Base):
+    __tablename__ = "catalog_keywords"
+    
+    item_id = Column(String, ForeignKey("catalog_items.id", ondelete="CASCADE"), primary_key=True)
+    position = Column(Integer, primary_key=True)
+    keyword = Column(String, nullable=False)
+    
+    __table_args__ = (
+        Index("ix_catalog_keywords_keyword", "keyword", "item_id"),
+    )
+
+class CatalogRelated(Base):
+    __tablename__ = "catalog_related"
+    
+    item_id = Column(String, ForeignKey("catalog_items.id", ondelete="CASCADE"), primary_key=True)
+    position = Column(Integer, primary_key=True)
+    related_name = Column(String, nullable=False)
+    
+    __table_args__ = (
+        Index("ix_catalog_related_related_name", "related_name"),
+    )
+
+class CatalogHub(Base):
+    __tablename__ = "catalog_hubs"
+    
+    item_id = Column(String, ForeignKey("catalog_items.id", ondelete="CASCADE"), primary_key=True)
+    hub = Column(String, nullable=False)
+    
+    __table_args__ = (
+        Index("ix_catalog_hubs_hub", "hub", "item_id"),
+    )
+
+class CatalogVersion(Base):
+    """Single row; bumped on every catalog write so caches and the KB know to refresh"""
+    __tablename__ = "catalog_version"
+    
+    id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow)
 
 # Async engine
-engine = create_async_engine(DATABASE_URL, echo=True)
+engine = create_async_engine(DATABASE_URL, echo=DATABASE_ECHO)
 async_session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
 
 async def get_db():
     async with async_session() as session:
         yield session
 
+async def record_matched_items(db: AsyncSession, chat_id: int, item_ids: list, seen_at: datetime):
+    """
+    Store the items shown in a chat turn and bump their impression counters
+    
+    Runs inside the caller's transaction; the caller commits.
+    """
+    item_ids = [item_id for item_id in item_ids if item_id]
+    if not item_ids:
+        return
+    
+    db.add_all([
+        ChatMatchedItem(chat_id=chat_id, item_id=item_id, rank=rank)
+        for rank, item_id in enumerate(item_ids)
+    ])
+    
+    for rank, item_id in enumerate(item_ids):
+        top = 1 if rank == 0 else 0
+        stmt = sqlite_insert(ItemImpression).values(
+            item_id=item_id, impressions=1, top_rank_count=top, last_seen=seen_at
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[ItemImpression.item_id],
+            set_={
+                "impressions": ItemImpression.impressions + 1,
+                "top_rank_count": ItemImpression.top_rank_count + top,
+                "last_seen": seen_at,
+            }
+        )
+        await db.execute(stmt)
+
+MATCHED_ITEMS_BACKFILL = "chat_matched_items"
+
+async def _backfill_matched_items():
+    """
+    Populate the normalised tables from legacy matched_items JSON (runs once)
+    Walks chat_history in id order, HISTORY_BACKFILL_BATCH_SIZE chats per
+    transaction. Each commit also records how far it got in data_migrations,
+    so an interrupted backfill resumes there; chats that already have
+    chat_matched_items rows are skipped.
+    """
+    async with async_session() as db:
+        migration = await db.get(DataMigration, MATCHED_ITEMS_BACKFILL)
+        if migration is None:
+            migration = DataMigration(name=MATCHED_ITEMS_BACKFILL, last_id=0)
+            db.add(migration)
+        elif migration.completed_at is not None:
+            return
+        
+        while True:
+            result = await db.execute(
+                select(ChatHistory.id, ChatHistory.matched_items, ChatHistory.timestamp)
+                .where(
+                    ChatHistory.id > migration.last_id,
+                    ChatHistory.matched_items.is_not(None),
+                    ChatHistory.matched_items != "[]",
+                    ~exists().where(ChatMatchedItem.chat_id == ChatHistory.id)
+                )
+                .order_by(ChatHistory.id)
+                .limit(HISTORY_BACKFILL_BATCH_SIZE)
+            )
+            rows = result.all()
+            for row in rows:
+                try:
+                    item_ids = json.loads(row.matched_items)
+                except (TypeError, ValueError):
+                    continue
+                await record_matched_items(db, row.id, item_ids, row.timestamp)
+            
+            if rows:
+                migration.last_id = rows[-1].id
+            if len(rows) < HISTORY_BACKFILL_BATCH_SIZE:
+                migration.completed_at = datetime.utcnow()
+            await db.commit()
+            if migration.completed_at is not None:
+                return
+
+def _clean_cell(value):
+    """None for empty/NaN cells, text otherwise (stored as entered)"""
+    if value is None or (isinstance(value, float) and value != value):
+        return None
+    return str(value)
+
+def catalog_row(row: dict) -> dict:
+    """A row as stored: exactly CATALOG_COLUMNS, None for empty cells"""
+    return {name: _clean_cell(row.get(name)) for name in CATALOG_COLUMNS}
+
+def _split_list(text):
+    """Comma-separated cell -> list of non-empty entries"""
+    if not text:
+        return []
+    return [part.strip() for part in text.split(",") if part.strip()]
+
+async def get_catalog_version(db: AsyncSession) -> int:
+    return await db.scalar(select(CatalogVersion.version).where(CatalogVersion.id == 1)) or 0
+
+async def bump_catalog_version(db: AsyncSession) -> int:
+    """Increment the catalog version inside the caller's transaction; returns the new value"""
+    stmt = sqlite_insert(CatalogVersion).values(id=1, version=1, updated_at=datetime.utcnow())
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[CatalogVersion.id],
+        set_={"version": CatalogVersion.version + 1, "updated_at": datetime.utcnow()}
+    )
+    await db.execute(stmt)
+    return await get_catalog_version(db)
+
+async def read_catalog(db: AsyncSession) -> list:
+    """Every catalog row as a dict of CATALOG_COLUMNS, in display order"""
+    columns = [getattr(CatalogItem, name) for name in CATALOG_COLUMNS]
+    result = await db.execute(select(*columns).order_by(CatalogItem.position))
+    return [dict(row._mapping) for row in result]
+
+async def read_catalog_item(db: AsyncSession, item_id: str):
+    """One catalog row as a dict of CATALOG_COLUMNS, or None"""
+    columns = [getattr(CatalogItem, name) for name in CATALOG_COLUMNS]
+    row = (await db.execute(select(*columns).where(CatalogItem.id == item_id))).first()
+    return None if row is None else dict(row._mapping)
+
+async def write_catalog_item(db: AsyncSession, row: dict, position: int = None):
+    """
+    Insert or replace one catalog item and its keyword/related/hub rows
+    Runs inside the caller's transaction; the caller commits.
+    """
+    values = catalog_row(row)
+    item_id = values["id"]
+    
+    if position is None:
+        position = await db.scalar(select(CatalogItem.position).where(CatalogItem.id == item_id))
+    if position is None:
+        position = (await db.scalar(select(func.max(CatalogItem.position))) or 0) + 1
+    
+    stmt = sqlite_insert(CatalogItem).values(**values, position=position, updated_at=datetime.utcnow())
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[CatalogItem.id],
+        set_={**{name: stmt.excluded[name] for name in CATALOG_COLUMNS if name != "id"},
+              "updated_at": stmt.excluded.updated_at}
+    )
+    await db.execute(stmt)
+    
+    for child in (CatalogKeyword, CatalogRelated, CatalogHub):
+        await db.execute(delete(child).where(child.item_id == item_id))
+    
+    db.add_all([
+        CatalogKeyword(item_id=item_id, position=i, keyword=keyword)
+        for i, keyword in enumerate(_split_list(values["description_keywords"]))
+    ])
+    db.add_all([
+        CatalogRelated(item_id=item_id, position=i, related_name=name)
+        for i, name in enumerate(_split_list(values["related_items"]))
+        if name.lower() != "n/a"
+    ])
+    hub = (values["nearest_hub"] or "").strip()
+    if hub:
+        db.add(CatalogHub(item_id=item_id, hub=hub))
+    await db.flush()
+
+async def delete_catalog_item(db: AsyncSession, item_id: str) -> bool:
+    """Remove one catalog item and its child rows; the caller commits"""
+    for child in (CatalogKeyword, CatalogRelated, CatalogHub):
+        await db.execute(delete(child).where(child.item_id == item_id))
+    result = await db.execute(delete(CatalogItem).where(CatalogItem.id == item_id))
+    return result.rowcount > 0
+
+async def replace_catalog(db: AsyncSession, rows: list) -> int:
+    """Replace the whole catalog (Excel import); returns the new version. The caller commits."""
+    for table in (CatalogKeyword, CatalogRelated, CatalogHub, CatalogItem):
+        await db.execute(delete(table))
+    for position, row in enumerate(rows, start=1):
+        await write_catalog_item(db, row, position)
+    return await bump_catalog_version(db)
+
+async def _import_catalog_if_empty():
+    """First start on an existing install: seed the catalog tables from the workbook"""
+    async with async_session() as db:
+        if await db.scalar(select(func.count()).select_from(CatalogItem)):
+            return
+        if not EXCEL_FILE.exists():
+            return
+        
+        import pandas as pd
+        rows = pd.read_excel(EXCEL_FILE).to_dict("records")
+        await replace_catalog(db, rows)
+        await db.commit()
+
 async def init_db():
     async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
\ No newline at end of file
+        await conn.run_sync(Base.metadata.create_all)
+        # create_all skips indexes on tables that already exist
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                await conn.run_sync(index.create, checkfirst=True)
+    
+    await _backfill_matched_items()
+    await _import_catalog_if_empty()
\ No newline at end of file
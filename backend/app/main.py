@@ -1,17 +1,25 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from contextlib import asynccontextmanager
+import asyncio
 import os
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
-from app.config import API_TITLE, API_VERSION, API_DESCRIPTION
+from app.config import API_TITLE, API_VERSION, API_DESCRIPTION, STARTUP_PROFILE
 from app.database import init_db
 from app.routes import chatbot, spots, cuisine, location
-from app.services.excel_to_prolog import convert_excel_to_prolog
-from app.services.prolog_service import get_prolog_service
+from app.services.catalog_store import init_catalog_store, close_catalog_store
+from app.services.registry import get_registry
+from app.utils.compression import CompressionMiddleware
+from app.utils.executor import shutdown_executor
+from app.utils.log import setup_logging, shutdown_logging
+from app.utils.startup import startup_phase, startup_phases, format_phases
+
+setup_logging()
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -20,29 +28,42 @@ async def lifespan(app: FastAPI):
     print("🚀 Starting Ilocos Tourism Chatbot API...")
     
     # Initialize database
-    await init_db()
+    with startup_phase("database"):
+        await init_db()
     print("✓ Database initialized")
     
-    # Convert Excel to Prolog
-    try:
-        convert_excel_to_prolog()
-        print("✓ Prolog KB generated")
-    except Exception as e:
-        print(f"⚠ Warning: Could not generate Prolog KB: {e}")
+    # Load the catalog (imported from the Excel file on first run)
+    with startup_phase("catalog"):
+        store = await init_catalog_store()
+    print(f"✓ Catalog loaded (version {store.version}, {len(store.rows)} items)")
     
-    # Initialize Prolog service
-    try:
-        get_prolog_service()
-        print("✓ Prolog service initialized")
-    except Exception as e:
-        print(f"⚠ Warning: Could not initialize Prolog service: {e}")
+    # Build Prolog, routing, NLP, ... services concurrently in the background;
+    # /health reports ready once they are all up
+    warmup = asyncio.create_task(_warm_up_services())
     
-    print("✓ API ready!")
+    print("✓ API started (services warming up)")
     
     yield
     
     # Shutdown
     print("👋 Shutting down...")
+    if not warmup.done():
+        warmup.cancel()
+    await close_catalog_store()
+    shutdown_executor()
+    shutdown_logging()
+
+async def _warm_up_services():
+    registry = get_registry()
+    await registry.warm_up()
+    for name, status in registry.status.items():
+        if status.ready:
+            print(f"✓ {name} ready ({status.init_ms} ms)")
+        else:
+            print(f"⚠ Warning: Could not initialize {name}: {status.error}")
+    print(f"✓ API ready! (warm-up {registry.warmup_ms} ms)")
+    if STARTUP_PROFILE:
+        print("Startup phases:\n" + format_phases(startup_phases() + [("warm-up", registry.warmup_ms)]))
 
 # Create FastAPI app
 app = FastAPI(
@@ -59,8 +80,12 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Total-Count", "X-Next-Cursor"],
 )
 
+# Negotiated gzip/br/zstd for responses over COMPRESSION_MIN_BYTES
+app.add_middleware(CompressionMiddleware)
+
 # Include routers
 app.include_router(chatbot.router)
 app.include_router(spots.router)
@@ -85,8 +110,21 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    """Health check endpoint"""
-    return {"status": "healthy"}
+    """
+    Health check endpoint
+    503 until the startup warm-up has finished; "degraded" if a service failed to start.
+    """
+    registry = get_registry()
+    if not registry.warmed_up:
+        return JSONResponse(
+            status_code=503,
+            content={"status": "starting", "services": registry.report()}
+        )
+    return {
+        "status": "degraded" if registry.failed() else "healthy",
+        "warmup_ms": registry.warmup_ms,
+        "services": registry.report()
+    }
 
 if __name__ == "__main__":
     import uvicorn
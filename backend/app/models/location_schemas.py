@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional, List
+from typing import Optional, List, Dict
 from enum import Enum
 
 class TransportMode(str, Enum):
@@ -9,10 +9,29 @@ class TransportMode(str, Enum):
     BUS = "bus"
     VAN = "van"
 
+class RouteCost(str, Enum):
+    TIME = "time"
+    FARE = "fare"
+    WEIGHTED = "weighted"  # Time plus fare converted to minutes
+
 class LocationRequest(BaseModel):
     latitude: float = Field(..., description="User's current latitude")
     longitude: float = Field(..., description="User's current longitude")
     destination_id: str = Field(..., description="Destination item ID (e.g., CU01, TS01)")
+    cost: RouteCost = Field(RouteCost.TIME, description="What to minimise: time, fare, or weighted")
+
+class BatchRouteRequest(BaseModel):
+    latitude: float = Field(..., description="User's current latitude")
+    longitude: float = Field(..., description="User's current longitude")
+    destination_ids: List[str] = Field(..., min_length=1, max_length=50, description="Destination item IDs (max 50)")
+    cost: RouteCost = Field(RouteCost.TIME, description="What to minimise: time, fare, or weighted")
+
+class ItineraryRequest(BaseModel):
+    latitude: float = Field(..., description="User's current latitude")
+    longitude: float = Field(..., description="User's current longitude")
+    destination_ids: List[str] = Field(..., min_length=1, max_length=25, description="Item IDs to visit, in any order (max 25)")
+    cost: RouteCost = Field(RouteCost.TIME, description="What to minimise: time, fare, or weighted")
+    time_budget_ms: Optional[int] = Field(None, ge=10, description="Compute-time budget for ordering (capped by server config)")
     
 class RouteStep(BaseModel):
     step_number: int
@@ -33,6 +52,20 @@ class RouteResponse(BaseModel):
     total_time_minutes: int
     steps: List[RouteStep]
     warnings: List[str] = []
+
+class BatchRouteResponse(BaseModel):
+    routes: Dict[str, RouteResponse]  # destination_id -> route, in request order
+    errors: Dict[str, str] = {}  # destination_id -> reason it could not be routed
+
+class ItineraryResponse(BaseModel):
+    order: List[str]  # destination_ids in visiting order
+    legs: List[RouteResponse]  # legs[i] arrives at order[i]
+    total_distance_km: float
+    total_fare: float
+    total_time_minutes: int
+    method: str  # "exact", "2-opt", or "nearest-neighbour" (leg matrix cut short by the budget)
+    optimal: bool
+    errors: Dict[str, str] = {}
     
 class NearbyPlace(BaseModel):
     id: str
@@ -41,4 +74,6 @@ class NearbyPlace(BaseModel):
     location: str
     distance_km: float
     walking_distance: bool  # < 1km
-    estimated_walking_time: Optional[int] = None  # minutes
\ No newline at end of file
+    estimated_walking_time: Optional[int] = None  # minutes
+    suggested_mode: Optional[TransportMode] = None  # For a trip of distance_km
+    estimated_fare: Optional[float] = None  # Fare of suggested_mode over distance_km
\ No newline at end of file
@@ -6,6 +6,7 @@ from datetime import datetime
 class ChatRequest(BaseModel):
     message: str = Field(..., description="User's message/query")
     session_id: Optional[str] = Field(None, description="Session ID for tracking conversation")
+    debug: bool = Field(False, description="Log search diagnostics for this request")
 
 class ChatResponse(BaseModel):
     response: str
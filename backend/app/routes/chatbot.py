@@ -1,22 +1,43 @@
 """
 Enhanced context-aware chatbot endpoint with casual conversation support
 """
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.responses import JSONResponse, StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, delete, tuple_
 from app.models.schemas import ChatRequest, ChatResponse, ChatHistoryResponse
+from app.services.catalog_store import get_catalog_store
+from app.services.chat_cards import encode_cards, encoded_card, chat_response_body
 from app.services.prolog_service import get_prolog_service
 from app.services.nlp_processor import get_nlp_processor
 from app.services.conversation_context import get_conversation_manager
 from app.utils.add_routing_info import add_routing_info
-from app.database import get_db, ChatHistory
-from datetime import datetime
+from app.utils.executor import run_blocking
+from app.utils.fast_json import dumps
+from app.utils.helpers import parse_fields
+from app.utils.log import get_logger, request_debug
+from app.database import (
+    get_db, async_session, record_matched_items,
+    ChatHistory, ChatMatchedItem, ItemImpression
+)
+from app.config import HISTORY_RETENTION_DAYS, HISTORY_PURGE_BATCH_SIZE
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Optional
+from starlette.background import BackgroundTask
+import asyncio
+import base64
 import json
 import uuid
 import random
 
 router = APIRouter(prefix="/api/chat", tags=["Chatbot"])
 
+logger = get_logger(__name__)
+
+# Rows fetched per round-trip when streaming a history export
+EXPORT_CHUNK_SIZE = 1000
+
 # Casual conversation patterns
 GREETINGS = {
     'hi', 'hello', 'hey', 'hii', 'hiii', 'hiiii', 'good morning', 
@@ -69,6 +90,14 @@ GOODBYE_RESPONSES = [
     "Bye! 😊 Have an amazing time in Ilocos!",
 ]
 
+RESET_COMMANDS = ['new search', 'start over', 'reset', 'start fresh']
+
+RESET_RESPONSES = [
+    "Sure! Let's start fresh. 🔄 What kind of place are you looking for?",
+    "Okay, starting over! What would you like to explore in Ilocos?",
+    "Fresh start! 🌟 Tell me what you're interested in finding.",
+]
+
 
 def is_casual_conversation(message: str) -> tuple[bool, str]:
     """
@@ -103,6 +132,7 @@ def is_casual_conversation(message: str) -> tuple[bool, str]:
 async def chat(
     request: ChatRequest,
     top_n: int = 3,
+    compact: bool = False,
     db: AsyncSession = Depends(get_db)
 ):
     """
@@ -118,7 +148,11 @@ async def chat(
     Args:
         request: Chat request with message and optional session_id
         top_n: Number of results (default: 3, max: 10)
+        compact: Matched items in the compact format (short keys, no nulls, photo ids)
     """
+    # Per-request diagnostics; the context var follows the work onto executor threads
+    request_debug.set(request.debug)
+    
     try:
         user_message = request.message.strip()
         
@@ -135,99 +169,228 @@ async def chat(
         is_casual, casual_response = is_casual_conversation(user_message)
         if is_casual:
             # Save casual conversation to history
-            chat_record = ChatHistory(
-                session_id=session_id,
-                user_message=user_message,
-                bot_response=casual_response,
-                matched_items=json.dumps([]),
-                timestamp=datetime.utcnow()
-            )
-            db.add(chat_record)
-            await db.commit()
+            await save_turn(db, session_id, user_message, casual_response, [])
             
-            return ChatResponse(
-                response=casual_response,
-                matched_items=[],
-                session_id=session_id,
-                timestamp=datetime.utcnow()
-            )
+            return _chat_response(casual_response, [], session_id)
         
         # Get services
         prolog_service = get_prolog_service()
-        nlp = get_nlp_processor()
         conversation_manager = get_conversation_manager()
         
         # Get or create conversation context
         context = conversation_manager.get_or_create_session(session_id)
         
         # Check for reset commands
-        reset_commands = ['new search', 'start over', 'reset', 'start fresh']
-        if any(cmd in user_message.lower() for cmd in reset_commands):
+        if is_reset_command(user_message):
             prolog_service.reset_conversation(session_id)
-            response_text = random.choice([
-                "Sure! Let's start fresh. 🔄 What kind of place are you looking for?",
-                "Okay, starting over! What would you like to explore in Ilocos?",
-                "Fresh start! 🌟 Tell me what you're interested in finding.",
-            ])
+            response_text = random.choice(RESET_RESPONSES)
             matched_items = []
+            cards = []
         else:
-            # Use context-aware search from prolog service
-            matched_items, context = prolog_service.search_with_context(
-                user_message, 
-                session_id, 
-                top_n=top_n
-            )
-            
-            matched_items = add_routing_info(matched_items)
-            
-            # Process query to get keywords (for response generation)
-            keywords = nlp.process_query(user_message)
-            
-            # Detect if this is a follow-up query
-            is_followup = context.is_followup_query(user_message)
-            
-            # Generate diverse response
-            response_text = generate_response(
-                matched_items, 
-                is_followup, 
+            # Context-aware search and routing enrichment are CPU-bound,
+            # so run them on the blocking executor instead of the event loop
+            matched_items, context, cards = await run_blocking(
+                search_and_enrich,
+                prolog_service,
                 user_message,
-                context
-            )
-            
-            # Update conversation context (add this turn to history)
-            prolog_service.update_conversation_context(
                 session_id,
-                user_message,
-                keywords,
-                response_text,
-                matched_items
+                top_n,
+                compact
             )
+            
+            response_text = respond_to_search(prolog_service, user_message, session_id, matched_items, context)
         
         # Save to database
-        chat_record = ChatHistory(
-            session_id=session_id,
-            user_message=user_message,
-            bot_response=response_text,
-            matched_items=json.dumps([item.get('id', '') for item in matched_items]),
-            timestamp=datetime.utcnow()
-        )
-        db.add(chat_record)
-        await db.commit()
+        matched_ids = [item.get('id', '') for item in matched_items]
+        await save_turn(db, session_id, user_message, response_text, matched_ids)
         
-        return ChatResponse(
-            response=response_text,
-            matched_items=matched_items,
-            session_id=session_id,
-            timestamp=datetime.utcnow()
-        )
+        return _chat_response(response_text, cards, session_id)
     
     except Exception as e:
-        print(f"Chat error: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Chat error: %s", e, extra={"session_id": request.session_id})
         raise HTTPException(status_code=500, detail=f"Chat error: {str(e)}")
 
 
+def search_and_enrich(prolog_service, user_message: str, session_id: str, top_n: int, compact: bool = False):
+    """
+    Blocking part of a chat turn: Prolog search plus routing flags
+    Also returns the items' JSON cards, cached on the snapshot that was searched.
+    """
+    snapshot = get_catalog_store().snapshot
+    matched_items, context = prolog_service.search_with_context(
+        user_message,
+        session_id,
+        top_n=top_n,
+        snapshot=snapshot
+    )
+    matched_items = add_routing_info(matched_items)
+    return matched_items, context, encode_cards(snapshot, matched_items, compact)
+
+
+def _chat_response(response_text: str, cards: list, session_id: str) -> Response:
+    """ChatResponse body built from pre-encoded cards (no per-item validation or encoding)"""
+    body = chat_response_body(response_text, cards, session_id, datetime.utcnow())
+    return Response(content=body, media_type="application/json")
+
+
+def is_reset_command(message: str) -> bool:
+    return any(cmd in message.lower() for cmd in RESET_COMMANDS)
+
+
+def respond_to_search(prolog_service, user_message: str, session_id: str, matched_items: list, context) -> str:
+    """Reply text for a searched turn; also records the turn in the conversation context"""
+    nlp = get_nlp_processor()
+    
+    # Process query to get keywords (for response generation)
+    keywords = nlp.process_query(user_message)
+    
+    # Detect if this is a follow-up query
+    is_followup = context.is_followup_query(user_message)
+    
+    # Generate diverse response
+    response_text = generate_response(
+        matched_items, 
+        is_followup, 
+        user_message,
+        context
+    )
+    
+    # Update conversation context (add this turn to history)
+    prolog_service.update_conversation_context(
+        session_id,
+        user_message,
+        keywords,
+        response_text,
+        matched_items
+    )
+    return response_text
+
+
+async def save_turn(db: AsyncSession, session_id: str, user_message: str, response_text: str, matched_ids: list):
+    """Write one chat turn (and its matched items) to history"""
+    chat_record = ChatHistory(
+        session_id=session_id,
+        user_message=user_message,
+        bot_response=response_text,
+        matched_items=json.dumps(matched_ids),
+        timestamp=datetime.utcnow()
+    )
+    db.add(chat_record)
+    await db.flush()
+    await record_matched_items(db, chat_record.id, matched_ids, chat_record.timestamp)
+    await db.commit()
+
+
+@dataclass
+class StreamedTurn:
+    """Outcome of a streamed chat turn, filled in by the stream and saved after it"""
+    session_id: str
+    user_message: str
+    response_text: Optional[str] = None
+    matched_ids: list = field(default_factory=list)
+
+
+def _sse(event: str, data: bytes) -> bytes:
+    """One Server-Sent Event (data is single-line JSON)"""
+    return b"event: " + event.encode() + b"\ndata: " + data + b"\n\n"
+
+
+@router.post("/stream")
+async def chat_stream(
+    request: ChatRequest,
+    top_n: int = 3,
+    compact: bool = False
+):
+    """
+    Streaming variant of POST /api/chat/ (Server-Sent Events)
+    
+    Events, in order:
+    - reply: {"response", "session_id"} as soon as the search has finished
+    - card: one matched item per event (same JSON as in matched_items),
+      sent as each is enriched with routing info
+    - done: {"session_id", "timestamp", "count"}
+    - error: {"detail"} instead of the remaining events if the turn fails
+    
+    The turn is written to chat history after the stream has finished
+    (also when the client disconnects early), so saving it never delays
+    the reply.
+    """
+    request_debug.set(request.debug)
+    
+    user_message = request.message.strip()
+    if not user_message:
+        raise HTTPException(status_code=400, detail="Empty message")
+    
+    top_n = max(1, min(top_n, 10))
+    turn = StreamedTurn(session_id=request.session_id or str(uuid.uuid4()), user_message=user_message)
+    
+    return StreamingResponse(
+        _stream_turn(turn, top_n, compact),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        background=BackgroundTask(_save_streamed_turn, turn)
+    )
+
+
+async def _stream_turn(turn: StreamedTurn, top_n: int, compact: bool):
+    session_id = turn.session_id
+    user_message = turn.user_message
+    try:
+        # Cards are read from the snapshot the search ran against
+        snapshot = get_catalog_store().snapshot
+        matched_items = []
+        is_casual, casual_response = is_casual_conversation(user_message)
+        if is_casual:
+            response_text = casual_response
+        else:
+            prolog_service = get_prolog_service()
+            if is_reset_command(user_message):
+                prolog_service.reset_conversation(session_id)
+                response_text = random.choice(RESET_RESPONSES)
+            else:
+                # Search on the executor, off the event loop
+                matched_items, context = await run_blocking(
+                    prolog_service.search_with_context,
+                    user_message,
+                    session_id,
+                    top_n=top_n,
+                    snapshot=snapshot
+                )
+                response_text = respond_to_search(prolog_service, user_message, session_id, matched_items, context)
+        
+        # The turn is complete (and in the conversation context) from here on;
+        # record it before the first yield so a client that disconnects early
+        # still gets it saved
+        turn.response_text = response_text
+        turn.matched_ids = [item.get('id', '') for item in matched_items]
+        
+        yield _sse("reply", dumps({"response": response_text, "session_id": session_id}))
+        
+        for item in matched_items:
+            add_routing_info([item])
+            yield _sse("card", encoded_card(snapshot, item, compact))
+        
+        yield _sse("done", dumps({
+            "session_id": session_id,
+            "timestamp": datetime.utcnow(),
+            "count": len(matched_items)
+        }))
+    except Exception as e:
+        logger.exception("Chat stream error: %s", e, extra={"session_id": session_id})
+        yield _sse("error", dumps({"detail": f"Chat error: {str(e)}"}))
+
+
+async def _save_streamed_turn(turn: StreamedTurn):
+    """Persist a streamed turn once the response is over (nothing to save if it failed before the reply)"""
+    if turn.response_text is None:
+        return
+    try:
+        async with async_session() as db:
+            await save_turn(db, turn.session_id, turn.user_message, turn.response_text, turn.matched_ids)
+    except Exception as e:
+        logger.exception("Saving streamed chat turn failed: %s", e, extra={"session_id": turn.session_id})
+
+
 def generate_response(items, is_followup, user_query, context):
     """Generate diverse, natural responses based on context"""
     
@@ -322,38 +485,143 @@ def generate_response(items, is_followup, user_query, context):
             return random.choice(responses)
 
 
+# Columns clients may request through the `fields` projection parameter
+HISTORY_FIELDS = ('id', 'session_id', 'user_message', 'bot_response', 'matched_items', 'timestamp')
+
+
+def _parse_fields(fields: Optional[str]) -> tuple:
+    """Parse a comma-separated `fields` parameter into a tuple of column names"""
+    try:
+        return parse_fields(fields, HISTORY_FIELDS)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def _encode_cursor(timestamp: datetime, record_id: int) -> str:
+    """Encode a (timestamp, id) keyset position as an opaque cursor"""
+    raw = f"{timestamp.isoformat()}|{record_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def _decode_cursor(cursor: str) -> tuple:
+    """Decode a cursor produced by _encode_cursor"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        timestamp, record_id = raw.rsplit('|', 1)
+        return datetime.fromisoformat(timestamp), int(record_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def _history_query(fields: tuple):
+    """SELECT only the projected columns, plus the keyset columns"""
+    columns = set(fields) | {'id', 'timestamp'}
+    return select(*[getattr(ChatHistory, name) for name in HISTORY_FIELDS if name in columns])
+
+
+def _row_to_dict(row, fields: tuple) -> dict:
+    """Convert a projected row to a JSON-ready dict"""
+    record = {}
+    for name in fields:
+        value = getattr(row, name)
+        record[name] = value.isoformat() if isinstance(value, datetime) else value
+    return record
+
+
+async def _history_page(db: AsyncSession, query, fields: tuple, limit: int) -> JSONResponse:
+    """Run a keyset page query and return rows with an X-Next-Cursor header"""
+    result = await db.execute(query.limit(limit + 1))
+    rows = result.all()
+    
+    headers = {}
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        headers["X-Next-Cursor"] = _encode_cursor(last.timestamp, last.id)
+    
+    return JSONResponse(content=[_row_to_dict(row, fields) for row in rows], headers=headers)
+
+
+@router.get("/history/export")
+async def export_history(
+    session_id: Optional[str] = Query(None, description="Only export this session"),
+    since: Optional[datetime] = Query(None, description="Only export rows at or after this time"),
+    fields: Optional[str] = Query(None, description="Comma-separated columns to include"),
+):
+    """
+    Stream chat history as newline-delimited JSON for analytics pulls
+    
+    Rows are read from a server-side cursor in (timestamp, id) order and
+    written out as they arrive, so memory stays flat regardless of table size.
+    """
+    selected = _parse_fields(fields)
+    
+    query = _history_query(selected).order_by(ChatHistory.timestamp.asc(), ChatHistory.id.asc())
+    if session_id:
+        query = query.where(ChatHistory.session_id == session_id)
+    if since:
+        query = query.where(ChatHistory.timestamp >= since)
+    
+    async def generate():
+        async with async_session() as session:
+            result = await session.stream(query.execution_options(yield_per=EXPORT_CHUNK_SIZE))
+            async for partition in result.partitions():
+                yield ''.join(json.dumps(_row_to_dict(row, selected)) + '\n' for row in partition)
+    
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
+
+
 @router.get("/history/{session_id}", response_model=list[ChatHistoryResponse])
 async def get_chat_history(
     session_id: str,
+    limit: int = Query(200, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor value from the previous page"),
+    fields: Optional[str] = Query(None, description="Comma-separated columns to include, e.g. id,user_message,timestamp"),
     db: AsyncSession = Depends(get_db)
 ):
-    """Get chat history for a specific session"""
+    """
+    Get chat history for a specific session (oldest first)
+    
+    Paginated by keyset on (timestamp, id); when more rows remain the
+    response carries an X-Next-Cursor header to pass back as `cursor`.
+    """
+    selected = _parse_fields(fields)
+    
+    query = (
+        _history_query(selected)
+        .where(ChatHistory.session_id == session_id)
+        .order_by(ChatHistory.timestamp.asc(), ChatHistory.id.asc())
+    )
+    if cursor:
+        query = query.where(tuple_(ChatHistory.timestamp, ChatHistory.id) > _decode_cursor(cursor))
+    
     try:
-        result = await db.execute(
-            select(ChatHistory)
-            .where(ChatHistory.session_id == session_id)
-            .order_by(ChatHistory.timestamp.asc())
-        )
-        history = result.scalars().all()
-        return history
+        return await _history_page(db, query, selected, limit)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching history: {str(e)}")
 
 
 @router.get("/history", response_model=list[ChatHistoryResponse])
 async def get_all_history(
-    limit: int = 50,
+    limit: int = Query(50, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor value from the previous page"),
+    fields: Optional[str] = Query(None, description="Comma-separated columns to include, e.g. id,user_message,timestamp"),
     db: AsyncSession = Depends(get_db)
 ):
-    """Get all chat history (limited)"""
+    """
+    Get all chat history (newest first)
+    
+    Paginated by keyset on (timestamp, id); when more rows remain the
+    response carries an X-Next-Cursor header to pass back as `cursor`.
+    """
+    selected = _parse_fields(fields)
+    
+    query = _history_query(selected).order_by(ChatHistory.timestamp.desc(), ChatHistory.id.desc())
+    if cursor:
+        query = query.where(tuple_(ChatHistory.timestamp, ChatHistory.id) < _decode_cursor(cursor))
+    
     try:
-        result = await db.execute(
-            select(ChatHistory)
-            .order_by(ChatHistory.timestamp.desc())
-            .limit(limit)
-        )
-        history = result.scalars().all()
-        return history
+        return await _history_page(db, query, selected, limit)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching history: {str(e)}")
 
@@ -365,15 +633,17 @@ async def delete_session_history(
 ):
     """Delete chat history and reset context for a session"""
     try:
-        # Delete from database
+        # Single bulk DELETE instead of loading and deleting each row
+        await db.execute(
+            delete(ChatMatchedItem).where(
+                ChatMatchedItem.chat_id.in_(
+                    select(ChatHistory.id).where(ChatHistory.session_id == session_id)
+                )
+            )
+        )
         result = await db.execute(
-            select(ChatHistory).where(ChatHistory.session_id == session_id)
+            delete(ChatHistory).where(ChatHistory.session_id == session_id)
         )
-        records = result.scalars().all()
-        
-        for record in records:
-            await db.delete(record)
-        
         await db.commit()
         
         # Reset conversation context in prolog service
@@ -381,12 +651,113 @@ async def delete_session_history(
         prolog_service.reset_conversation(session_id)
         
         return {
-            "message": f"Deleted {len(records)} records and reset context for session {session_id}"
+            "message": f"Deleted {result.rowcount} records and reset context for session {session_id}"
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error deleting history: {str(e)}")
 
 
+@router.delete("/history")
+async def purge_history(
+    older_than_days: int = Query(HISTORY_RETENTION_DAYS, ge=0, description="Delete history older than this many days"),
+    batch_size: int = Query(HISTORY_PURGE_BATCH_SIZE, ge=1, le=10000, description="Rows deleted per transaction"),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Purge chat history older than the retention window
+    
+    Rows are removed in small chunks, each in its own transaction, so the
+    SQLite write lock is only held briefly and chat requests can still
+    save their turns while a large purge is running. Item impression
+    counters are lifetime totals and are not decremented by a purge.
+    """
+    try:
+        cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+        total_deleted = 0
+        batches = 0
+        
+        while True:
+            chunk = (
+                select(ChatHistory.id)
+                .where(ChatHistory.timestamp < cutoff)
+                .order_by(ChatHistory.id)
+                .limit(batch_size)
+                .scalar_subquery()
+            )
+            await db.execute(
+                delete(ChatMatchedItem).where(ChatMatchedItem.chat_id.in_(chunk))
+            )
+            result = await db.execute(
+                delete(ChatHistory).where(ChatHistory.id.in_(chunk))
+            )
+            await db.commit()
+            
+            deleted = result.rowcount or 0
+            if deleted == 0:
+                break
+            
+            total_deleted += deleted
+            batches += 1
+            
+            if deleted < batch_size:
+                break
+            
+            # Yield to the event loop between chunks
+            await asyncio.sleep(0)
+        
+        return {
+            "deleted": total_deleted,
+            "batches": batches,
+            "cutoff": cutoff,
+            "message": f"Deleted {total_deleted} records older than {older_than_days} days"
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error purging history: {str(e)}")
+
+
+@router.get("/analytics/popular")
+async def get_popular_items(
+    limit: int = Query(10, ge=1, le=100),
+    db: AsyncSession = Depends(get_db)
+):
+    """Most frequently recommended items, read from the impression counters"""
+    try:
+        result = await db.execute(
+            select(ItemImpression)
+            .order_by(ItemImpression.impressions.desc())
+            .limit(limit)
+        )
+        return [
+            {
+                "item_id": row.item_id,
+                "impressions": row.impressions,
+                "top_rank_count": row.top_rank_count,
+                "last_seen": row.last_seen,
+            }
+            for row in result.scalars().all()
+        ]
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching analytics: {str(e)}")
+
+
+@router.get("/analytics/items/{item_id}")
+async def get_item_analytics(
+    item_id: str,
+    db: AsyncSession = Depends(get_db)
+):
+    """How often a single item (e.g. TS01) has been recommended"""
+    try:
+        row = await db.get(ItemImpression, item_id)
+        return {
+            "item_id": item_id,
+            "impressions": row.impressions if row else 0,
+            "top_rank_count": row.top_rank_count if row else 0,
+            "last_seen": row.last_seen if row else None,
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching analytics: {str(e)}")
+
+
 @router.get("/context/{session_id}")
 async def get_context(session_id: str):
     """Get conversation context for debugging"""
@@ -1,34 +1,38 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query, Request
+from typing import Optional
+from app.config import CATALOG_CACHE_MAX_AGE_SECONDS, CATALOG_PAGE_MAX_LIMIT
 from app.models.schemas import Cuisine, CuisineCreate, CuisineUpdate
-import pandas as pd
-from app.config import EXCEL_FILE
-from app.services.excel_to_prolog import convert_excel_to_prolog
-from app.services.prolog_service import get_prolog_service
+from app.services.catalog_store import get_catalog_store
+from app.services.catalog_views import ListQuery, catalog_page
+from app.utils.http_cache import conditional_response
 
 router = APIRouter(prefix="/api/cuisine", tags=["Cuisine"])
 
-def load_excel():
-    """Load Excel data"""
-    return pd.read_excel(EXCEL_FILE)
-
-def save_excel(df):
-    """Save Excel data and regenerate Prolog KB"""
-    df.to_excel(EXCEL_FILE, index=False)
-    convert_excel_to_prolog()
-    # Reload Prolog service
-    get_prolog_service().load_kb()
-    get_prolog_service().load_excel()
-
 @router.get("/", response_model=list[Cuisine])
-async def get_all_cuisine():
-    """Get all cuisine items"""
+async def get_all_cuisine(
+    request: Request,
+    limit: Optional[int] = Query(None, ge=1, le=CATALOG_PAGE_MAX_LIMIT, description="Page size (default: everything)"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor header of the previous page"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. id,name,location,photo"),
+    location: Optional[str] = Query(None, description="Town or full location, e.g. Paoay"),
+    hub: Optional[str] = Query(None, description="Nearest transport hub, e.g. Laoag"),
+    keyword: Optional[str] = Query(None, description="One of the description keywords, e.g. beach"),
+    compact: bool = Query(False, description="Compact format: short keys, null fields left out")
+):
+    """
+    Get all cuisine items, or one page / a filtered subset of them
+    The JSON is encoded once per catalog version and tagged with an ETag;
+    If-None-Match with the current ETag gets a 304. X-Total-Count is the
+    number of matches; X-Next-Cursor is set while more pages remain.
+    """
     try:
-        df = load_excel()
-        cuisine_df = df[df['type'] == 'cuisine']
-        # Replace NaN with None
-        cuisine_df = cuisine_df.where(pd.notna(cuisine_df), None)
-        cuisine = cuisine_df.to_dict('records')
-        return cuisine
+        query = ListQuery(limit, cursor, fields, location, hub, keyword, compact)
+        page = catalog_page(get_catalog_store().snapshot, 'cuisine', Cuisine, query)
+        return conditional_response(
+            request, page.encoded, CATALOG_CACHE_MAX_AGE_SECONDS, headers=page.headers()
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -36,19 +40,12 @@ async def get_all_cuisine():
 async def get_cuisine(cuisine_id: str):
     """Get a specific cuisine by ID"""
     try:
-        df = load_excel()
-        cuisine = df[df['id'] == cuisine_id]
+        cuisine = get_catalog_store().get(cuisine_id)
         
-        if cuisine.empty:
+        if cuisine is None:
             raise HTTPException(status_code=404, detail="Cuisine not found")
         
-        # Replace NaN with None
-        cuisine_dict = cuisine.iloc[0].to_dict()
-        for key, value in cuisine_dict.items():
-            if pd.isna(value):
-                cuisine_dict[key] = None
-        
-        return cuisine_dict
+        return cuisine
     except HTTPException:
         raise
     except Exception as e:
@@ -58,18 +55,9 @@ async def get_cuisine(cuisine_id: str):
 async def create_cuisine(cuisine: CuisineCreate):
     """Create a new cuisine item"""
     try:
-        df = load_excel()
-        
-        # Check if ID already exists
-        if cuisine.id in df['id'].values:
-            raise HTTPException(status_code=400, detail="ID already exists")
-        
-        # Add new row
-        new_row = cuisine.model_dump()
-        df = pd.concat([df, pd.DataFrame([new_row])], ignore_index=True)
-        
-        # Save and regenerate KB
-        save_excel(df)
+        # Add new row; the ID check and the write are one transaction
+        if await get_catalog_store().create(cuisine.model_dump()) is None:
+            raise HTTPException(status_code=409, detail="ID already exists")
         
         return cuisine
     except HTTPException:
@@ -81,29 +69,13 @@ async def create_cuisine(cuisine: CuisineCreate):
 async def update_cuisine(cuisine_id: str, cuisine_update: CuisineUpdate):
     """Update a cuisine item"""
     try:
-        df = load_excel()
+        # Merge the changes into the stored row under the store's write lock
+        row = await get_catalog_store().update(cuisine_id, cuisine_update.model_dump(exclude_unset=True))
         
-        # Find the cuisine
-        idx = df[df['id'] == cuisine_id].index
-        
-        if len(idx) == 0:
+        if row is None:
             raise HTTPException(status_code=404, detail="Cuisine not found")
         
-        # Update fields
-        update_data = cuisine_update.model_dump(exclude_unset=True)
-        for key, value in update_data.items():
-            df.at[idx[0], key] = value
-        
-        # Save and regenerate KB
-        save_excel(df)
-        
-        # Return updated record with NaN handling
-        result_dict = df.iloc[idx[0]].to_dict()
-        for key, value in result_dict.items():
-            if pd.isna(value):
-                result_dict[key] = None
-        
-        return result_dict
+        return row
     except HTTPException:
         raise
     except Exception as e:
@@ -113,18 +85,10 @@ async def update_cuisine(cuisine_id: str, cuisine_update: CuisineUpdate):
 async def delete_cuisine(cuisine_id: str):
     """Delete a cuisine item"""
     try:
-        df = load_excel()
-        
-        # Check if exists
-        if cuisine_id not in df['id'].values:
+        # Delete row (False if it was already gone)
+        if not await get_catalog_store().delete(cuisine_id):
             raise HTTPException(status_code=404, detail="Cuisine not found")
         
-        # Delete row
-        df = df[df['id'] != cuisine_id]
-        
-        # Save and regenerate KB
-        save_excel(df)
-        
         return {"message": f"Cuisine {cuisine_id} deleted successfully"}
     except HTTPException:
         raise
@@ -1,9 +1,12 @@
 from fastapi import APIRouter, HTTPException, Query
 from app.models.location_schemas import (
-    LocationRequest, RouteResponse, NearbyPlace
+    LocationRequest, RouteResponse, NearbyPlace,
+    BatchRouteRequest, BatchRouteResponse,
+    ItineraryRequest, ItineraryResponse
 )
 from app.services.routing_service import get_routing_service
-from typing import List
+from app.utils.executor import run_blocking
+from typing import List, Optional
 
 router = APIRouter(prefix="/api/location", tags=["Location & Routing"])
 
@@ -26,10 +29,12 @@ async def get_route(request: LocationRequest):
     try:
         routing_service = get_routing_service()
         
-        route = routing_service.calculate_route(
+        route = await run_blocking(
+            routing_service.calculate_route,
             from_lat=request.latitude,
             from_lon=request.longitude,
-            destination_id=request.destination_id
+            destination_id=request.destination_id,
+            cost=request.cost
         )
         
         if not route:
@@ -45,6 +50,71 @@ async def get_route(request: LocationRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Routing error: {str(e)}")
 
+@router.post("/routes", response_model=BatchRouteResponse)
+async def get_routes(request: BatchRouteRequest):
+    """
+    Get routes from one location to several destinations in a single call
+    
+    Example:
+    ```json
+    {
+      "latitude": 18.1984,
+      "longitude": 120.5936,
+      "destination_ids": ["TS01", "TS02", "CU01"]
+    }
+    ```
+    
+    Destinations that cannot be routed are listed in `errors` instead of
+    failing the whole request
+    """
+    try:
+        routing_service = get_routing_service()
+        
+        routes, errors = await run_blocking(
+            routing_service.calculate_routes,
+            from_lat=request.latitude,
+            from_lon=request.longitude,
+            destination_ids=request.destination_ids,
+            cost=request.cost
+        )
+        
+        return BatchRouteResponse(routes=routes, errors=errors)
+    
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Routing error: {str(e)}")
+
+@router.post("/itinerary", response_model=ItineraryResponse)
+async def plan_itinerary(request: ItineraryRequest):
+    """
+    Plan a one-day trip through several destinations
+    
+    Example:
+    ```json
+    {
+      "latitude": 18.1984,
+      "longitude": 120.5936,
+      "destination_ids": ["TS01", "TS05", "CU02"],
+      "cost": "time"
+    }
+    ```
+    
+    Returns the stops in the best visiting order with step-by-step legs
+    """
+    try:
+        routing_service = get_routing_service()
+        
+        return await run_blocking(
+            routing_service.plan_itinerary,
+            from_lat=request.latitude,
+            from_lon=request.longitude,
+            destination_ids=request.destination_ids,
+            cost=request.cost,
+            time_budget_ms=request.time_budget_ms
+        )
+    
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Itinerary error: {str(e)}")
+
 @router.get("/nearby", response_model=List[NearbyPlace])
 async def get_nearby_places(
     latitude: float = Query(..., description="User's latitude"),
@@ -65,7 +135,8 @@ async def get_nearby_places(
     try:
         routing_service = get_routing_service()
         
-        nearby = routing_service.find_nearby_places(
+        nearby = await run_blocking(
+            routing_service.find_nearby_places,
             lat=latitude,
             lon=longitude,
             radius_km=radius_km,
@@ -77,6 +148,44 @@ async def get_nearby_places(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Nearby search error: {str(e)}")
 
+@router.get("/nearest", response_model=List[NearbyPlace])
+async def get_nearest_places(
+    latitude: float = Query(..., description="User's latitude"),
+    longitude: float = Query(..., description="User's longitude"),
+    k: int = Query(5, description="Number of places to return", ge=1, le=50),
+    item_type: Optional[str] = Query(None, description="tourist_spot or cuisine")
+):
+    """
+    Find the k places closest to the user, regardless of distance
+    
+    Example:
+    ```
+    GET /api/location/nearest?latitude=18.1984&longitude=120.5936&k=3
+    ```
+    """
+    try:
+        routing_service = get_routing_service()
+        
+        nearest = await run_blocking(
+            routing_service.find_nearest_places,
+            lat=latitude,
+            lon=longitude,
+            k=k,
+            item_type=item_type
+        )
+        
+        return nearest
+    
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Nearest search error: {str(e)}")
+
+@router.get("/route-cache/stats")
+async def get_route_cache_stats():
+    """
+    Route cache size and hit-rate counters
+    """
+    return get_routing_service().route_cache.stats()
+
 @router.get("/coordinates/{location_name}")
 async def get_location_coordinates(location_name: str):
     """
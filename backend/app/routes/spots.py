@@ -1,34 +1,38 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query, Request
+from typing import Optional
+from app.config import CATALOG_CACHE_MAX_AGE_SECONDS, CATALOG_PAGE_MAX_LIMIT
 from app.models.schemas import TouristSpot, TouristSpotCreate, TouristSpotUpdate
-import pandas as pd
-from app.config import EXCEL_FILE
-from app.services.excel_to_prolog import convert_excel_to_prolog
-from app.services.prolog_service import get_prolog_service
+from app.services.catalog_store import get_catalog_store
+from app.services.catalog_views import ListQuery, catalog_page
+from app.utils.http_cache import conditional_response
 
 router = APIRouter(prefix="/api/spots", tags=["Tourist Spots"])
 
-def load_excel():
-    """Load Excel data"""
-    return pd.read_excel(EXCEL_FILE)
-
-def save_excel(df):
-    """Save Excel data and regenerate Prolog KB"""
-    df.to_excel(EXCEL_FILE, index=False)
-    convert_excel_to_prolog()
-    # Reload Prolog service
-    get_prolog_service().load_kb()
-    get_prolog_service().load_excel()
-
 @router.get("/", response_model=list[TouristSpot])
-async def get_all_spots():
-    """Get all tourist spots"""
+async def get_all_spots(
+    request: Request,
+    limit: Optional[int] = Query(None, ge=1, le=CATALOG_PAGE_MAX_LIMIT, description="Page size (default: everything)"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor header of the previous page"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. id,name,location,photo"),
+    location: Optional[str] = Query(None, description="Town or full location, e.g. Paoay"),
+    hub: Optional[str] = Query(None, description="Nearest transport hub, e.g. Laoag"),
+    keyword: Optional[str] = Query(None, description="One of the description keywords, e.g. beach"),
+    compact: bool = Query(False, description="Compact format: short keys, null fields left out")
+):
+    """
+    Get all tourist spots, or one page / a filtered subset of them
+    The JSON is encoded once per catalog version and tagged with an ETag;
+    If-None-Match with the current ETag gets a 304. X-Total-Count is the
+    number of matches; X-Next-Cursor is set while more pages remain.
+    """
     try:
-        df = load_excel()
-        spots_df = df[df['type'] == 'tourist_spot']
-        # Replace NaN with None
-        spots_df = spots_df.where(pd.notna(spots_df), None)
-        spots = spots_df.to_dict('records')
-        return spots
+        query = ListQuery(limit, cursor, fields, location, hub, keyword, compact)
+        page = catalog_page(get_catalog_store().snapshot, 'tourist_spot', TouristSpot, query)
+        return conditional_response(
+            request, page.encoded, CATALOG_CACHE_MAX_AGE_SECONDS, headers=page.headers()
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -36,19 +40,12 @@ async def get_all_spots():
 async def get_spot(spot_id: str):
     """Get a specific tourist spot by ID"""
     try:
-        df = load_excel()
-        spot = df[df['id'] == spot_id]
+        spot = get_catalog_store().get(spot_id)
         
-        if spot.empty:
+        if spot is None:
             raise HTTPException(status_code=404, detail="Tourist spot not found")
         
-        # Replace NaN with None
-        spot_dict = spot.iloc[0].to_dict()
-        for key, value in spot_dict.items():
-            if pd.isna(value):
-                spot_dict[key] = None
-        
-        return spot_dict
+        return spot
     except HTTPException:
         raise
     except Exception as e:
@@ -58,18 +55,9 @@ async def get_spot(spot_id: str):
 async def create_spot(spot: TouristSpotCreate):
     """Create a new tourist spot"""
     try:
-        df = load_excel()
-        
-        # Check if ID already exists
-        if spot.id in df['id'].values:
-            raise HTTPException(status_code=400, detail="ID already exists")
-        
-        # Add new row
-        new_row = spot.model_dump()
-        df = pd.concat([df, pd.DataFrame([new_row])], ignore_index=True)
-        
-        # Save and regenerate KB
-        save_excel(df)
+        # Add new row; the ID check and the write are one transaction
+        if await get_catalog_store().create(spot.model_dump()) is None:
+            raise HTTPException(status_code=409, detail="ID already exists")
         
         return spot
     except HTTPException:
@@ -81,29 +69,13 @@ async def create_spot(spot: TouristSpotCreate):
 async def update_spot(spot_id: str, spot_update: TouristSpotUpdate):
     """Update a tourist spot"""
     try:
-        df = load_excel()
+        # Merge the changes into the stored row under the store's write lock
+        row = await get_catalog_store().update(spot_id, spot_update.model_dump(exclude_unset=True))
         
-        # Find the spot
-        idx = df[df['id'] == spot_id].index
-        
-        if len(idx) == 0:
+        if row is None:
             raise HTTPException(status_code=404, detail="Tourist spot not found")
         
-        # Update fields
-        update_data = spot_update.model_dump(exclude_unset=True)
-        for key, value in update_data.items():
-            df.at[idx[0], key] = value
-        
-        # Save and regenerate KB
-        save_excel(df)
-        
-        # Return updated record with NaN handling
-        result_dict = df.iloc[idx[0]].to_dict()
-        for key, value in result_dict.items():
-            if pd.isna(value):
-                result_dict[key] = None
-        
-        return result_dict
+        return row
     except HTTPException:
         raise
     except Exception as e:
@@ -113,18 +85,10 @@ async def update_spot(spot_id: str, spot_update: TouristSpotUpdate):
 async def delete_spot(spot_id: str):
     """Delete a tourist spot"""
     try:
-        df = load_excel()
-        
-        # Check if exists
-        if spot_id not in df['id'].values:
+        # Delete row (False if it was already gone)
+        if not await get_catalog_store().delete(spot_id):
             raise HTTPException(status_code=404, detail="Tourist spot not found")
         
-        # Delete row
-        df = df[df['id'] != spot_id]
-        
-        # Save and regenerate KB
-        save_excel(df)
-        
         return {"message": f"Tourist spot {spot_id} deleted successfully"}
     except HTTPException:
         raise
@@ -0,0 +1,69 @@
+"""
+Excel import/export for the catalog tables (batch tool)
+The database is the system of record; use this to load an edited
+workbook or to hand the current catalog to someone as a spreadsheet.
+A running API picks an import up within CATALOG_REFRESH_SECONDS.
+`kb` exports the catalog as a Prolog file (app/prolog/kb.pl by default)
+for use outside the API.
+
+    python -m app.services.catalog_excel export [path]
+    python -m app.services.catalog_excel import [path]
+    python -m app.services.catalog_excel kb [path]
+"""
+import argparse
+import asyncio
+from pathlib import Path
+
+import pandas as pd
+
+from app.config import EXCEL_FILE, PROLOG_KB
+from app.database import CATALOG_COLUMNS, init_db, async_session, read_catalog, replace_catalog
+from app.services.excel_to_prolog import convert_excel_to_prolog
+
+async def import_excel(path: Path = EXCEL_FILE) -> int:
+    """Replace the catalog with the workbook's rows; returns the new catalog version"""
+    df = pd.read_excel(path)
+    missing = [column for column in ("id", "name", "type") if column not in df.columns]
+    if missing:
+        raise ValueError(f"{path} is missing columns: {', '.join(missing)}")
+
+    await init_db()
+    async with async_session() as db:
+        version = await replace_catalog(db, df.to_dict("records"))
+        await db.commit()
+
+    print(f"✓ Imported {len(df)} items from {path} (catalog version {version})")
+    return version
+
+async def export_excel(path: Path = EXCEL_FILE) -> int:
+    """Write the catalog to a workbook; returns the number of rows"""
+    await init_db()
+    async with async_session() as db:
+        rows = await read_catalog(db)
+
+    pd.DataFrame(rows, columns=CATALOG_COLUMNS).to_excel(path, index=False)
+    print(f"✓ Exported {len(rows)} items to {path}")
+    return len(rows)
+
+async def export_kb(path: Path = PROLOG_KB) -> int:
+    """Write the catalog as a Prolog knowledge base file; returns the number of items"""
+    await init_db()
+    async with async_session() as db:
+        rows = await read_catalog(db)
+
+    convert_excel_to_prolog(rows, path)
+    print(f"✓ Exported {len(rows)} items to {path}")
+    return len(rows)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Import/export the catalog as an Excel workbook (or export it as Prolog)")
+    parser.add_argument("command", choices=["import", "export", "kb"])
+    parser.add_argument("path", nargs="?", type=Path)
+    args = parser.parse_args()
+
+    if args.command == "import":
+        asyncio.run(import_excel(args.path or EXCEL_FILE))
+    elif args.command == "export":
+        asyncio.run(export_excel(args.path or EXCEL_FILE))
+    else:
+        asyncio.run(export_kb(args.path or PROLOG_KB))
@@ -0,0 +1,137 @@
+"""
+Immutable, versioned views of the catalog
+A snapshot bundles everything derived from one catalog version: the
+rows, an id -> geocoded row map, the stemmed text the fallback matcher
+searches, the nearby-places index and (once the Prolog service has
+loaded it) the KB version that makes that version's facts visible.
+Nothing in a snapshot changes after it is published. Rows are plain dicts, so
+serving the catalog does not need pandas.
+
+CatalogStore builds the next snapshot off to the side and publishes it
+by swapping one reference, so a request that reads `store.snapshot` once
+keeps a consistent view until it finishes; the old snapshot is freed as
+soon as the last request holding it lets go.
+"""
+import threading
+from typing import Any, Callable, Dict, Hashable, List, Optional, Sequence, Tuple
+
+from app.services.geocoding import geocode_row, COORD_NONE
+from app.services.nlp_processor import get_nlp_processor
+from app.services.spatial_index import GridIndex
+from app.utils.helpers import is_missing
+
+# Grid cell size for the nearby-places index
+PLACE_INDEX_CELL_KM = 2.0
+
+def replace_row(
+    rows: Sequence[Dict[str, Any]],
+    item_id: str,
+    row: Optional[Dict[str, Any]]
+) -> Tuple[Dict[str, Any], ...]:
+    """
+    New row tuple with the item's row replaced by `row` (appended if the
+    item is new, dropped if row is None); the input is left untouched
+    """
+    if row is None:
+        return tuple(existing for existing in rows if existing['id'] != item_id)
+
+    rows = list(rows)
+    for position, existing in enumerate(rows):
+        if existing['id'] == item_id:
+            rows[position] = row
+            return tuple(rows)
+    rows.append(row)
+    return tuple(rows)
+
+def _search_text(row: Dict[str, Any]) -> str:
+    """Stemmed name/location/keywords/description, as search_in_excel matches against"""
+    nlp = get_nlp_processor()
+    combined = " ".join(
+        '' if is_missing(row.get(column)) else str(row[column]).lower()
+        for column in ('name', 'location', 'description_keywords', 'full_description')
+    )
+    return ' '.join(nlp.stem_word(w) for w in nlp.tokenize(combined))
+
+class CatalogSnapshot:
+    """One published catalog version; treat every attribute as read-only"""
+
+    def __init__(
+        self,
+        version: int,
+        rows: Tuple[Dict[str, Any], ...],
+        items: Dict[str, Dict[str, Any]],
+        search_texts: Dict[str, str]
+    ):
+        self.version = version
+        self.rows = rows  # Catalog rows (CATALOG_COLUMNS) in catalog order: API listings, KB facts
+        self.items = items  # id -> geocoded row (adds lat, lon, coord_source, geo_location, hub_location)
+        self.search_texts = search_texts  # id -> stemmed text, in catalog order
+        self.kb_version: Optional[int] = None  # Set by the Prolog service before publishing
+        # (parent's kb_version, changed item ID, new row or None) for a derived snapshot,
+        # so the Prolog service can load just that item on top of its parent
+        self.kb_change: Optional[Tuple[Optional[int], str, Optional[Dict[str, Any]]]] = None
+        self._memo: Dict[Hashable, Any] = {}
+        self._memo_lock = threading.Lock()
+        self._build_place_index()
+
+    @classmethod
+    def build(cls, version: int, rows: Sequence[Dict[str, Any]]) -> "CatalogSnapshot":
+        """Snapshot of a whole catalog (startup)"""
+        items = {}
+        search_texts = {}
+        for row in rows:
+            items[row['id']] = geocode_row(row)
+            search_texts[row['id']] = _search_text(row)
+        return cls(version, tuple(rows), items, search_texts)
+
+    def derive(self, version: int, item_id: str, row: Optional[Dict[str, Any]]) -> "CatalogSnapshot":
+        """
+        Next snapshot with one item replaced (row None = deleted)
+        Only that item is re-geocoded and re-stemmed; this snapshot is untouched.
+        """
+        items = dict(self.items)
+        search_texts = dict(self.search_texts)
+        if row is None:
+            items.pop(item_id, None)
+            search_texts.pop(item_id, None)
+        else:
+            items[item_id] = geocode_row(row)
+            search_texts[item_id] = _search_text(row)
+        snapshot = CatalogSnapshot(version, replace_row(self.rows, item_id, row), items, search_texts)
+        snapshot.kb_change = (self.kb_version, item_id, row)
+        return snapshot
+
+    def _build_place_index(self):
+        """Grid index over every item with known coordinates"""
+        self.places: List[Dict[str, Any]] = []
+        points = []
+        for item in self.items.values():
+            if item['coord_source'] != COORD_NONE:
+                self.places.append({
+                    'id': item['id'],
+                    'name': item['name'],
+                    'type': item['type'],
+                    'location': item['location'],
+                })
+                points.append((item['lat'], item['lon']))
+
+        self.place_index = GridIndex(points, cell_km=PLACE_INDEX_CELL_KM)
+
+    def memo(self, key: Hashable, build: Callable[[], Any]) -> Any:
+        """
+        Value derived from this snapshot (e.g. an encoded response), built on first use
+        It lives exactly as long as the snapshot, so a catalog edit needs no
+        invalidation. build() must not depend on anything else.
+        """
+        try:
+            return self._memo[key]
+        except KeyError:
+            pass
+        value = build()
+        with self._memo_lock:
+            return self._memo.setdefault(key, value)
+
+    def get(self, item_id: str) -> Optional[Dict[str, Any]]:
+        """Copy of an item's geocoded row (callers may modify it), or None"""
+        item = self.items.get(item_id)
+        return None if item is None else dict(item)
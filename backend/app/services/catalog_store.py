@@ -0,0 +1,219 @@
+"""
+In-memory view of the catalog tables with single-item edits
+The SQLite catalog (app/database.py) is the system of record: each
+create/update/delete is one transaction that also bumps the catalog
+version. The next CatalogSnapshot (rows, indexes and its Prolog KB
+version) is built off to the side and published by swapping
+`store.snapshot`. Excel and kb.pl are import/export formats only
+(app/services/catalog_excel.py); nothing here writes files.
+
+Changes made outside this process (an Excel import, another worker's
+edits) show up as a newer database version; every
+CATALOG_REFRESH_SECONDS the store compares versions and reloads the
+whole catalog when the database is ahead.
+"""
+import asyncio
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app.config import CATALOG_REFRESH_SECONDS
+from app.database import (
+    async_session,
+    catalog_row,
+    read_catalog,
+    read_catalog_item,
+    get_catalog_version,
+    bump_catalog_version,
+    write_catalog_item,
+    delete_catalog_item
+)
+from app.services.catalog_snapshot import CatalogSnapshot
+from app.utils.executor import run_blocking
+from app.utils.log import get_logger
+
+logger = get_logger(__name__)
+
+class CatalogStore:
+    """
+    Catalog rows loaded from the database, kept in step with every write
+    Readers take `snapshot` once per request; writers replace it whole.
+    """
+
+    def __init__(self, rows: List[Dict[str, Any]], version: int):
+        self.snapshot = CatalogSnapshot.build(version, [catalog_row(row) for row in rows])
+        self._write_lock = asyncio.Lock()
+        self._watch_task: Optional[asyncio.Task] = None
+
+    @property
+    def version(self) -> int:
+        """Database catalog version of the published snapshot"""
+        return self.snapshot.version
+
+    @property
+    def rows(self) -> Tuple[Dict[str, Any], ...]:
+        """Catalog rows (CATALOG_COLUMNS) of the published snapshot, in catalog order"""
+        return self.snapshot.rows
+
+    def get(self, item_id: str) -> Optional[Dict[str, Any]]:
+        """Copy of an item's row, or None"""
+        for row in self.snapshot.rows:
+            if row['id'] == item_id:
+                return dict(row)
+        return None
+
+    async def create(self, row: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Add a new item; returns the stored row, or None if the ID is taken"""
+        row = catalog_row(row)
+        written, row = await self._apply(row['id'], lambda current: row, exists=False)
+        return row if written else None
+
+    async def update(self, item_id: str, changes: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Change some fields of an item; returns the stored row, or None if there is no such item"""
+        written, row = await self._apply(
+            item_id,
+            lambda current: catalog_row({**current, **changes, 'id': item_id}),
+            exists=True
+        )
+        return row if written else None
+
+    async def delete(self, item_id: str) -> bool:
+        """Remove one item; False if there is no such item"""
+        written, _ = await self._apply(item_id, lambda current: None, exists=True)
+        return written
+
+    async def _apply(
+        self,
+        item_id: str,
+        edit: Callable[[Optional[Dict[str, Any]]], Optional[Dict[str, Any]]],
+        exists: bool
+    ) -> Tuple[bool, Optional[Dict[str, Any]]]:
+        """
+        Replace an item's stored row with edit(stored row) (None deletes it)
+        The read, the check and the write share the write lock and one
+        transaction, so concurrent edits of an item cannot interleave.
+        Nothing is written unless the item's existence matches `exists`.
+        Returns (written, new row).
+        """
+        async with self._write_lock:
+            async with async_session() as db:
+                # Bumping first opens the write transaction, so the reads below
+                # also see other processes' committed edits, and no new ones
+                version = await bump_catalog_version(db)
+                current = await read_catalog_item(db, item_id)
+                if (current is not None) != exists:
+                    return False, None
+                row = edit(current)
+                if row is None:
+                    await delete_catalog_item(db, item_id)
+                else:
+                    await write_catalog_item(db, row)
+                # Building the snapshot and loading its KB facts is blocking; keep it off
+                # the event loop. It is built before committing: if it fails, the
+                # transaction rolls back and the database stays at the published version
+                rows = None
+                if version == self.version + 1:
+                    snapshot = await run_blocking(_next_snapshot, self.snapshot, version, item_id, row)
+                else:
+                    # Catalog changed elsewhere since the last refresh: rebuild it whole
+                    rows = await read_catalog(db)
+                    snapshot = await run_blocking(_full_snapshot, version, rows)
+                await db.commit()
+
+            self.snapshot = snapshot
+            if rows is None:
+                _forget_item(item_id)
+            else:
+                _forget_all()
+        return True, row
+
+    async def refresh(self) -> bool:
+        """Reload the catalog if the database has a newer version; True if it did"""
+        async with self._write_lock:
+            async with async_session() as db:
+                version = await get_catalog_version(db)
+                if version == self.version:
+                    return False
+                # Rows read after the version are at least that new; if they are
+                # newer still, the next check sees a version ahead and reloads again
+                rows = await read_catalog(db)
+
+            self.snapshot = await run_blocking(_full_snapshot, version, rows)
+            _forget_all()
+        logger.info("Catalog version %d reloaded from the database (%d items)", version, len(rows))
+        return True
+
+    def start_watching(self):
+        """Check for changes made outside this process every CATALOG_REFRESH_SECONDS"""
+        if CATALOG_REFRESH_SECONDS > 0 and self._watch_task is None:
+            self._watch_task = asyncio.create_task(self._watch())
+
+    async def _watch(self):
+        while True:
+            await asyncio.sleep(CATALOG_REFRESH_SECONDS)
+            try:
+                await self.refresh()
+            except Exception:
+                logger.exception("Checking the catalog version failed")
+
+    async def close(self):
+        """Stop the version checks (called on application shutdown)"""
+        if self._watch_task is not None:
+            self._watch_task.cancel()
+
+
+def _next_snapshot(
+    current: CatalogSnapshot,
+    version: int,
+    item_id: str,
+    row: Optional[Dict[str, Any]]
+) -> CatalogSnapshot:
+    """Snapshot with one item changed, with its KB facts loaded, ready to publish"""
+    from app.services.prolog_service import get_prolog_service
+
+    snapshot = current.derive(version, item_id, row)
+    get_prolog_service().load_snapshot_kb(snapshot)
+    return snapshot
+
+def _full_snapshot(version: int, rows: List[Dict[str, Any]]) -> CatalogSnapshot:
+    """Snapshot of the whole catalog as read from the database, with its KB facts loaded"""
+    from app.services.prolog_service import get_prolog_service
+
+    snapshot = CatalogSnapshot.build(version, [catalog_row(row) for row in rows])
+    get_prolog_service().load_snapshot_kb(snapshot)
+    return snapshot
+
+def _forget_item(item_id: str):
+    """Drop results derived from an item's previous version"""
+    from app.services.routing_service import get_routing_service
+
+    get_routing_service().invalidate_item(item_id)
+
+def _forget_all():
+    """Drop results derived from any previous catalog version"""
+    from app.services.routing_service import get_routing_service
+
+    get_routing_service().invalidate_catalog()
+
+
+# Singleton, loaded by init_catalog_store() at startup
+_catalog_store: Optional[CatalogStore] = None
+
+async def init_catalog_store() -> CatalogStore:
+    """Load the catalog tables into memory (call after init_db)"""
+    global _catalog_store
+    async with async_session() as db:
+        rows = await read_catalog(db)
+        version = await get_catalog_version(db)
+    _catalog_store = CatalogStore(rows, version)
+    _catalog_store.start_watching()
+    logger.info("Catalog version %d loaded (%d items)", version, len(rows))
+    return _catalog_store
+
+def get_catalog_store() -> CatalogStore:
+    if _catalog_store is None:
+        raise RuntimeError("Catalog store not loaded; call init_catalog_store() first")
+    return _catalog_store
+
+async def close_catalog_store():
+    """Stop the store's background work if it was loaded"""
+    if _catalog_store is not None:
+        await _catalog_store.close()
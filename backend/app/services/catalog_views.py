@@ -0,0 +1,232 @@
+"""
+Encoded catalog responses
+Serialising the spot/cuisine lists (validation through the response
+model plus JSON encoding) is done once per catalog snapshot; requests
+for the same version are served from the stored bytes.
+
+Paged, filtered or projected requests are answered from a per-snapshot
+CatalogListView: location/hub/keyword indexes and each item's fields
+pre-encoded as JSON fragments, so building a page costs in proportion
+to the page rather than the catalog.
+
+Every response also exists in the compact format (app/services/compact.py).
+"""
+import base64
+import bisect
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple, Type
+
+from pydantic import BaseModel, TypeAdapter
+from pydantic_core import to_json
+
+from app.services.catalog_snapshot import CatalogSnapshot
+from app.services.compact import compact_item, compact_key
+from app.utils.fast_json import dumps
+from app.utils.helpers import parse_fields
+from app.utils.http_cache import EncodedBody
+
+_list_adapters: Dict[Type[BaseModel], TypeAdapter] = {}
+
+def _list_adapter(model: Type[BaseModel]) -> TypeAdapter:
+    adapter = _list_adapters.get(model)
+    if adapter is None:
+        adapter = _list_adapters[model] = TypeAdapter(List[model])
+    return adapter
+
+def encoded_list(
+    snapshot: CatalogSnapshot,
+    item_type: str,
+    model: Type[BaseModel],
+    compact: bool = False
+) -> EncodedBody:
+    """Every item of one type as a JSON array of `model`, encoded once per snapshot"""
+
+    def build() -> EncodedBody:
+        adapter = _list_adapter(model)
+        items = adapter.validate_python([row for row in snapshot.rows if row['type'] == item_type])
+        if compact:
+            return EncodedBody.of(dumps([compact_item(item.model_dump()) for item in items]))
+        return EncodedBody.of(adapter.dump_json(items))
+
+    return snapshot.memo(("list", item_type, model, compact), build)
+
+def _normalize(text: Optional[str]) -> str:
+    return " ".join(str(text).lower().split()) if text else ""
+
+def _place_keys(location: Optional[str]) -> List[str]:
+    """
+    Lookup keys for a location such as "Batac/Paoay, Ilocos Norte": the
+    full text plus each town ("batac", "paoay"), with "city of"/"city" dropped
+    """
+    full = _normalize(location)
+    if not full:
+        return []
+    keys = [full]
+    for town in full.split(",")[0].split("/"):
+        town = town.strip()
+        keys.append(town)
+        keys.append(town.removeprefix("city of ").removesuffix(" city"))
+    return list(dict.fromkeys(key for key in keys if key))
+
+def _keyword_keys(keywords: Optional[str]) -> List[str]:
+    return list(dict.fromkeys(
+        key for key in (_normalize(keyword) for keyword in str(keywords or "").split(",")) if key
+    ))
+
+@dataclass(frozen=True)
+class ListQuery:
+    """Paging, projection and filters of a list request (all optional)"""
+    limit: Optional[int] = None
+    cursor: Optional[str] = None
+    fields: Optional[str] = None
+    location: Optional[str] = None
+    hub: Optional[str] = None
+    keyword: Optional[str] = None
+    compact: bool = False
+
+    def is_full_list(self) -> bool:
+        """No paging, projection or filters (compact or not)"""
+        return all(value is None for value in (
+            self.limit, self.cursor, self.fields, self.location, self.hub, self.keyword
+        ))
+
+@dataclass(frozen=True)
+class CatalogPage:
+    encoded: EncodedBody
+    total: int  # Items matching the filters, across all pages
+    next_cursor: Optional[str] = None
+
+    def headers(self) -> Dict[str, str]:
+        headers = {"X-Total-Count": str(self.total)}
+        if self.next_cursor:
+            headers["X-Next-Cursor"] = self.next_cursor
+        return headers
+
+def encode_cursor(ordinal: int, item_id: str) -> str:
+    """Opaque cursor naming the last item of a page (its id, and its ordinal as a fallback)"""
+    return base64.urlsafe_b64encode(f"{ordinal}:{item_id}".encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[int, str]:
+    try:
+        ordinal, item_id = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode().split(":", 1)
+        return int(ordinal), item_id
+    except ValueError:
+        raise ValueError("Invalid cursor") from None
+
+class CatalogListView:
+    """
+    Items of one type in one snapshot, indexed for filtered/paged listing
+    Ordinals are positions in catalog order; every index maps a normalised
+    key to a sorted list of ordinals.
+    """
+
+    def __init__(self, rows: Sequence[dict], model: Type[BaseModel]):
+        items = _list_adapter(model).validate_python(list(rows))
+        self.fields = tuple(model.model_fields)
+        self.ids = [item.id for item in items]
+        self.ordinal_of = {item_id: ordinal for ordinal, item_id in enumerate(self.ids)}
+
+        # '"field":value' per item and field, joined per request; the
+        # compact fragments use the short keys and leave out null fields
+        keys = {field: to_json(field) + b":" for field in self.fields}
+        compact_keys = {field: to_json(compact_key(field)) + b":" for field in self.fields}
+        self.fragments: List[Dict[str, bytes]] = []
+        self.compact_fragments: List[Dict[str, bytes]] = []
+        for item in items:
+            values = {field: to_json(getattr(item, field)) for field in self.fields}
+            self.fragments.append({field: keys[field] + values[field] for field in self.fields})
+            self.compact_fragments.append({
+                field: compact_keys[field] + values[field]
+                for field in self.fields if getattr(item, field) is not None
+            })
+
+        self.by_location: Dict[str, List[int]] = {}
+        self.by_hub: Dict[str, List[int]] = {}
+        self.by_keyword: Dict[str, List[int]] = {}
+        for ordinal, item in enumerate(items):
+            for key in _place_keys(item.location):
+                self.by_location.setdefault(key, []).append(ordinal)
+            hub = _normalize(item.nearest_hub)
+            if hub:
+                self.by_hub.setdefault(hub, []).append(ordinal)
+            for key in _keyword_keys(item.description_keywords):
+                self.by_keyword.setdefault(key, []).append(ordinal)
+
+    def select(self, query: ListQuery) -> Sequence[int]:
+        """Ordinals of the items matching every given filter, in catalog order"""
+        matches: Optional[set] = None
+        for index, value in (
+            (self.by_location, query.location),
+            (self.by_hub, query.hub),
+            (self.by_keyword, query.keyword),
+        ):
+            if value is None:
+                continue
+            hits = index.get(_normalize(value), ())
+            matches = set(hits) if matches is None else matches.intersection(hits)
+        if matches is None:
+            return range(len(self.ids))
+        return sorted(matches)
+
+    def projection(self, fields: Optional[str]) -> Tuple[str, ...]:
+        return parse_fields(fields, self.fields)
+
+    def page(self, query: ListQuery) -> CatalogPage:
+        fields = self.projection(query.fields)
+        selected = self.select(query)
+
+        start = 0
+        if query.cursor:
+            ordinal, item_id = decode_cursor(query.cursor)
+            if item_id in self.ordinal_of:
+                after = self.ordinal_of[item_id]
+            else:
+                # The item was deleted since: its successors moved up one place
+                after = ordinal - 1
+            start = bisect.bisect_right(selected, after)
+
+        end = len(selected) if query.limit is None else min(len(selected), start + query.limit)
+        chosen = selected[start:end]
+        fragments = self.compact_fragments if query.compact else self.fragments
+        body = b"[" + b",".join(
+            b"{" + b",".join(
+                fragments[ordinal][field] for field in fields if field in fragments[ordinal]
+            ) + b"}"
+            for ordinal in chosen
+        ) + b"]"
+
+        next_cursor = None
+        if end < len(selected) and chosen:
+            last = chosen[-1]
+            next_cursor = encode_cursor(last, self.ids[last])
+        return CatalogPage(
+            EncodedBody.of(body, f"{len(selected)}:{next_cursor}"),
+            total=len(selected),
+            next_cursor=next_cursor
+        )
+
+def catalog_page(
+    snapshot: CatalogSnapshot,
+    item_type: str,
+    model: Type[BaseModel],
+    query: ListQuery
+) -> CatalogPage:
+    """
+    One response of a list endpoint; the unfiltered full list is the
+    memoised body from encoded_list(). Raises ValueError for a bad
+    `fields` or `cursor`.
+    """
+    if query.is_full_list():
+        return snapshot.memo(
+            ("full_page", item_type, model, query.compact),
+            lambda: CatalogPage(
+                encoded_list(snapshot, item_type, model, query.compact),
+                total=sum(1 for row in snapshot.rows if row['type'] == item_type)
+            )
+        )
+
+    view = snapshot.memo(
+        ("list_view", item_type, model),
+        lambda: CatalogListView([row for row in snapshot.rows if row['type'] == item_type], model)
+    )
+    return view.page(query)
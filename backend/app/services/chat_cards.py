@@ -0,0 +1,46 @@
+"""
+Pre-encoded chat result cards
+A card (one entry of ChatResponse.matched_items) depends only on the
+item and the catalog snapshot it was read from, so its JSON is encoded
+once per snapshot and reused by every chat turn that returns the item;
+the response body is then stitched together from the cached fragments.
+benchmarks/chat_cards.py measures the cost per card.
+"""
+from datetime import datetime
+from typing import Any, Dict, List, Sequence
+
+from app.services.catalog_snapshot import CatalogSnapshot
+from app.services.compact import compact_item
+from app.utils.fast_json import dumps, encoder_name
+
+def encoded_card(snapshot: CatalogSnapshot, item: Dict[str, Any], compact: bool = False) -> bytes:
+    """
+    JSON of one enriched matched item (photo_url and routing flags added),
+    encoded on first use per snapshot, optionally in the compact format
+    """
+    return snapshot.memo(
+        ("card", item['id'], compact),
+        lambda: dumps(compact_item(item) if compact else item)
+    )
+
+def encode_cards(
+    snapshot: CatalogSnapshot,
+    items: Sequence[Dict[str, Any]],
+    compact: bool = False
+) -> List[bytes]:
+    return [encoded_card(snapshot, item, compact) for item in items]
+
+def chat_response_body(
+    response_text: str,
+    cards: Sequence[bytes],
+    session_id: str,
+    timestamp: datetime
+) -> bytes:
+    """ChatResponse JSON with matched_items taken from pre-encoded cards"""
+    return b"".join((
+        b'{"response":', dumps(response_text),
+        b',"matched_items":[', b",".join(cards),
+        b'],"session_id":', dumps(session_id),
+        b',"timestamp":', dumps(timestamp),
+        b"}",
+    ))
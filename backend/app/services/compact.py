@@ -0,0 +1,41 @@
+"""
+Compact wire format for the mobile client (?compact=true)
+Item fields are renamed to the short keys below, null fields are left
+out, and photos are sent as their catalog photo id ("p", e.g. "saud")
+instead of a URL; the client builds "assets/<id>.jpg" itself.
+destination_id (always equal to id) is dropped as well.
+"""
+from typing import Any, Dict
+
+COMPACT_KEYS = {
+    'id': 'i',
+    'name': 'n',
+    'type': 't',
+    'location': 'l',
+    'description_keywords': 'k',
+    'full_description': 'd',
+    'best_time_to_visit': 'b',
+    'related_items': 'r',
+    'nearest_hub': 'h',
+    'photo': 'p',
+    'lat': 'la',
+    'lon': 'lo',
+    'coord_source': 'c',
+    'geo_location': 'g',
+    'hub_location': 'hl',
+    'has_routing': 'hr',
+}
+
+# Derivable on the client: photo_url from "p", destination_id from "i"
+COMPACT_DROPPED = frozenset({'photo_url', 'destination_id'})
+
+def compact_key(field: str) -> str:
+    return COMPACT_KEYS.get(field, field)
+
+def compact_item(item: Dict[str, Any]) -> Dict[str, Any]:
+    """Item dict in the compact format"""
+    return {
+        compact_key(field): value
+        for field, value in item.items()
+        if value is not None and field not in COMPACT_DROPPED
+    }
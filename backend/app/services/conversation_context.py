@@ -5,6 +5,9 @@ Maintains conversation history and context for follow-up queries
 from datetime import datetime, timedelta
 from collections import deque
 from typing import List, Dict, Optional, Set, Union
+from app.utils.log import get_logger, log_debug
+
+logger = get_logger(__name__)
 
 class ConversationContext:
     """
@@ -244,13 +247,13 @@ class ConversationManager:
             
             # Check if session should be reset due to inactivity
             if context.should_reset():
-                print(f"Session {session_id} timed out, resetting...")
+                logger.info("Session timed out, resetting", extra={"session_id": session_id})
                 context.reset()
             
             return context
         
         # Create new session
-        print(f"Creating new session: {session_id}")
+        log_debug(logger, "Creating new session", extra={"session_id": session_id})
         context = ConversationContext(session_id)
         self.sessions[session_id] = context
         return context
@@ -259,13 +262,13 @@ class ConversationManager:
         """Explicitly reset a session"""
         if session_id in self.sessions:
             self.sessions[session_id].reset()
-            print(f"Session {session_id} reset")
+            log_debug(logger, "Session reset", extra={"session_id": session_id})
     
     def delete_session(self, session_id: str):
         """Delete a session completely"""
         if session_id in self.sessions:
             del self.sessions[session_id]
-            print(f"Session {session_id} deleted")
+            log_debug(logger, "Session deleted", extra={"session_id": session_id})
     
     def cleanup_old_sessions(self):
         """Remove inactive sessions"""
@@ -278,7 +281,7 @@ class ConversationManager:
         
         for session_id in to_delete:
             del self.sessions[session_id]
-            print(f"Cleaned up session: {session_id}")
+            log_debug(logger, "Cleaned up session", extra={"session_id": session_id})
         
         return len(to_delete)
     
@@ -1,45 +1,39 @@
-import pandas as pd
-import json
-from pathlib import Path
 from typing import List, Dict, Optional
-from app.config import settings
+from app.services.catalog_store import get_catalog_store
+from app.utils.helpers import is_missing
+from app.utils.log import get_logger
+
+logger = get_logger(__name__)
 
 class DataLoader:
+    """
+    Copy of the catalog rows split by type, taken when it is created
+    It does not follow later catalog edits; read get_catalog_store().snapshot
+    for current data.
+    """
+    
     def __init__(self):
-        self.excel_path = Path("/data/ilocos_chatbot_dataset.xlsx")
         self.tourist_spots: List[Dict] = []
         self.cuisines: List[Dict] = []
         self.load_data()
     
     def load_data(self):
-        """Load data from Excel file"""
+        """Load data from the catalog store"""
         try:
-            if not self.excel_path.exists():
-                print(f"Warning: Excel file not found at {self.excel_path}")
-                return
-            
-            # Read Excel file
-            df = pd.read_excel(self.excel_path)
-            
-            # Clean column names
-            df.columns = df.columns.str.strip()
+            rows = get_catalog_store().rows
             
             # Separate tourist spots and cuisines
-            tourist_spots_df = df[df['type'] == 'tourist_spot']
-            cuisines_df = df[df['type'] == 'cuisine']
-            
-            # Convert to list of dictionaries
-            self.tourist_spots = tourist_spots_df.to_dict('records')
-            self.cuisines = cuisines_df.to_dict('records')
+            self.tourist_spots = [row for row in rows if row['type'] == 'tourist_spot']
+            self.cuisines = [row for row in rows if row['type'] == 'cuisine']
             
             # Clean NaN values
             self.tourist_spots = self._clean_nan(self.tourist_spots)
             self.cuisines = self._clean_nan(self.cuisines)
             
-            print(f"Loaded {len(self.tourist_spots)} tourist spots and {len(self.cuisines)} cuisines")
+            logger.info("Loaded %d tourist spots and %d cuisines", len(self.tourist_spots), len(self.cuisines))
             
         except Exception as e:
-            print(f"Error loading data: {e}")
+            logger.error("Error loading data: %s", e)
             self.tourist_spots = []
             self.cuisines = []
     
@@ -49,7 +43,7 @@ class DataLoader:
         for item in data:
             cleaned_item = {}
             for key, value in item.items():
-                if pd.isna(value):
+                if is_missing(value):
                     cleaned_item[key] = None
                 else:
                     cleaned_item[key] = str(value) if not isinstance(value, str) else value
@@ -162,5 +156,11 @@ class DataLoader:
                 return True
         return False
 
-# Global instance
-data_loader = DataLoader()
\ No newline at end of file
+# Singleton
+_data_loader: Optional[DataLoader] = None
+
+def get_data_loader() -> DataLoader:
+    global _data_loader
+    if _data_loader is None:
+        _data_loader = DataLoader()
+    return _data_loader
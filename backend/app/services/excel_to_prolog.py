@@ -1,10 +1,13 @@
-import pandas as pd
 from pathlib import Path
 from app.config import EXCEL_FILE, PROLOG_KB
+from app.utils.helpers import is_missing
+from app.utils.log import get_logger
+
+logger = get_logger(__name__)
 
 def sanitize_atom(text):
     """Convert text to a valid Prolog atom"""
-    if pd.isna(text):
+    if is_missing(text):
         return "'n/a'"
     
     text = str(text).strip()
@@ -16,121 +19,171 @@ def sanitize_atom(text):
     # This handles all special characters including newlines, tabs, etc.
     return f"'{text}'"
 
-def convert_excel_to_prolog():
-    """Convert Excel data to Prolog knowledge base"""
+# Fact predicates generated per item (name, arity); first argument is the item ID
+FACT_PREDICATES = [
+    ("item", 4),
+    ("has_keyword", 2),
+    ("description", 2),
+    ("best_time", 2),
+    ("related", 2),
+    ("nearest_hub", 2),
+]
+
+# Query rules (comment, clause without the final period), in KB order
+QUERY_RULES = [
+    ("Find items by keyword",
+     "find_by_keyword(Keyword, ID) :-\n"
+     "    has_keyword(ID, Keyword)"),
+    ("Find items by type",
+     "find_by_type(Type, ID) :-\n"
+     "    item(ID, _, Type, _)"),
+    ("Find items by location",
+     "find_by_location(Location, ID) :-\n"
+     "    item(ID, _, _, Location)"),
+    ("Find items by name (partial match)",
+     "find_by_name(Name, ID) :-\n"
+     "    item(ID, ItemName, _, _),\n"
+     "    sub_atom(ItemName, _, _, _, Name)"),
+    ("Get full item details",
+     "get_item_details(ID, Name, Type, Location, Desc, BestTime, Hub) :-\n"
+     "    item(ID, Name, Type, Location),\n"
+     "    description(ID, Desc),\n"
+     "    best_time(ID, BestTime),\n"
+     "    nearest_hub(ID, Hub)"),
+]
+
+# The API keeps every catalog version in one module (prolog_service.py):
+# each fact gets its item generation as an extra first argument, live/2
+# and dead/2 record the KB versions a generation is visible between, and
+# these rules take the KB version to search as an extra first argument
+SNAPSHOT_PREDICATES = [
+    ("live", 2),
+    ("dead", 2),
+]
+
+SNAPSHOT_RULES = [
+    "visible(G, V) :-\n"
+    "    live(G, From), From =< V,\n"
+    "    \\+ (dead(G, To), To =< V)",
+    "find_by_keyword(V, Keyword, ID) :-\n"
+    "    has_keyword(G, ID, Keyword), visible(G, V)",
+    "find_by_type(V, Type, ID) :-\n"
+    "    item(G, ID, _, Type, _), visible(G, V)",
+    "find_by_location(V, Location, ID) :-\n"
+    "    item(G, ID, _, _, Location), visible(G, V)",
+    "find_by_name(V, Name, ID) :-\n"
+    "    item(G, ID, ItemName, _, _), visible(G, V),\n"
+    "    sub_atom(ItemName, _, _, _, Name)",
+    "get_item_details(V, ID, Name, Type, Location, Desc, BestTime, Hub) :-\n"
+    "    item(G, ID, Name, Type, Location), visible(G, V),\n"
+    "    description(G, ID, Desc),\n"
+    "    best_time(G, ID, BestTime),\n"
+    "    nearest_hub(G, ID, Hub)",
+]
+
+def versioned_fact(fact, generation):
+    """An item_facts() fact with the item generation added as first argument"""
+    name, _, args = fact.partition("(")
+    return f"{name}({generation}, {args}"
+
+def _clean(value):
+    """Strip a cell value before sanitizing (empty cells pass through)"""
+    return value if is_missing(value) else str(value).strip()
+
+def item_facts(row):
+    """
+    Prolog facts for one catalog row (dict), without the
+    trailing period, in the order they appear in the KB
+    """
+    # Strip all values before sanitizing to remove leading/trailing spaces
+    item_id = sanitize_atom(_clean(row['id']))
+    name = sanitize_atom(_clean(row['name']))
+    item_type = sanitize_atom(_clean(row['type']))
+    location = sanitize_atom(_clean(row['location']))
     
-    # Read Excel file
-    df = pd.read_excel(EXCEL_FILE)
+    # Main fact
+    facts = [f"item({item_id}, {name}, {item_type}, {location})"]
+    
+    # Description keywords as separate facts for better matching
+    if not is_missing(row.get('description_keywords')):
+        keywords = str(row['description_keywords']).split(',')
+        for keyword in keywords:
+            keyword = keyword.strip()
+            if keyword:
+                kw_atom = sanitize_atom(keyword)
+                facts.append(f"has_keyword({item_id}, {kw_atom})")
     
-    # Create Prolog file
+    # Full description
+    full_desc = sanitize_atom(_clean(row.get('full_description')))
+    facts.append(f"description({item_id}, {full_desc})")
+    
+    # Best time to visit
+    best_time = sanitize_atom(_clean(row.get('best_time_to_visit')))
+    facts.append(f"best_time({item_id}, {best_time})")
+    
+    # Related items
+    if not is_missing(row.get('related_items')):
+        related = str(row['related_items']).split(',')
+        for rel in related:
+            rel = rel.strip()
+            if rel and rel.lower() != 'n/a':
+                rel_atom = sanitize_atom(rel)
+                facts.append(f"related({item_id}, {rel_atom})")
+    
+    # Nearest hub
+    hub = sanitize_atom(_clean(row.get('nearest_hub')))
+    facts.append(f"nearest_hub({item_id}, {hub})")
+    
+    return facts
+
+def build_kb(rows):
+    """Full Prolog knowledge base text for a list of catalog rows"""
     prolog_content = []
     prolog_content.append("% Ilocos Tourism Knowledge Base")
     prolog_content.append("% Auto-generated from Excel data\n")
     
     # Add discontiguous directives to prevent warnings
-    prolog_content.extend([
-        "% Discontiguous directives",
-        ":- discontiguous item/4.",
-        ":- discontiguous has_keyword/2.",
-        ":- discontiguous description/2.",
-        ":- discontiguous best_time/2.",
-        ":- discontiguous related/2.",
-        ":- discontiguous nearest_hub/2.",
-        ""
-    ])
+    prolog_content.append("% Discontiguous directives")
+    prolog_content.extend(f":- discontiguous {name}/{arity}." for name, arity in FACT_PREDICATES)
+    prolog_content.append("")
     
     # Process each row
-    for _, row in df.iterrows():
-        # Strip all values before sanitizing to remove leading/trailing spaces
-        item_id = sanitize_atom(str(row['id']).strip() if pd.notna(row['id']) else row['id'])
-        name = sanitize_atom(str(row['name']).strip() if pd.notna(row['name']) else row['name'])
-        item_type = sanitize_atom(str(row['type']).strip() if pd.notna(row['type']) else row['type'])
-        location = sanitize_atom(str(row['location']).strip() if pd.notna(row['location']) else row['location'])
-        
-        # Main fact
-        prolog_content.append(
-            f"item({item_id}, {name}, {item_type}, {location})."
-        )
-        
-        # Description keywords as separate facts for better matching
-        if pd.notna(row['description_keywords']):
-            keywords = str(row['description_keywords']).split(',')
-            for keyword in keywords:
-                keyword = keyword.strip()
-                if keyword:
-                    kw_atom = sanitize_atom(keyword)
-                    prolog_content.append(
-                        f"has_keyword({item_id}, {kw_atom})."
-                    )
-        
-        # Full description
-        full_desc = sanitize_atom(str(row['full_description']).strip() if pd.notna(row['full_description']) else row['full_description'])
-        prolog_content.append(
-            f"description({item_id}, {full_desc})."
-        )
-        
-        # Best time to visit
-        best_time = sanitize_atom(str(row['best_time_to_visit']).strip() if pd.notna(row['best_time_to_visit']) else row['best_time_to_visit'])
-        prolog_content.append(
-            f"best_time({item_id}, {best_time})."
-        )
-        
-        # Related items
-        if pd.notna(row['related_items']):
-            related = str(row['related_items']).split(',')
-            for rel in related:
-                rel = rel.strip()
-                if rel and rel.lower() != 'n/a':
-                    rel_atom = sanitize_atom(rel)
-                    prolog_content.append(
-                        f"related({item_id}, {rel_atom})."
-                    )
-        
-        # Nearest hub
-        hub = sanitize_atom(str(row['nearest_hub']).strip() if pd.notna(row['nearest_hub']) else row['nearest_hub'])
-        prolog_content.append(
-            f"nearest_hub({item_id}, {hub})."
-        )
-        
+    for row in rows:
+        prolog_content.extend(f"{fact}." for fact in item_facts(row))
         prolog_content.append("")  # Empty line for readability
     
     # Add query rules
-    prolog_content.extend([
-        "\n% Query Rules",
-        "% Find items by keyword",
-        "find_by_keyword(Keyword, ID) :-",
-        "    has_keyword(ID, Keyword).",
-        "",
-        "% Find items by type",
-        "find_by_type(Type, ID) :-",
-        "    item(ID, _, Type, _).",
-        "",
-        "% Find items by location",
-        "find_by_location(Location, ID) :-",
-        "    item(ID, _, _, Location).",
-        "",
-        "% Find items by name (partial match)",
-        "find_by_name(Name, ID) :-",
-        "    item(ID, ItemName, _, _),",
-        "    sub_atom(ItemName, _, _, _, Name).",
-        "",
-        "% Get full item details",
-        "get_item_details(ID, Name, Type, Location, Desc, BestTime, Hub) :-",
-        "    item(ID, Name, Type, Location),",
-        "    description(ID, Desc),",
-        "    best_time(ID, BestTime),",
-        "    nearest_hub(ID, Hub).",
-    ])
+    prolog_content.append("\n% Query Rules")
+    for i, (comment, clause) in enumerate(QUERY_RULES):
+        if i:
+            prolog_content.append("")
+        prolog_content.append(f"% {comment}")
+        prolog_content.append(f"{clause}.")
+    
+    return '\n'.join(prolog_content)
+
+def convert_excel_to_prolog(rows=None, path=PROLOG_KB):
+    """
+    Convert Excel data (or catalog rows) to a Prolog knowledge base file
+    Export only: the API loads each catalog snapshot's facts into Prolog
+    itself and never consults this file.
+    """
+    
+    # Read Excel file
+    if rows is None:
+        import pandas as pd
+        rows = pd.read_excel(EXCEL_FILE).to_dict('records')
     
     # Write to file
-    PROLOG_KB.parent.mkdir(parents=True, exist_ok=True)
-    with open(PROLOG_KB, 'w', encoding='utf-8') as f:
-        f.write('\n'.join(prolog_content))
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(build_kb(rows))
     
-    print(f"✓ Prolog KB generated at {PROLOG_KB}")
-    print(f"✓ Processed {len(df)} items")
+    logger.info("Prolog KB generated at %s (%d items)", path, len(rows))
     
     return True
 
 if __name__ == "__main__":
-    convert_excel_to_prolog()
\ No newline at end of file
+    convert_excel_to_prolog()
+    print(f"✓ Prolog KB generated at {PROLOG_KB}")
\ No newline at end of file
@@ -0,0 +1,96 @@
+"""
+Vectorized fare engine
+Evaluates the FARE_TARIFFS schedules over NumPy arrays of distances, so a
+whole page of results (or every candidate leg of a route) is priced in
+one pass. Values match the scalar calculate_*_fare functions.
+"""
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+from data.location_coordinates import (
+    FARE_TARIFFS,
+    TRANSPORT_ROUTES,
+    WALKING_DISTANCE_THRESHOLD_KM
+)
+
+# Longest trip a jeepney is suggested for; buses beyond (see RoutingService._get_best_transport_mode)
+JEEPNEY_MAX_DISTANCE_KM = 30
+
+WALKING = "walking"
+
+def round_cents(values: np.ndarray) -> np.ndarray:
+    """
+    round(value, 2) over an array, bit-for-bit equal to Python's round()
+    np.round scales by 100 first, which can flip values sitting on a
+    half-cent; those few are re-rounded in Python.
+    """
+    rounded = np.round(values, 2)
+    scaled = values * 100
+    near_half = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6
+    for idx in np.flatnonzero(near_half):
+        rounded.flat[idx] = round(float(values.flat[idx]), 2)
+    return rounded
+
+
+class FareEngine:
+    """Per-mode tariff table (base fare, included km, per km) as NumPy arrays"""
+
+    def __init__(self, tariffs: Dict = None):
+        tariffs = FARE_TARIFFS if tariffs is None else tariffs
+
+        # Mode 0 is walking (free); tariffed modes follow in table order
+        self.modes = [WALKING] + list(tariffs)
+        self.mode_ids = {mode: idx for idx, mode in enumerate(self.modes)}
+        self.base_fare = np.array([0.0] + [t["base_fare"] for t in tariffs.values()], dtype=np.float64)
+        self.included_km = np.array([np.inf] + [t["included_km"] for t in tariffs.values()], dtype=np.float64)
+        self.per_km = np.array([0.0] + [t["per_km"] for t in tariffs.values()], dtype=np.float64)
+
+        # Distance bands for suggesting a mode: walking, tricycle, jeepney, then bus
+        self._band_edges = np.array([
+            WALKING_DISTANCE_THRESHOLD_KM,
+            TRANSPORT_ROUTES["tricycle"]["max_distance_km"],
+            JEEPNEY_MAX_DISTANCE_KM,
+        ], dtype=np.float64)
+        self._band_modes = np.array([
+            self.mode_ids[WALKING],
+            self.mode_ids["tricycle"],
+            self.mode_ids["jeepney"],
+            self.mode_ids["bus"],
+        ], dtype=np.intp)
+
+    def fares(self, mode: str, distances: Sequence[float]) -> np.ndarray:
+        """Fare of every distance under one mode"""
+        distances = np.asarray(distances, dtype=np.float64)
+        return self.fares_by_mode(np.full(distances.shape, self.mode_ids[mode], dtype=np.intp), distances)
+
+    def fares_by_mode(self, mode_ids: np.ndarray, distances: Sequence[float]) -> np.ndarray:
+        """Fare of every (mode id, distance) pair; modes may differ per element"""
+        distances = np.asarray(distances, dtype=np.float64)
+        base = self.base_fare[mode_ids]
+        included = self.included_km[mode_ids]
+        additional = np.maximum(distances - included, 0.0) * self.per_km[mode_ids]
+        return np.where(distances <= included, base, round_cents(base + additional))
+
+    def suggest_modes(self, distances: Sequence[float]) -> np.ndarray:
+        """Mode id an unguided trip of each distance would use"""
+        distances = np.asarray(distances, dtype=np.float64)
+        return self._band_modes[np.searchsorted(self._band_edges, distances, side="left")]
+
+    def estimate(self, distances: Sequence[float]) -> Tuple[list, np.ndarray]:
+        """
+        Suggested mode and fare for trips of the given straight-line distances
+        Returns ([mode name, ...], fares)
+        """
+        mode_ids = self.suggest_modes(distances)
+        return [self.modes[idx] for idx in mode_ids], self.fares_by_mode(mode_ids, distances)
+
+
+# Singleton
+_fare_engine: Optional[FareEngine] = None
+
+def get_fare_engine() -> FareEngine:
+    global _fare_engine
+    if _fare_engine is None:
+        _fare_engine = FareEngine()
+    return _fare_engine
@@ -0,0 +1,81 @@
+"""
+Catalog geocoding
+Resolves every item's coordinates once when the catalog is loaded, so
+request paths read numeric columns instead of matching location strings.
+
+Resolution order (recorded in `coord_source`):
+- exact: the item's name or full location string is a known place
+- town:  the town parsed from "Town, Province" (e.g. "City of Batac" -> "Batac")
+- hub:   the item's nearest_hub
+- none:  no coordinates; the item cannot be routed
+"""
+from typing import Any, Dict, Optional, Tuple
+
+from app.utils.helpers import is_missing
+from data.location_coordinates import LOCATION_COORDINATES
+
+COORD_EXACT = "exact"
+COORD_TOWN = "town"
+COORD_HUB = "hub"
+COORD_NONE = "none"
+
+def parse_town(location: Any) -> Optional[str]:
+    """Town part of a location string ('Laoag City, Ilocos Norte' -> 'Laoag')"""
+    if is_missing(location):
+        return None
+
+    # "Piddig/Dingras, Ilocos Norte" -> "Piddig"
+    town = str(location).split(',')[0].split('/')[0].strip()
+    if town.startswith('City of '):
+        town = town[len('City of '):]
+    if town.endswith(' City'):
+        town = town[:-len(' City')]
+    return town or None
+
+def resolve_item(item: Dict[str, Any], coordinates: Dict = None) -> Tuple[Optional[float], Optional[float], str, Optional[str]]:
+    """
+    Coordinates for one catalog row
+    Returns (lat, lon, coord_source, place) where place is the
+    LOCATION_COORDINATES key used, or (None, None, 'none', None)
+    """
+    coordinates = LOCATION_COORDINATES if coordinates is None else coordinates
+
+    def clean(value):
+        return None if is_missing(value) else str(value).strip()
+
+    candidates = (
+        (COORD_EXACT, clean(item.get('name'))),
+        (COORD_EXACT, clean(item.get('location'))),
+        (COORD_TOWN, parse_town(item.get('location'))),
+        (COORD_HUB, clean(item.get('nearest_hub'))),
+    )
+    for source, place in candidates:
+        if place and place in coordinates:
+            point = coordinates[place]
+            return point['lat'], point['lon'], source, place
+
+    return None, None, COORD_NONE, None
+
+def resolve_hub(item: Dict[str, Any], coordinates: Dict = None) -> Optional[str]:
+    """The item's nearest_hub if it is a known place, else None"""
+    coordinates = LOCATION_COORDINATES if coordinates is None else coordinates
+    hub = item.get('nearest_hub')
+    if is_missing(hub):
+        return None
+    hub = str(hub).strip()
+    return hub if hub in coordinates else None
+
+def geocode_row(item: Dict[str, Any], coordinates: Dict = None) -> Dict[str, Any]:
+    """
+    Copy of one catalog row with lat/lon (None when unknown), coord_source,
+    geo_location and hub_location added
+    """
+    lat, lon, source, place = resolve_item(item, coordinates)
+    return {
+        **item,
+        'lat': lat,
+        'lon': lon,
+        'coord_source': source,
+        'geo_location': place,
+        'hub_location': resolve_hub(item, coordinates),
+    }
@@ -0,0 +1,98 @@
+"""
+Stop ordering for multi-destination itineraries
+Works on a square cost matrix where index 0 is the start point and
+1..n are the stops; the route is an open path (it does not return to 0).
+Small sets are solved exactly with Held-Karp dynamic programming, larger
+ones with nearest-neighbour construction improved by 2-opt.
+Deadlines are time.perf_counter() values.
+"""
+import time
+from typing import List, Optional, Sequence, Tuple
+
+def path_cost(matrix: Sequence[Sequence[float]], order: Sequence[int]) -> float:
+    """Cost of visiting `order` (stop indexes) starting from index 0"""
+    total = 0.0
+    current = 0
+    for stop in order:
+        total += matrix[current][stop]
+        current = stop
+    return total
+
+def held_karp(matrix: Sequence[Sequence[float]], deadline: Optional[float] = None) -> Optional[List[int]]:
+    """
+    Optimal visiting order of stops 1..n, O(n^2 * 2^n)
+    dp[mask][j] is the cheapest path from 0 through the stops in mask ending at j.
+    Returns None if `deadline` passes before the table is complete.
+    """
+    n = len(matrix) - 1
+    if n <= 0:
+        return []
+
+    full = (1 << n) - 1
+    inf = float('inf')
+    dp = [[inf] * n for _ in range(1 << n)]
+    parent = [[-1] * n for _ in range(1 << n)]
+    for j in range(n):
+        dp[1 << j][j] = matrix[0][j + 1]
+
+    for mask in range(1, full + 1):
+        if deadline is not None and time.perf_counter() >= deadline:
+            return None
+        row = dp[mask]
+        for j in range(n):
+            cost_j = row[j]
+            if cost_j == inf:
+                continue
+            from_row = matrix[j + 1]
+            for k in range(n):
+                bit = 1 << k
+                if mask & bit:
+                    continue
+                candidate = cost_j + from_row[k + 1]
+                if candidate < dp[mask | bit][k]:
+                    dp[mask | bit][k] = candidate
+                    parent[mask | bit][k] = j
+
+    last = min(range(n), key=lambda j: dp[full][j])
+    order = []
+    mask = full
+    while last != -1:
+        order.append(last + 1)
+        previous = parent[mask][last]
+        mask ^= 1 << last
+        last = previous
+    order.reverse()
+    return order
+
+def nearest_neighbour(matrix: Sequence[Sequence[float]]) -> List[int]:
+    """Greedy order: always go to the cheapest unvisited stop next"""
+    remaining = set(range(1, len(matrix)))
+    order = []
+    current = 0
+    while remaining:
+        current = min(remaining, key=lambda stop: (matrix[current][stop], stop))
+        remaining.remove(current)
+        order.append(current)
+    return order
+
+def two_opt(matrix: Sequence[Sequence[float]], order: List[int], deadline: float) -> Tuple[List[int], bool]:
+    """
+    Improve an order by reversing segments until no reversal helps
+    Stops early at `deadline`.
+    Returns (order, converged)
+    """
+    best = list(order)
+    best_cost = path_cost(matrix, best)
+    improved = True
+    while improved:
+        improved = False
+        for i in range(len(best) - 1):
+            for k in range(i + 1, len(best)):
+                candidate = best[:i] + best[i:k + 1][::-1] + best[k + 1:]
+                candidate_cost = path_cost(matrix, candidate)
+                if candidate_cost < best_cost - 1e-9:
+                    best, best_cost = candidate, candidate_cost
+                    improved = True
+            if time.perf_counter() >= deadline:
+                return best, False
+    return best, True
@@ -1,49 +1,164 @@
-from pyswip import Prolog
-from app.config import PROLOG_KB
-import pandas as pd
-from app.config import EXCEL_FILE
 from app.services.conversation_context import get_conversation_manager
+from app.services.catalog_store import get_catalog_store
+from app.services.excel_to_prolog import (
+    FACT_PREDICATES, SNAPSHOT_PREDICATES, SNAPSHOT_RULES, item_facts, versioned_fact
+)
+from app.utils.helpers import is_missing
+from app.utils.log import get_logger, log_debug, Lazy
+from collections import deque
+from typing import Dict, Optional, Set
 import os
+import threading
+import weakref
+
+logger = get_logger(__name__)
+
+# Prolog module holding the facts of every loaded catalog snapshot
+KB_MODULE = "catalog_kb"
 
 class ContextAwarePrologService:
     def __init__(self):
+        # pyswip loads libswipl when imported, so it is imported here (during
+        # warm-up) rather than when the API module is imported
+        from pyswip import Prolog
+        try:
+            from pyswip.core import PL_thread_self, PL_thread_attach_engine
+        except ImportError:  # Older pyswip builds without the threading API
+            PL_thread_self = PL_thread_attach_engine = None
+        self._thread_self = PL_thread_self
+        self._thread_attach_engine = PL_thread_attach_engine
+        
         try:
             self.prolog = Prolog()
         except Exception as e:
-            print(f"⚠ Warning: PySwip initialization issue: {e}")
-            print("  This may be due to SWI-Prolog version incompatibility.")
-            print("  Recommended: Downgrade SWI-Prolog to version 8.4.3")
+            logger.warning(
+                "PySwip initialization issue: %s. This may be due to SWI-Prolog version "
+                "incompatibility; recommended: downgrade SWI-Prolog to version 8.4.3", e
+            )
             raise
         
-        self.excel_df = None
         self.conversation_manager = get_conversation_manager()
         
+        # pyswip allows only one open query at a time, and search now runs on
+        # executor threads, so every query goes through _query() under this lock
+        self._prolog_lock = threading.RLock()
+        
+        # Every snapshot's facts live in KB_MODULE, tagged with a generation
+        # per item version; a snapshot sees the generations visible at its
+        # KB version (see SNAPSHOT_RULES). Loading a snapshot derived from
+        # the latest one only retracts and asserts the changed item.
+        self._kb_build_lock = threading.Lock()
+        self._kb_version = 0  # Last KB version handed out
+        self._head: Optional[int] = None  # KB version the next derived snapshot may build on
+        self._head_generations: Dict[str, int] = {}  # item ID -> generation visible at _head
+        self._orphans: Set[int] = set()  # Generations of failed loads, hidden by the next full load
+        self._dead = deque()  # (KB version, generation) hidden from that version on, oldest first
+        self._loaded: Set[int] = set()  # KB versions of snapshots still alive
+        self._retired = deque()  # KB versions of snapshots garbage collected since the last load
+        self._generation = 0
+        self._init_kb_module()
+        
         # Photo base path configuration
         # This should match your frontend's public folder structure
         # Example: If photos are in frontend/public/assets/bagnet.jpg
         # Then PHOTO_BASE_PATH should be "assets"
         self.PHOTO_BASE_PATH = "assets"
         
-        self.load_kb()
-        self.load_excel()
+        self.load_snapshot_kb(get_catalog_store().snapshot)
     
-    def load_kb(self):
-        """Load Prolog knowledge base"""
-        try:
-            self.prolog.consult(str(PROLOG_KB))
-            print(f"✓ Prolog KB loaded from {PROLOG_KB}")
-        except Exception as e:
-            print(f"✗ Error loading Prolog KB: {e}")
-            raise
+    def _attach_thread(self):
+        """Give the calling thread its own Prolog engine if it has none yet"""
+        if self._thread_self is not None and self._thread_self() == -1:
+            self._thread_attach_engine(None)
     
-    def load_excel(self):
-        """Load Excel data for detail retrieval"""
-        try:
-            self.excel_df = pd.read_excel(EXCEL_FILE)
-            print(f"✓ Excel data loaded: {len(self.excel_df)} records")
-        except Exception as e:
-            print(f"✗ Error loading Excel: {e}")
-            raise
+    def _query(self, query: str) -> list:
+        """Run a Prolog query from any thread and return all solutions"""
+        with self._prolog_lock:
+            self._attach_thread()
+            return list(self.prolog.query(query))
+    
+    def _init_kb_module(self):
+        """Declare KB_MODULE's dynamic predicates and assert the snapshot query rules"""
+        for name, arity in FACT_PREDICATES:
+            self._query(f"dynamic({KB_MODULE}:{name}/{arity + 1})")
+        for name, arity in SNAPSHOT_PREDICATES:
+            self._query(f"dynamic({KB_MODULE}:{name}/{arity})")
+        for clause in SNAPSHOT_RULES:
+            self._query(f"assertz({KB_MODULE}:({clause}))")
+    
+    def load_snapshot_kb(self, snapshot) -> int:
+        """
+        Make a catalog snapshot's facts visible in KB_MODULE (no-op if
+        already done) and return its KB version
+        Searches pass that version to the query rules, so an edit published
+        while a search runs never changes the facts that search sees. A
+        snapshot derived from the last one loaded costs one item's
+        retract/assertz; any other snapshot reloads every row.
+        """
+        with self._kb_build_lock:
+            if snapshot.kb_version is not None:
+                return snapshot.kb_version
+            
+            self._drop_retired_generations()
+            self._kb_version += 1
+            version = self._kb_version
+            change = snapshot.kb_change
+            incremental = change is not None and self._head is not None and change[0] == self._head
+            if incremental:
+                _, item_id, row = change
+                hidden = [self._head_generations[item_id]] if item_id in self._head_generations else []
+                added = {} if row is None else {item_id: row}
+            else:
+                hidden = list(self._head_generations.values()) + list(self._orphans)
+                added = {row['id']: row for row in snapshot.rows}
+            
+            generations = {}
+            try:
+                if hidden:
+                    self._query(", ".join(f"assertz({KB_MODULE}:dead({g}, {version}))" for g in hidden))
+                for added_id, added_row in added.items():
+                    self._generation += 1
+                    g = generations[added_id] = self._generation
+                    self._query(", ".join(
+                        [f"assertz({KB_MODULE}:live({g}, {version}))"]
+                        + [f"assertz({KB_MODULE}:{versioned_fact(fact, g)})" for fact in item_facts(added_row)]
+                    ))
+            except Exception as e:
+                logger.error("Error loading catalog version %d into Prolog: %s", snapshot.version, e)
+                # Whatever got asserted is only visible from this version on,
+                # which is never published; the next load reloads every row
+                self._orphans.update(generations.values())
+                self._head = None
+                raise
+            
+            if incremental:
+                self._head_generations.pop(item_id, None)
+                self._head_generations.update(generations)
+            else:
+                self._head_generations = generations
+                self._orphans.clear()
+            self._head = version
+            self._dead.extend((version, g) for g in hidden)
+            snapshot.kb_version = version
+            self._loaded.add(version)
+        
+        weakref.finalize(snapshot, self._retired.append, version)
+        logger.info("Prolog KB version %d loaded: catalog version %d, %d item(s) asserted",
+                    version, snapshot.version, len(added))
+        return version
+    
+    def _drop_retired_generations(self):
+        """Retract the facts of generations no live snapshot can see any more"""
+        while self._retired:
+            self._loaded.discard(self._retired.popleft())
+        oldest = min(self._loaded, default=self._kb_version + 1)
+        while self._dead and self._dead[0][0] <= oldest:
+            _, g = self._dead.popleft()
+            self._query(", ".join(
+                [f"retractall({KB_MODULE}:{name}({', '.join([str(g)] + ['_'] * arity)}))" for name, arity in FACT_PREDICATES]
+                + [f"retractall({KB_MODULE}:live({g}, _))", f"retractall({KB_MODULE}:dead({g}, _))"]
+            ))
+            log_debug(logger, "Prolog KB generation %d dropped", g)
     
     def build_photo_url(self, photo_filename):
         """
@@ -51,7 +166,7 @@ class ContextAwarePrologService:
         Returns None if photo_filename is empty/null
         Automatically adds .jpg extension if missing
         """
-        if not photo_filename or pd.isna(photo_filename):
+        if is_missing(photo_filename) or not photo_filename:
             return None
         
         # Remove any leading/trailing whitespace
@@ -78,49 +193,43 @@ class ContextAwarePrologService:
         text = text.replace("'", "").replace('"', '')
         return text
     
-    def query_by_keywords(self, keywords):
-        """Query items by keywords"""
+    def query_by_keywords(self, keywords, snapshot=None):
+        """Query items by keywords (in the published snapshot unless one is given)"""
+        snapshot = snapshot or get_catalog_store().snapshot
+        kb_version = self.load_snapshot_kb(snapshot)
         results = set()
         for keyword in keywords:
             keyword = self.sanitize_query(keyword)
             try:
-                query = f"find_by_keyword('{keyword}', ID)"
-                for solution in self.prolog.query(query):
+                query = f"{KB_MODULE}:find_by_keyword({kb_version}, '{keyword}', ID)"
+                for solution in self._query(query):
                     results.add(solution['ID'])
                 
-                query = f"find_by_name('{keyword}', ID)"
-                for solution in self.prolog.query(query):
+                query = f"{KB_MODULE}:find_by_name({kb_version}, '{keyword}', ID)"
+                for solution in self._query(query):
                     results.add(solution['ID'])
             except Exception as e:
-                print(f"Query error for keyword '{keyword}': {e}")
+                logger.warning("Query error for keyword '%s': %s", keyword, e)
         
         return list(results)
     
-    def get_item_from_excel(self, item_id):
-        """Get full item details from Excel by ID, including photo URL"""
-        if self.excel_df is None:
-            return None
+    def get_item_from_excel(self, item_id, snapshot=None):
+        """Get full item details by ID (from the published snapshot unless one is given), including photo URL"""
+        snapshot = snapshot or get_catalog_store().snapshot
         
         item_id = str(item_id).strip("'\"")
-        item = self.excel_df[self.excel_df['id'] == item_id]
+        item_dict = snapshot.get(item_id)
         
-        if item.empty:
+        if item_dict is None:
             return None
         
-        item_dict = item.iloc[0].to_dict()
-        
-        # Handle NaN values
-        for key, value in item_dict.items():
-            if pd.isna(value):
-                item_dict[key] = None
-        
         # Build photo URL
         photo_filename = item_dict.get('photo')
         item_dict['photo_url'] = self.build_photo_url(photo_filename)
         
         return item_dict
     
-    def search_with_context(self, query_text: str, session_id: str, top_n: int = 1):
+    def search_with_context(self, query_text: str, session_id: str, top_n: int = 1, snapshot=None):
         """
         Context-aware search that considers conversation history and location
         
@@ -128,12 +237,18 @@ class ContextAwarePrologService:
             query_text: User's current query
             session_id: Session ID for conversation tracking
             top_n: Number of results to return
+            snapshot: Catalog snapshot to search (default: the published one)
         
         Returns:
             List of matching items (with photo_url), conversation context
         """
         from app.services.nlp_processor import get_nlp_processor
         
+        # Everything below reads this one catalog version, even if an edit
+        # is published meanwhile
+        snapshot = snapshot or get_catalog_store().snapshot
+        kb_version = self.load_snapshot_kb(snapshot)
+        
         # Get or create conversation context
         context = self.conversation_manager.get_or_create_session(session_id)
         
@@ -143,18 +258,18 @@ class ContextAwarePrologService:
         # Process current query with location detection
         keywords, detected_location = nlp.process_query(query_text)
         
-        print(f"\n{'='*60}")
-        print(f"Session: {session_id} (Turn {context.turn_count + 1})")
-        print(f"Query: {query_text}")
-        print(f"Processed keywords: {keywords}")
-        print(f"Detected location: {detected_location}")
+        log_debug(
+            logger, "Search turn: query=%r keywords=%s location=%s",
+            query_text, keywords, detected_location,
+            extra={"session_id": session_id, "turn": context.turn_count + 1}
+        )
         
         # Detect if user is explicitly asking for alternatives
         asking_alternatives = self._is_asking_for_alternatives(query_text)
         
         # Check if this is a follow-up query (including explicit alternatives requests)
         is_followup = context.is_followup_query(query_text) or asking_alternatives
-        print(f"Is follow-up: {is_followup} (asking_alternatives={asking_alternatives})")
+        log_debug(logger, "Is follow-up: %s (asking_alternatives=%s)", is_followup, asking_alternatives)
         
         # Enhance keywords with context if it's a follow-up
         enhanced_keywords = keywords.copy()
@@ -165,23 +280,23 @@ class ContextAwarePrologService:
                 if ctx_kw not in enhanced_keywords:
                     enhanced_keywords.append(ctx_kw)
             
-            print(f"Enhanced with context: {enhanced_keywords}")
+            log_debug(logger, "Enhanced with context: %s", enhanced_keywords)
         
         # Search using enhanced keywords
-        matched_ids = self.query_by_keywords(enhanced_keywords)
+        matched_ids = self.query_by_keywords(enhanced_keywords, snapshot)
         # Additional searches with stemming
         for keyword in enhanced_keywords:
             stemmed = nlp.stem_word(keyword)
             try:
-                query = f"find_by_name('{stemmed}', ID)"
-                for solution in self.prolog.query(query):
+                query = f"{KB_MODULE}:find_by_name({kb_version}, '{stemmed}', ID)"
+                for solution in self._query(query):
                     matched_ids.append(solution['ID'])
             except:
                 pass
             
             try:
-                query = f"find_by_location('{stemmed}', ID)"
-                for solution in self.prolog.query(query):
+                query = f"{KB_MODULE}:find_by_location({kb_version}, '{stemmed}', ID)"
+                for solution in self._query(query):
                     matched_ids.append(solution['ID'])
             except:
                 pass
@@ -192,14 +307,14 @@ class ContextAwarePrologService:
         # Get full details from Excel (now includes photo_url)
         items = []
         for item_id in matched_ids:
-            details = self.get_item_from_excel(item_id)
+            details = self.get_item_from_excel(item_id, snapshot)
             if details:
                 items.append(details)
         
         # If no results from Prolog, search directly in Excel
         if not items:
-            print("No Prolog matches, searching directly in Excel...")
-            items = self.search_in_excel(enhanced_keywords)
+            log_debug(logger, "No Prolog matches, searching directly in Excel")
+            items = self.search_in_excel(enhanced_keywords, snapshot)
         
         # Handle alternatives follow-up: restrict to same location/type as last item,
         # prefer items not shown in the last turn, otherwise exclude all previously mentioned items.
@@ -221,7 +336,10 @@ class ContextAwarePrologService:
                         last_id_prefix = 'TS'
                     elif last_id.startswith('CU') or last_id.startswith('CS'):
                         last_id_prefix = 'CU'
-                    print(f"Restricting alternatives to location='{last_location}', type='{last_type}', id_prefix='{last_id_prefix}'")
+                    log_debug(
+                        logger, "Restricting alternatives to location=%r, type=%r, id_prefix=%r",
+                        last_location, last_type, last_id_prefix
+                    )
                 except:
                     pass
             
@@ -253,9 +371,9 @@ class ContextAwarePrologService:
                 
                 if filtered_by_context:
                     items = filtered_by_context
-                    print(f"Filtered to context-matching items; {len(items)} candidate(s) remain")
+                    log_debug(logger, "Filtered to context-matching items; %d candidate(s) remain", len(items))
                 else:
-                    print(f"No items match location/type/ID context; keeping all {len(items)} for filtering by history")
+                    log_debug(logger, "No items match location/type/ID context; keeping all %d for filtering by history", len(items))
             
             # Try to remove only the items shown in the last bot response first
             try:
@@ -268,12 +386,12 @@ class ContextAwarePrologService:
 
             if unseen_since_last:
                 items = unseen_since_last
-                print(f"Excluding last-turn items; {len(items)} candidate(s) remain")
+                log_debug(logger, "Excluding last-turn items; %d candidate(s) remain", len(items))
                 context.last_alternatives_exhausted = False
             else:
                 # Fallback: exclude any item mentioned previously in the session
                 items = [item for item in items if item.get('id') not in context.mentioned_items]
-                print(f"Excluded all previously mentioned items; {len(items)} candidate(s) remain")
+                log_debug(logger, "Excluded all previously mentioned items; %d candidate(s) remain", len(items))
 
                 # If still nothing unseen, mark alternatives exhausted so UI/response
                 # can inform the user there are no more different options
@@ -287,7 +405,7 @@ class ContextAwarePrologService:
             if items:
                 random.shuffle(items)
 
-            print(f"Filtered out {original_count - len(items)} previously shown items")
+            log_debug(logger, "Filtered out %d previously shown items", original_count - len(items))
         
         # Rank results by relevance WITH LOCATION FILTER
         ranked = nlp.rank_results(items, keywords, location_filter=detected_location, top_n=top_n)
@@ -295,19 +413,18 @@ class ContextAwarePrologService:
         # Extract just the items
         results = [item for item, score, matched in ranked]
         
-        # Log results
+        # Log results (the ranked list is only formatted if the record is emitted)
         if results:
-            print(f"\nTop {len(results)} result(s):")
-            for i, (item, score, matched) in enumerate(ranked[:len(results)], 1):
-                photo_status = "✓ Has photo" if item.get('photo_url') else "✗ No photo"
-                print(f"  {i}. {item['name']} (score: {score}) [{photo_status}]")
+            log_debug(
+                logger, "Top %d result(s): %s", len(results),
+                Lazy(lambda: "; ".join(
+                    f"{item['name']} (score: {score}, photo: {'yes' if item.get('photo_url') else 'no'})"
+                    for item, score, matched in ranked[:len(results)]
+                )),
+                extra={"session_id": session_id}
+            )
         else:
-            print("No results found")
-        
-        if detected_location and not results:
-            print(f"⚠ No results found for location: {detected_location}")
-        
-        print(f"{'='*60}\n")
+            log_debug(logger, "No results found (location filter: %s)", detected_location, extra={"session_id": session_id})
         
         return results, context
     
@@ -320,41 +437,25 @@ class ContextAwarePrologService:
         query_lower = query.lower()
         return any(phrase in query_lower for phrase in alternative_phrases)
     
-    def search_in_excel(self, keywords):
-        """Direct search in Excel when Prolog doesn't find results"""
+    def search_in_excel(self, keywords, snapshot=None):
+        """Direct search of the catalog text when Prolog doesn't find results"""
         from app.services.nlp_processor import get_nlp_processor
         
-        if self.excel_df is None:
-            return []
-        
+        snapshot = snapshot or get_catalog_store().snapshot
         nlp = get_nlp_processor()
+        keywords_stemmed = [nlp.stem_word(keyword) for keyword in keywords]
         results = []
         
-        for _, row in self.excel_df.iterrows():
-            name = str(row.get('name', '')).lower()
-            location = str(row.get('location', '')).lower()
-            desc_kw = str(row.get('description_keywords', '')).lower()
-            full_desc = str(row.get('full_description', '')).lower()
-            
-            combined = f"{name} {location} {desc_kw} {full_desc}"
-            combined_stemmed = ' '.join([nlp.stem_word(w) for w in nlp.tokenize(combined)])
-            
-            for keyword in keywords:
-                keyword_stemmed = nlp.stem_word(keyword)
-                if keyword_stemmed in combined_stemmed:
-                    item_dict = row.to_dict()
-                    
-                    # Handle NaN values
-                    for key, value in item_dict.items():
-                        if pd.isna(value):
-                            item_dict[key] = None
-                    
-                    # Build photo URL
-                    photo_filename = item_dict.get('photo')
-                    item_dict['photo_url'] = self.build_photo_url(photo_filename)
-                    
-                    results.append(item_dict)
-                    break
+        # Item text is stemmed once per snapshot, not per query
+        for item_id, combined_stemmed in snapshot.search_texts.items():
+            if any(keyword_stemmed in combined_stemmed for keyword_stemmed in keywords_stemmed):
+                item_dict = snapshot.get(item_id)
+                
+                # Build photo URL
+                photo_filename = item_dict.get('photo')
+                item_dict['photo_url'] = self.build_photo_url(photo_filename)
+                
+                results.append(item_dict)
         
         return results
     
@@ -374,11 +475,14 @@ class ContextAwarePrologService:
         return context.get_summary()
 
 
-# Singleton instance
+# Singleton instance (startup warm-up and early requests may race to create it)
 _prolog_service = None
+_prolog_service_lock = threading.Lock()
 
 def get_prolog_service():
     global _prolog_service
     if _prolog_service is None:
-        _prolog_service = ContextAwarePrologService()
+        with _prolog_service_lock:
+            if _prolog_service is None:
+                _prolog_service = ContextAwarePrologService()
     return _prolog_service
\ No newline at end of file
@@ -0,0 +1,102 @@
+"""
+Service registry and startup warm-up
+Services stay lazily created singletons behind their get_*() functions;
+the registry lists them in one place so startup can build them all
+concurrently on the blocking executor (instead of the first request
+paying for it) and /health can report when they are ready.
+"""
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+from app.utils.executor import run_blocking
+from app.utils.log import get_logger
+
+logger = get_logger(__name__)
+
+@dataclass
+class ServiceStatus:
+    """Warm-up outcome for one service"""
+    name: str
+    ready: bool = False
+    init_ms: Optional[float] = None
+    error: Optional[str] = None
+
+class ServiceRegistry:
+    def __init__(self):
+        self._factories: Dict[str, Callable[[], Any]] = {}
+        self.status: Dict[str, ServiceStatus] = {}
+        self.warmed_up = False
+        self.warmup_ms: Optional[float] = None
+
+    def register(self, name: str, factory: Callable[[], Any]):
+        """Register a service by the function that gets (or creates) it"""
+        self._factories[name] = factory
+        self.status[name] = ServiceStatus(name)
+
+    def get(self, name: str) -> Any:
+        return self._factories[name]()
+
+    def _init_one(self, name: str) -> float:
+        started = time.perf_counter()
+        self._factories[name]()
+        return (time.perf_counter() - started) * 1000
+
+    async def warm_up(self):
+        """Create every registered service concurrently and record how long each took"""
+        started = time.perf_counter()
+        names = list(self._factories)
+        results = await asyncio.gather(
+            *(run_blocking(self._init_one, name) for name in names),
+            return_exceptions=True
+        )
+
+        for name, result in zip(names, results):
+            status = self.status[name]
+            if isinstance(result, BaseException):
+                status.error = str(result) or type(result).__name__
+                logger.error("Service %s failed to initialise: %s", name, status.error)
+            else:
+                status.ready = True
+                status.init_ms = round(result, 1)
+                logger.info("Service %s ready in %.1f ms", name, result)
+
+        self.warmup_ms = round((time.perf_counter() - started) * 1000, 1)
+        self.warmed_up = True
+        logger.info("Warm-up finished in %.1f ms", self.warmup_ms)
+
+    def failed(self) -> List[str]:
+        return [name for name, status in self.status.items() if status.error]
+
+    def report(self) -> Dict[str, Any]:
+        """Per-service readiness and init time, for /health"""
+        return {
+            name: {"ready": status.ready, "init_ms": status.init_ms, "error": status.error}
+            for name, status in self.status.items()
+        }
+
+
+def _build_registry() -> ServiceRegistry:
+    from app.services.conversation_context import get_conversation_manager
+    from app.services.fare_engine import get_fare_engine
+    from app.services.nlp_processor import get_nlp_processor
+    from app.services.prolog_service import get_prolog_service
+    from app.services.routing_service import get_routing_service
+
+    registry = ServiceRegistry()
+    registry.register("nlp", get_nlp_processor)
+    registry.register("conversations", get_conversation_manager)
+    registry.register("fare_engine", get_fare_engine)
+    registry.register("prolog", get_prolog_service)
+    registry.register("routing", get_routing_service)
+    return registry
+
+# Singleton
+_registry: Optional[ServiceRegistry] = None
+
+def get_registry() -> ServiceRegistry:
+    global _registry
+    if _registry is None:
+        _registry = _build_registry()
+    return _registry
@@ -3,24 +3,48 @@ Enhanced Routing and navigation service for tourists
 Calculates routes, fares, and provides turn-by-turn directions
 Handles both tourist_spot and cuisine types with appropriate logic
 """
-import math
+import threading
+import time
 from typing import List, Tuple, Optional, Dict, Any
-import pandas as pd
+import numpy as np
 from enum import Enum
-from app.config import EXCEL_FILE
+from app.config import (
+    ITINERARY_EXACT_MAX_STOPS,
+    ITINERARY_TIME_BUDGET_MS,
+    ROUTE_CACHE_GEOHASH_PRECISION,
+    ROUTE_CACHE_SIZE,
+    ROUTE_CACHE_TTL_SECONDS
+)
 from data.location_coordinates import (
     LOCATION_COORDINATES,
-    TRANSPORT_ROUTES,
     WALKING_SPEED_KMH,
     WALKING_DISTANCE_THRESHOLD_KM,
     calculate_tricycle_fare,
-    calculate_jeepney_fare,
-    calculate_van_fare,
-    calculate_bus_fare
+    calculate_jeepney_fare
 )
 from app.models.location_schemas import (
-    RouteStep, RouteResponse, NearbyPlace, TransportMode
+    RouteStep, RouteResponse, NearbyPlace, TransportMode, RouteCost, ItineraryResponse
+)
+from app.services.catalog_snapshot import CatalogSnapshot
+from app.services.catalog_store import get_catalog_store
+from app.services.fare_engine import get_fare_engine
+from app.services.geocoding import COORD_NONE
+from app.services.itinerary import held_karp, nearest_neighbour, two_opt
+from app.services.spatial_index import GridIndex, to_radians, haversine_many, geohash_encode
+from app.services.transport_graph import (
+    TransportGraph, TransportEdge, HubRouteTable, edge_cost, node_name
 )
+from app.utils.cache import TTLCache
+from app.utils.log import get_logger, log_debug
+
+logger = get_logger(__name__)
+
+# Terminal lookups: grid cell size and how many nearby terminals routing compares
+TERMINAL_INDEX_CELL_KM = 10.0
+TERMINAL_ALTERNATIVES = 3
+
+# from_location of a route's first step when it starts at the user's position
+CURRENT_LOCATION = "Your current location"
 
 class ItemType(str, Enum):
     """Types of tourism items"""
@@ -29,76 +53,199 @@ class ItemType(str, Enum):
 
 class RoutingService:
     def __init__(self):
-        self.excel_df = pd.read_excel(EXCEL_FILE)
+        # Keys end with the catalog version the entry was computed from, so a
+        # plan finished after an edit was published can never be served for it
+        self.route_cache = TTLCache(ROUTE_CACHE_SIZE, ROUTE_CACHE_TTL_SECONDS)
+        # Stop-to-stop legs for itineraries, keyed (from_id, to_id, cost, catalog version)
+        self.leg_cache = TTLCache(ROUTE_CACHE_SIZE, ROUTE_CACHE_TTL_SECONDS)
+        self.fare_engine = get_fare_engine()
+        self._build_terminal_table()
+        # TRANSPORT_ROUTES and LOCATION_COORDINATES are code, so the graph and
+        # its all-pairs table are built once per process
+        self.transport_graph = TransportGraph()
+        self.hub_routes = HubRouteTable(self.transport_graph)
     
-    def haversine_distance(self, lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    @property
+    def items(self) -> Dict[str, Dict[str, Any]]:
+        """id -> geocoded catalog row, from the published snapshot"""
+        return get_catalog_store().snapshot.items
+    
+    def invalidate_item(self, item_id: str):
         """
-        Calculate distance between two points using Haversine formula
-        Returns distance in kilometers
+        Forget an item's previous version after a catalog edit
+        The cached routes/legs that involve this item are dropped now; other
+        entries of older catalog versions no longer match and age out.
+        The place index comes with the new catalog snapshot.
         """
-        R = 6371  # Earth's radius in kilometers
-        
-        lat1_rad = math.radians(lat1)
-        lat2_rad = math.radians(lat2)
-        delta_lat = math.radians(lat2 - lat1)
-        delta_lon = math.radians(lon2 - lon1)
-        
-        a = math.sin(delta_lat / 2) ** 2 + \
-            math.cos(lat1_rad) * math.cos(lat2_rad) * math.sin(delta_lon / 2) ** 2
-        c = 2 * math.asin(math.sqrt(a))
-        
-        return R * c
+        self.route_cache.discard_if(lambda key: key[1] == item_id)
+        self.leg_cache.discard_if(lambda key: item_id in (key[0], key[1]))
+    
+    def invalidate_catalog(self):
+        """Forget every cached route after the whole catalog was reloaded"""
+        self.route_cache.clear()
+        self.leg_cache.clear()
+    
+    def _build_terminal_table(self):
+        """
+        Derive the terminal/hub set once: names, a compact coordinate table
+        and a small grid index for nearest-terminal lookups
+        """
+        self._terminal_names = [
+            name for name in LOCATION_COORDINATES
+            if 'Terminal' in name or name in ['Laoag', 'Batac', 'Pagudpud']
+        ]
+        self._terminal_coords = np.array([
+            (LOCATION_COORDINATES[name]['lat'], LOCATION_COORDINATES[name]['lon'])
+            for name in self._terminal_names
+        ], dtype=np.float64)
+        self._terminal_index = GridIndex(self._terminal_coords, cell_km=TERMINAL_INDEX_CELL_KM)
+    
+    def distance_to(self, from_lat: float, from_lon: float, to_lat: float, to_lon: float) -> float:
+        """Single origin-destination distance through the vectorized haversine"""
+        lat_rad, lon_rad, cos_lat = to_radians([(to_lat, to_lon)])
+        return float(haversine_many(from_lat, from_lon, lat_rad, lon_rad, cos_lat)[0])
     
     def get_item_type(self, destination_id: str) -> Optional[str]:
         """Get the type of item (tourist_spot or cuisine)"""
-        item = self.excel_df[self.excel_df['id'] == destination_id]
-        if item.empty:
+        item = self.items.get(destination_id)
+        if item is None:
             return None
-        return item.iloc[0].get('type', ItemType.TOURIST_SPOT)
+        return item.get('type', ItemType.TOURIST_SPOT)
     
     def get_destination_coordinates(self, destination_id: str) -> Optional[Tuple[float, float, str]]:
         """
         Get coordinates for a destination from the Excel database
         Returns (lat, lon, location_name) or None
         """
-        item = self.excel_df[self.excel_df['id'] == destination_id]
+        item = self.items.get(destination_id)
         
-        if item.empty:
+        if item is None:
             return None
         
-        location_name = item.iloc[0]['location']
-        
-        # Try to find coordinates for this location
-        if location_name in LOCATION_COORDINATES:
-            coords = LOCATION_COORDINATES[location_name]
-            return (coords['lat'], coords['lon'], location_name)
-        
-        # If exact location not found, try to find nearest hub
-        nearest_hub = item.iloc[0].get('nearest_hub')
-        if nearest_hub and nearest_hub in LOCATION_COORDINATES:
-            coords = LOCATION_COORDINATES[nearest_hub]
-            return (coords['lat'], coords['lon'], nearest_hub)
-        
-        return None
+        return self._item_coordinates(item)
+    
+    def _item_coordinates(self, item) -> Optional[Tuple[float, float, str]]:
+        """Coordinates for a geocoded catalog row, resolved at catalog load"""
+        if item['coord_source'] == COORD_NONE:
+            return None
+        return (item['lat'], item['lon'], item['geo_location'])
     
     def find_nearest_terminal(self, lat: float, lon: float) -> Tuple[str, float]:
         """
         Find the nearest terminal/hub from user's location
         Returns (terminal_name, distance_km)
         """
-        min_distance = float('inf')
-        nearest_terminal = None
+        return self.find_nearest_terminals(lat, lon, k=1)[0]
+    
+    def find_nearest_terminals(self, lat: float, lon: float, k: int = TERMINAL_ALTERNATIVES) -> List[Tuple[str, float]]:
+        """
+        Find the k nearest terminals/hubs from user's location, closest first
+        Returns [(terminal_name, distance_km), ...]
+        """
+        return [
+            (self._terminal_names[idx], distance)
+            for idx, distance in self._terminal_index.query_knn(lat, lon, k)
+        ]
+    
+    def _choose_terminal(
+        self,
+        from_lat: float,
+        from_lon: float,
+        dest_location: str,
+        total_distance: float,
+        cost: RouteCost = RouteCost.TIME,
+        terminals: Optional[List[Tuple[str, float]]] = None
+    ) -> Tuple[str, float, Optional[List[TransportEdge]]]:
+        """
+        Pick the departure terminal among the nearest few
+        Each candidate is scored under `cost` as getting to the terminal plus
+        the best path through the transport graph (or the jeepney estimate
+        when there is none), so a slightly farther terminal can win.
+        `terminals` may carry find_nearest_terminals() already computed for this origin.
+        Returns (terminal_name, distance_km, transit legs or None)
+        """
+        best = None
+        best_score = float('inf')
+        if terminals is None:
+            terminals = self.find_nearest_terminals(from_lat, from_lon)
+        for terminal, distance in terminals:
+            if distance <= WALKING_DISTANCE_THRESHOLD_KM:
+                score = edge_cost((distance / WALKING_SPEED_KMH) * 60, 0, cost)
+            else:
+                score = edge_cost(distance * 5, calculate_tricycle_fare(distance), cost)
+            
+            path = self.hub_routes.path(terminal, dest_location, cost)
+            if path is not None:
+                score += sum(edge_cost(leg.time_minutes, leg.fare, cost) for leg in path)
+            else:
+                remaining = total_distance - distance
+                score += edge_cost((remaining / 40) * 60, calculate_jeepney_fare(remaining), cost)
+            
+            if score < best_score:
+                best = (terminal, distance, path)
+                best_score = score
         
-        terminals = {k: v for k, v in LOCATION_COORDINATES.items() 
-                    if 'Terminal' in k or k in ['Laoag', 'Batac', 'Pagudpud']}
+        return best
+    
+    def _cached_plan(self, cache_key: Optional[Tuple], compute):
+        """Origin-cell part of a route from the route cache, computing it on a miss"""
+        if cache_key is None:
+            return compute()
+        plan = self.route_cache.get(cache_key)
+        if plan is None:
+            plan = compute()
+            self.route_cache.set(cache_key, plan)
+        return plan
+    
+    def _plan_tourist_spot(
+        self,
+        from_lat: float,
+        from_lon: float,
+        dest_location: str,
+        total_distance: float,
+        cost: RouteCost,
+        terminals: Optional[List[Tuple[str, float]]] = None
+    ) -> Tuple[str, Optional[Tuple[RouteStep, ...]]]:
+        """
+        Departure terminal plus the transit steps after it (numbered from 2)
+        Transit steps are None when the leg has to be estimated.
+        """
+        terminal, _, path = self._choose_terminal(
+            from_lat, from_lon, dest_location, total_distance, cost, terminals
+        )
+        if path is None:
+            return terminal, None
+        return terminal, tuple(
+            self._transit_step(step_number, leg, terminal)
+            for step_number, leg in enumerate(path, start=2)
+        )
+    
+    def _transit_step(self, step_number: int, leg: TransportEdge, departure_name: str) -> RouteStep:
+        """RouteStep for one leg of a transport-graph path"""
+        # The first leg leaves from the terminal the user was sent to
+        from_location = departure_name if node_name(departure_name) == leg.from_node else leg.from_node
         
-        for terminal_name, coords in terminals.items():
-            distance = self.haversine_distance(lat, lon, coords['lat'], coords['lon'])
-            if distance < min_distance:
-                min_distance = distance
-                nearest_terminal = terminal_name
+        if leg.mode == 'walking':
+            instruction = f"Walk to {leg.to_node}"
+            landmark = f"About {int(leg.distance_km * 1000)} m on foot"
+        elif leg.mode == 'tricycle':
+            instruction = f"Take a tricycle to {leg.to_node}"
+            landmark = f"Tell the driver: '{leg.to_node}'"
+        else:
+            instruction = f"Take a {leg.mode} from {from_location} to {leg.to_node}"
+            landmark = f"Look for {leg.mode}s with sign '{leg.to_node}'"
         
-        return nearest_terminal, min_distance
+        return RouteStep(
+            step_number=step_number,
+            instruction=instruction,
+            transport_mode=TransportMode(leg.mode),
+            from_location=from_location,
+            to_location=leg.to_node,
+            distance_km=round(leg.distance_km, 2),
+            fare=leg.fare,
+            estimated_time_minutes=leg.time_minutes,
+            landmark=landmark
+        )
     
     def _get_best_transport_mode(self, distance_km: float) -> str:
         """
@@ -122,26 +269,231 @@ class RoutingService:
         self, 
         from_lat: float, 
         from_lon: float, 
-        destination_id: str
+        destination_id: str,
+        cost: RouteCost = RouteCost.TIME
     ) -> Optional[RouteResponse]:
         """
         Calculate the best route from user's location to destination
         Handles both tourist_spot and cuisine types with appropriate routing logic
+        `cost` selects what multi-leg transit routing minimises (time, fare, or weighted)
+        """
+        started = time.perf_counter()
+        
+        snapshot = get_catalog_store().snapshot
+        item = snapshot.items.get(destination_id)
+        if item is None:
+            return None
+        
+        route = self._route_to_item(from_lat, from_lon, destination_id, item, snapshot.version, cost)
+        
+        log_debug(
+            logger, "Route to %s computed in %.2f ms", destination_id,
+            (time.perf_counter() - started) * 1000
+        )
+        
+        return route
+    
+    def calculate_routes(
+        self,
+        from_lat: float,
+        from_lon: float,
+        destination_ids: List[str],
+        cost: RouteCost = RouteCost.TIME,
+        snapshot: Optional[CatalogSnapshot] = None
+    ) -> Tuple[Dict[str, RouteResponse], Dict[str, str]]:
         """
-        # Get destination info
-        dest_coords = self.get_destination_coordinates(destination_id)
+        Routes from one origin to many destinations
+        The dataset lookup, origin cell and nearest terminals are computed
+        once and shared; a failing destination does not fail the batch.
+        `snapshot` pins the catalog version (the published one by default).
+        Returns ({destination_id: route}, {destination_id: error})
+        """
+        started = time.perf_counter()
+        
+        if snapshot is None:
+            snapshot = get_catalog_store().snapshot
+        destination_ids = list(dict.fromkeys(destination_ids))
+        
+        origin_cell = geohash_encode(from_lat, from_lon, ROUTE_CACHE_GEOHASH_PRECISION)
+        terminals = self.find_nearest_terminals(from_lat, from_lon)
+        
+        routes = {}
+        errors = {}
+        for destination_id in destination_ids:
+            item = snapshot.items.get(destination_id)
+            try:
+                route = None if item is None else self._route_to_item(
+                    from_lat, from_lon, destination_id, item, snapshot.version, cost,
+                    origin_cell=origin_cell, terminals=terminals
+                )
+            except Exception as e:
+                logger.exception("Batch route to %s failed", destination_id)
+                errors[destination_id] = f"Routing error: {str(e)}"
+                continue
+            
+            if route is None:
+                errors[destination_id] = f"Destination {destination_id} not found or no coordinates available"
+            else:
+                routes[destination_id] = route
+        
+        log_debug(
+            logger, "Batch of %d routes computed in %.2f ms", len(destination_ids),
+            (time.perf_counter() - started) * 1000
+        )
+        
+        return routes, errors
+    
+    def plan_itinerary(
+        self,
+        from_lat: float,
+        from_lon: float,
+        destination_ids: List[str],
+        cost: RouteCost = RouteCost.TIME,
+        time_budget_ms: Optional[int] = None
+    ) -> ItineraryResponse:
+        """
+        Visit several destinations in one trip, in the cheapest order under `cost`
+        Up to ITINERARY_EXACT_MAX_STOPS stops are ordered exactly (Held-Karp);
+        beyond that nearest-neighbour + 2-opt runs until the time budget ends.
+        Stop-to-stop legs come from leg_cache, so only the first leg of each
+        candidate depends on the user's position. The budget covers building
+        the leg matrix too: if it runs out there, stops are ordered by
+        straight-line distance and only the legs of that order are routed.
+        """
+        started = time.perf_counter()
+        budget_ms = min(time_budget_ms or ITINERARY_TIME_BUDGET_MS, ITINERARY_TIME_BUDGET_MS)
+        deadline = started + budget_ms / 1000
+        
+        # Leg matrix, index 0 = user's location, 1..n = stops
+        snapshot = get_catalog_store().snapshot
+        first_legs, errors = self.calculate_routes(from_lat, from_lon, destination_ids, cost, snapshot)
+        stop_ids = list(first_legs)
+        
+        legs = {}
+        for j, stop_id in enumerate(stop_ids, start=1):
+            legs[(0, j)] = first_legs[stop_id]
+        complete = True
+        for i, from_id in enumerate(stop_ids, start=1):
+            for j, to_id in enumerate(stop_ids, start=1):
+                if i == j:
+                    continue
+                if time.perf_counter() >= deadline:
+                    complete = False
+                    break
+                legs[(i, j)] = self._stop_leg(snapshot, from_id, to_id, cost)
+            if not complete:
+                break
+        
+        # Order the stops
+        if not complete:
+            logger.warning(
+                "Itinerary leg matrix stopped at the %d ms budget (%d of %d legs); ordering by distance",
+                budget_ms, len(legs), len(stop_ids) ** 2
+            )
+            order = nearest_neighbour(self._distance_matrix(from_lat, from_lon, snapshot, stop_ids))
+            method, optimal = "nearest-neighbour", False
+        else:
+            size = len(stop_ids) + 1
+            matrix = [[0.0] * size for _ in range(size)]
+            for (i, j), leg in legs.items():
+                matrix[i][j] = edge_cost(leg.total_time_minutes, leg.total_fare, cost)
+            
+            order = None
+            if len(stop_ids) <= ITINERARY_EXACT_MAX_STOPS:
+                order, method, optimal = held_karp(matrix, deadline), "exact", True
+            if order is None:
+                order, converged = two_opt(matrix, nearest_neighbour(matrix), deadline)
+                method, optimal = "2-opt", False
+                if not converged:
+                    logger.warning("Itinerary ordering stopped at the %d ms budget", budget_ms)
+        
+        route_legs = []
+        current = 0
+        for stop in order:
+            leg = legs.get((current, stop))
+            if leg is None:
+                leg = self._stop_leg(snapshot, stop_ids[current - 1], stop_ids[stop - 1], cost)
+            route_legs.append(leg)
+            current = stop
+        
+        log_debug(
+            logger, "Itinerary of %d stops (%s) planned in %.2f ms", len(stop_ids), method,
+            (time.perf_counter() - started) * 1000
+        )
+        
+        return ItineraryResponse(
+            order=[stop_ids[stop - 1] for stop in order],
+            legs=route_legs,
+            total_distance_km=round(sum(leg.total_distance_km for leg in route_legs), 2),
+            total_fare=round(sum(leg.total_fare for leg in route_legs), 2),
+            total_time_minutes=sum(leg.total_time_minutes for leg in route_legs),
+            method=method,
+            optimal=optimal,
+            errors=errors
+        )
+    
+    def _stop_leg(self, snapshot: CatalogSnapshot, from_id: str, to_id: str, cost: RouteCost) -> RouteResponse:
+        """Itinerary leg between two catalog stops, through leg_cache"""
+        key = (from_id, to_id, cost, snapshot.version)
+        leg = self.leg_cache.get(key)
+        if leg is None:
+            from_item = snapshot.items[from_id]
+            from_lat, from_lon, _ = self._item_coordinates(from_item)
+            leg = self._route_to_item(
+                from_lat, from_lon, to_id, snapshot.items[to_id], snapshot.version, cost,
+                origin_label=from_item['name']
+            )
+            self.leg_cache.set(key, leg)
+        return leg
+    
+    def _distance_matrix(
+        self,
+        from_lat: float,
+        from_lon: float,
+        snapshot: CatalogSnapshot,
+        stop_ids: List[str]
+    ) -> List[List[float]]:
+        """Straight-line km between the user's location (index 0) and the stops (1..n)"""
+        points = [(from_lat, from_lon)] + [self._item_coordinates(snapshot.items[stop_id])[:2] for stop_id in stop_ids]
+        lat_rad, lon_rad, cos_lat = to_radians(points)
+        return [haversine_many(lat, lon, lat_rad, lon_rad, cos_lat).tolist() for lat, lon in points]
+    
+    def _route_to_item(
+        self,
+        from_lat: float,
+        from_lon: float,
+        destination_id: str,
+        dest_item,
+        catalog_version: int,
+        cost: RouteCost = RouteCost.TIME,
+        origin_cell: Optional[str] = None,
+        terminals: Optional[List[Tuple[str, float]]] = None,
+        origin_label: str = CURRENT_LOCATION
+    ) -> Optional[RouteResponse]:
+        """
+        Route to one geocoded catalog row of catalog version `catalog_version`
+        origin_cell/terminals let batch callers share the per-origin work;
+        origin_label names the starting point in the first step (e.g. the
+        previous stop of an itinerary).
+        """
+        dest_coords = self._item_coordinates(dest_item)
         if not dest_coords:
             return None
         
         dest_lat, dest_lon, dest_location = dest_coords
         
         # Get destination item details
-        dest_item = self.excel_df[self.excel_df['id'] == destination_id].iloc[0]
         dest_name = dest_item['name']
         item_type = dest_item.get('type', ItemType.TOURIST_SPOT)
+        hub_location = dest_item.get('hub_location')
         
         # Calculate total distance
-        total_distance = self.haversine_distance(from_lat, from_lon, dest_lat, dest_lon)
+        total_distance = self.distance_to(from_lat, from_lon, dest_lat, dest_lon)
+        
+        # Nearby origins asking for the same destination share everything but the first leg
+        if origin_cell is None:
+            origin_cell = geohash_encode(from_lat, from_lon, ROUTE_CACHE_GEOHASH_PRECISION)
+        cache_key = (origin_cell, destination_id, item_type, cost, catalog_version)
         
         steps = []
         warnings = []
@@ -154,14 +506,21 @@ class RoutingService:
             # Cuisine routing: Find restaurant/food establishment location
             steps, total_fare, total_time = self._route_to_cuisine(
                 from_lat, from_lon, dest_name, dest_location, total_distance,
-                nearest_hub_override=dest_item.get('nearest_hub')
+                nearest_hub_override=hub_location,
+                cache_key=cache_key,
+                terminals=terminals,
+                origin_label=origin_label
             )
             warnings.append("This is a food establishment. Directions lead to the restaurant location.")
         else:
             # Tourist spot routing: Traditional navigation
             steps, total_fare, total_time, route_warnings = self._route_to_tourist_spot(
                 from_lat, from_lon, dest_name, dest_location, total_distance,
-                nearest_terminal_info=dest_item.get('nearest_hub')
+                nearest_terminal_info=hub_location,
+                cost=cost,
+                cache_key=cache_key,
+                terminals=terminals,
+                origin_label=origin_label
             )
             warnings.extend(route_warnings)
         
@@ -183,7 +542,11 @@ class RoutingService:
         dest_name: str,
         dest_location: str,
         total_distance: float,
-        nearest_terminal_info: Optional[str] = None
+        nearest_terminal_info: Optional[str] = None,
+        cost: RouteCost = RouteCost.TIME,
+        cache_key: Optional[Tuple] = None,
+        terminals: Optional[List[Tuple[str, float]]] = None,
+        origin_label: str = CURRENT_LOCATION
     ) -> Tuple[List[RouteStep], float, int, List[str]]:
         """
         Calculate route to a tourist spot
@@ -201,7 +564,7 @@ class RoutingService:
                 step_number=step_num,
                 instruction=f"Walk directly to {dest_name}",
                 transport_mode=TransportMode.WALKING,
-                from_location="Your current location",
+                from_location=origin_label,
                 to_location=dest_name,
                 distance_km=round(total_distance, 2),
                 fare=0,
@@ -210,8 +573,16 @@ class RoutingService:
             ))
             total_time = walking_time
         else:
-            # Find nearest terminal
-            nearest_terminal, terminal_distance = self.find_nearest_terminal(from_lat, from_lon)
+            # Find the best nearby terminal (prefers one with a direct route);
+            # cached per origin cell, while the distance to it is always exact
+            nearest_terminal, transit_steps = self._cached_plan(
+                cache_key,
+                lambda: self._plan_tourist_spot(
+                    from_lat, from_lon, dest_location, total_distance, cost, terminals
+                )
+            )
+            terminal = LOCATION_COORDINATES[nearest_terminal]
+            terminal_distance = self.distance_to(from_lat, from_lon, terminal['lat'], terminal['lon'])
             
             # Step 1: Get to terminal
             if terminal_distance <= WALKING_DISTANCE_THRESHOLD_KM:
@@ -220,7 +591,7 @@ class RoutingService:
                     step_number=step_num,
                     instruction=f"Walk to {nearest_terminal}",
                     transport_mode=TransportMode.WALKING,
-                    from_location="Your current location",
+                    from_location=origin_label,
                     to_location=nearest_terminal,
                     distance_km=round(terminal_distance, 2),
                     fare=0,
@@ -236,7 +607,7 @@ class RoutingService:
                     step_number=step_num,
                     instruction=f"Take a tricycle to {nearest_terminal}",
                     transport_mode=TransportMode.TRICYCLE,
-                    from_location="Your current location",
+                    from_location=origin_label,
                     to_location=nearest_terminal,
                     distance_km=round(terminal_distance, 2),
                     fare=tricycle_fare,
@@ -248,26 +619,14 @@ class RoutingService:
                 step_num += 1
             
             # Step 2: Main transport to destination area
-            route_key = self._find_transport_route(nearest_terminal, dest_location)
-            
-            if route_key:
-                transport_mode, route_info = route_key
-                steps.append(RouteStep(
-                    step_number=step_num,
-                    instruction=f"Take a {transport_mode} from {nearest_terminal} to {dest_location}",
-                    transport_mode=TransportMode(transport_mode),
-                    from_location=nearest_terminal,
-                    to_location=dest_location,
-                    distance_km=round(route_info.get('distance_km', total_distance - terminal_distance), 2),
-                    fare=route_info['fare'],
-                    estimated_time_minutes=route_info['time_minutes'],
-                    landmark=f"Look for {transport_mode}s with sign '{dest_location}'"
-                ))
-                total_fare += route_info['fare']
-                total_time += route_info['time_minutes']
-                step_num += 1
-            else:
-                # Estimate if no direct route
+            if transit_steps:
+                for step in transit_steps:
+                    steps.append(step)
+                    total_fare += step.fare
+                    total_time += step.estimated_time_minutes
+                    step_num += 1
+            elif transit_steps is None:
+                # Estimate if no route through the transport network
                 estimated_fare = calculate_jeepney_fare(total_distance - terminal_distance)
                 estimated_time = int(((total_distance - terminal_distance) / 40) * 60)
                 steps.append(RouteStep(
@@ -308,7 +667,10 @@ class RoutingService:
         dest_name: str,
         dest_location: str,
         total_distance: float,
-        nearest_hub_override: Optional[str] = None
+        nearest_hub_override: Optional[str] = None,
+        cache_key: Optional[Tuple] = None,
+        terminals: Optional[List[Tuple[str, float]]] = None,
+        origin_label: str = CURRENT_LOCATION
     ) -> Tuple[List[RouteStep], float, int]:
         """
         Calculate route to a cuisine/food establishment
@@ -326,7 +688,7 @@ class RoutingService:
                 step_number=step_num,
                 instruction=f"Walk to {dest_name}",
                 transport_mode=TransportMode.WALKING,
-                from_location="Your current location",
+                from_location=origin_label,
                 to_location=dest_name,
                 distance_km=round(total_distance, 2),
                 fare=0,
@@ -344,7 +706,7 @@ class RoutingService:
                     step_number=step_num,
                     instruction=f"Walk to {dest_name} (or take tricycle)",
                     transport_mode=TransportMode.WALKING,
-                    from_location="Your current location",
+                    from_location=origin_label,
                     to_location=dest_name,
                     distance_km=round(total_distance, 2),
                     fare=0,
@@ -360,7 +722,7 @@ class RoutingService:
                     step_number=step_num,
                     instruction=f"Take a tricycle to {dest_name}",
                     transport_mode=TransportMode.TRICYCLE,
-                    from_location="Your current location",
+                    from_location=origin_label,
                     to_location=dest_name,
                     distance_km=round(total_distance, 2),
                     fare=tricycle_fare,
@@ -372,10 +734,13 @@ class RoutingService:
         
         else:
             # Longer distance - use public transport to nearby hub, then local
-            nearest_hub = nearest_hub_override or self.find_nearest_terminal(from_lat, from_lon)[0]
-            hub_distance = self.haversine_distance(from_lat, from_lon, 
-                                                   LOCATION_COORDINATES[nearest_hub]['lat'],
-                                                   LOCATION_COORDINATES[nearest_hub]['lon'])
+            nearest_hub = nearest_hub_override or self._cached_plan(
+                cache_key,
+                lambda: terminals[0][0] if terminals else self.find_nearest_terminal(from_lat, from_lon)[0]
+            )
+            hub_distance = self.distance_to(from_lat, from_lon,
+                                            LOCATION_COORDINATES[nearest_hub]['lat'],
+                                            LOCATION_COORDINATES[nearest_hub]['lon'])
             
             # Get to hub
             if hub_distance <= 1:
@@ -383,7 +748,7 @@ class RoutingService:
                     step_number=step_num,
                     instruction=f"Walk to {nearest_hub}",
                     transport_mode=TransportMode.WALKING,
-                    from_location="Your current location",
+                    from_location=origin_label,
                     to_location=nearest_hub,
                     distance_km=round(hub_distance, 2),
                     fare=0,
@@ -397,7 +762,7 @@ class RoutingService:
                     step_number=step_num,
                     instruction=f"Take tricycle to {nearest_hub}",
                     transport_mode=TransportMode.TRICYCLE,
-                    from_location="Your current location",
+                    from_location=origin_label,
                     to_location=nearest_hub,
                     distance_km=round(hub_distance, 2),
                     fare=tricycle_fare,
@@ -429,28 +794,6 @@ class RoutingService:
         
         return steps, total_fare, total_time
     
-    def _find_transport_route(self, from_loc: str, to_loc: str) -> Optional[Tuple[str, dict]]:
-        """
-        Find available transport route between two locations
-        Returns (transport_mode, route_info) or None
-        """
-        from_clean = from_loc.replace(" Terminal", "").replace(" City", "")
-        to_clean = to_loc.replace(" Terminal", "").replace(" City", "")
-        
-        route = (from_clean, to_clean)
-        
-        # Check in order of preference: van, bus, jeepney
-        if route in TRANSPORT_ROUTES.get('van', {}):
-            return ('van', TRANSPORT_ROUTES['van'][route])
-        
-        if route in TRANSPORT_ROUTES.get('bus', {}):
-            return ('bus', TRANSPORT_ROUTES['bus'][route])
-        
-        if route in TRANSPORT_ROUTES.get('jeepney', {}):
-            return ('jeepney', TRANSPORT_ROUTES['jeepney'][route])
-        
-        return None
-    
     def find_nearby_places(
         self, 
         lat: float, 
@@ -463,46 +806,88 @@ class RoutingService:
         Find places near the user's location
         Can filter by item_type (tourist_spot or cuisine)
         """
-        nearby = []
+        snapshot = get_catalog_store().snapshot
+        hits = []
         
-        for _, item in self.excel_df.iterrows():
+        for idx, distance in snapshot.place_index.query_radius(lat, lon, radius_km):
             # Filter by type if specified
-            if item_type and item.get('type') != item_type:
+            if item_type and snapshot.places[idx]['type'] != item_type:
                 continue
             
-            location = item['location']
-            
-            if location in LOCATION_COORDINATES:
-                coords = LOCATION_COORDINATES[location]
-                distance = self.haversine_distance(
-                    lat, lon, 
-                    coords['lat'], coords['lon']
-                )
-                
-                if distance <= radius_km:
-                    is_walking = distance <= WALKING_DISTANCE_THRESHOLD_KM
-                    walking_time = None
-                    if is_walking:
-                        walking_time = int((distance / WALKING_SPEED_KMH) * 60)
-                    
-                    nearby.append(NearbyPlace(
-                        id=item['id'],
-                        name=item['name'],
-                        type=item['type'],
-                        location=location,
-                        distance_km=round(distance, 2),
-                        walking_distance=is_walking,
-                        estimated_walking_time=walking_time
-                    ))
-        
-        nearby.sort(key=lambda x: x.distance_km)
-        return nearby[:limit]
+            hits.append((idx, distance))
+            if len(hits) >= limit:
+                break
+        
+        return self._to_nearby_places(snapshot.places, hits)
+    
+    def find_nearest_places(
+        self,
+        lat: float,
+        lon: float,
+        k: int = 5,
+        item_type: Optional[str] = None
+    ) -> List[NearbyPlace]:
+        """
+        Find the k places closest to the user's location, however far away
+        Can filter by item_type (tourist_spot or cuisine)
+        """
+        snapshot = get_catalog_store().snapshot
+        if item_type:
+            # Over-fetch until enough places of the requested type are found
+            fetch = k
+            while True:
+                hits = snapshot.place_index.query_knn(lat, lon, fetch)
+                matches = [(idx, d) for idx, d in hits if snapshot.places[idx]['type'] == item_type]
+                if len(matches) >= k or fetch >= len(snapshot.place_index):
+                    break
+                fetch *= 4
+            hits = matches[:k]
+        else:
+            hits = snapshot.place_index.query_knn(lat, lon, k)
+        
+        return self._to_nearby_places(snapshot.places, hits)
+    
+    def _to_nearby_places(self, places: List[Dict[str, Any]], hits: List[Tuple[int, float]]) -> List[NearbyPlace]:
+        """NearbyPlace responses for index hits into `places`, with fares estimated in one pass"""
+        modes, fares = self.fare_engine.estimate([distance for _, distance in hits])
+        return [
+            self._to_nearby_place(places[idx], distance, mode, fare)
+            for (idx, distance), mode, fare in zip(hits, modes, fares.tolist())
+        ]
+    
+    def _to_nearby_place(
+        self,
+        place: Dict[str, Any],
+        distance: float,
+        mode: Optional[str] = None,
+        fare: Optional[float] = None
+    ) -> NearbyPlace:
+        """Build the NearbyPlace response for an indexed place"""
+        is_walking = distance <= WALKING_DISTANCE_THRESHOLD_KM
+        walking_time = None
+        if is_walking:
+            walking_time = int((distance / WALKING_SPEED_KMH) * 60)
+        
+        return NearbyPlace(
+            id=place['id'],
+            name=place['name'],
+            type=place['type'],
+            location=place['location'],
+            distance_km=round(distance, 2),
+            walking_distance=is_walking,
+            estimated_walking_time=walking_time,
+            suggested_mode=mode,
+            estimated_fare=fare
+        )
 
-# Singleton
+# Singleton (startup warm-up and early requests may race to create it)
 _routing_service = None
+_routing_service_lock = threading.Lock()
 
 def get_routing_service():
     global _routing_service
     if _routing_service is None:
-        _routing_service = RoutingService()
+        with _routing_service_lock:
+            if _routing_service is None:
+                _routing_service = RoutingService()
     return _routing_service
\ No newline at end of file
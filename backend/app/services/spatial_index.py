@@ -0,0 +1,222 @@
+"""
+Spatial index for nearby/nearest lookups
+Buckets points into an equal-angle lat/lon grid (geohash-style cells) so
+radius and k-nearest queries only inspect cells around the query point,
+then refines candidates with the exact haversine distance.
+"""
+import math
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEG_LAT = math.pi * EARTH_RADIUS_KM / 180  # ~111.19 km
+
+_GEOHASH_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """
+    Great-circle distance between two points in kilometers
+    Scalar reference implementation; batch callers use haversine_many
+    """
+    lat1_rad = math.radians(lat1)
+    lat2_rad = math.radians(lat2)
+    delta_lat = math.radians(lat2 - lat1)
+    delta_lon = math.radians(lon2 - lon1)
+
+    a = math.sin(delta_lat / 2) ** 2 + \
+        math.cos(lat1_rad) * math.cos(lat2_rad) * math.sin(delta_lon / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+def to_radians(coords: Sequence[Tuple[float, float]]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Pre-convert (lat, lon) degree pairs for haversine_many
+    Returns contiguous float64 arrays (lat_rad, lon_rad, cos_lat)
+    """
+    arr = np.asarray(coords, dtype=np.float64).reshape(-1, 2)
+    lat_rad = np.ascontiguousarray(np.radians(arr[:, 0]))
+    lon_rad = np.ascontiguousarray(np.radians(arr[:, 1]))
+    return lat_rad, lon_rad, np.cos(lat_rad)
+
+def haversine_many(
+    lat: float,
+    lon: float,
+    lat_rad: np.ndarray,
+    lon_rad: np.ndarray,
+    cos_lat: np.ndarray = None
+) -> np.ndarray:
+    """
+    Distances in kilometers from one origin (degrees) to many points
+    Points are given as radian arrays from to_radians(); cos_lat is optional
+    and saves one cosine per point when supplied.
+    """
+    origin_lat = math.radians(lat)
+    origin_lon = math.radians(lon)
+    if cos_lat is None:
+        cos_lat = np.cos(lat_rad)
+
+    a = np.sin((lat_rad - origin_lat) * 0.5) ** 2 + \
+        math.cos(origin_lat) * cos_lat * np.sin((lon_rad - origin_lon) * 0.5) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+def geohash_encode(lat: float, lon: float, precision: int = 6) -> str:
+    """
+    Standard geohash of a point; nearby points share a prefix
+    Precision 5 is a ~4.9 x 4.9 km cell, 6 is ~1.2 x 0.6 km, 7 is ~150 m.
+    """
+    lat_lo, lat_hi = -90.0, 90.0
+    lon_lo, lon_hi = -180.0, 180.0
+    chars = []
+    bits = 0
+    value = 0
+    even = True  # Bits alternate lon, lat, lon, ...
+
+    while len(chars) < precision:
+        if even:
+            mid = (lon_lo + lon_hi) / 2
+            if lon >= mid:
+                value = (value << 1) | 1
+                lon_lo = mid
+            else:
+                value <<= 1
+                lon_hi = mid
+        else:
+            mid = (lat_lo + lat_hi) / 2
+            if lat >= mid:
+                value = (value << 1) | 1
+                lat_lo = mid
+            else:
+                value <<= 1
+                lat_hi = mid
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(_GEOHASH_BASE32[value])
+            bits = 0
+            value = 0
+
+    return "".join(chars)
+
+
+class GridIndex:
+    """
+    Grid-bucketed point index
+
+    Points are referenced by their position in the sequence passed in, so
+    callers keep their own parallel list of payloads (ids, names, ...).
+    """
+
+    def __init__(self, points: Sequence[Tuple[float, float]], cell_km: float = 2.0):
+        self.points = [(float(lat), float(lon)) for lat, lon in points]
+        self.lat_rad, self.lon_rad, self.cos_lat = to_radians(self.points)
+        self.cell_deg = cell_km / KM_PER_DEG_LAT
+        self.cells: Dict[Tuple[int, int], np.ndarray] = {}
+
+        buckets: Dict[Tuple[int, int], List[int]] = {}
+        for idx, (lat, lon) in enumerate(self.points):
+            buckets.setdefault(self._cell(lat, lon), []).append(idx)
+        self.cells = {cell: np.array(members, dtype=np.intp) for cell, members in buckets.items()}
+
+        if self.cells:
+            rows = [cell[0] for cell in self.cells]
+            cols = [cell[1] for cell in self.cells]
+            self._bounds = (min(rows), max(rows), min(cols), max(cols))
+
+    def __len__(self) -> int:
+        return len(self.points)
+
+    def _cell(self, lat: float, lon: float) -> Tuple[int, int]:
+        return (math.floor(lat / self.cell_deg), math.floor(lon / self.cell_deg))
+
+    def _distances(self, lat: float, lon: float, candidates: np.ndarray) -> np.ndarray:
+        """Exact haversine distances to the candidate indexes"""
+        return haversine_many(
+            lat, lon,
+            self.lat_rad[candidates], self.lon_rad[candidates], self.cos_lat[candidates]
+        )
+
+    def query_radius(self, lat: float, lon: float, radius_km: float) -> List[Tuple[int, float]]:
+        """
+        All points within radius_km of (lat, lon)
+        Returns [(index, distance_km), ...] sorted by distance
+        """
+        if not self.cells:
+            return []
+
+        dlat = radius_km / KM_PER_DEG_LAT
+        max_abs_lat = min(abs(lat) + dlat, 89.9)
+        dlon = radius_km / (KM_PER_DEG_LAT * math.cos(math.radians(max_abs_lat)))
+
+        row_min, col_min = self._cell(lat - dlat, lon - dlon)
+        row_max, col_max = self._cell(lat + dlat, lon + dlon)
+
+        parts = []
+        if (row_max - row_min + 1) * (col_max - col_min + 1) <= len(self.cells):
+            for row in range(row_min, row_max + 1):
+                for col in range(col_min, col_max + 1):
+                    members = self.cells.get((row, col))
+                    if members is not None:
+                        parts.append(members)
+        else:
+            # Search box covers more cells than are occupied; walk occupied cells
+            for (row, col), members in self.cells.items():
+                if row_min <= row <= row_max and col_min <= col <= col_max:
+                    parts.append(members)
+
+        if not parts:
+            return []
+
+        candidates = np.concatenate(parts)
+        distances = self._distances(lat, lon, candidates)
+        inside = distances <= radius_km
+        candidates, distances = candidates[inside], distances[inside]
+
+        order = np.argsort(distances, kind="stable")
+        return list(zip(candidates[order].tolist(), distances[order].tolist()))
+
+    def query_knn(self, lat: float, lon: float, k: int) -> List[Tuple[int, float]]:
+        """
+        The k points nearest to (lat, lon)
+        Expands square rings of cells until the k-th best distance is
+        guaranteed to be inside the searched area.
+        Returns [(index, distance_km), ...] sorted by distance
+        """
+        if not self.cells or k <= 0:
+            return []
+
+        k = min(k, len(self.points))
+        row0, col0 = self._cell(lat, lon)
+        row_lo, row_hi, col_lo, col_hi = self._bounds
+        max_ring = max(row0 - row_lo, row_hi - row0, col0 - col_lo, col_hi - col0, 0)
+
+        best_idx = np.empty(0, dtype=np.intp)
+        best_dist = np.empty(0, dtype=np.float64)
+        for ring in range(max_ring + 1):
+            parts = []
+            for row in range(row0 - ring, row0 + ring + 1):
+                if ring == 0 or row in (row0 - ring, row0 + ring):
+                    cols = range(col0 - ring, col0 + ring + 1)
+                else:
+                    cols = (col0 - ring, col0 + ring)
+                for col in cols:
+                    members = self.cells.get((row, col))
+                    if members is not None:
+                        parts.append(members)
+
+            if parts:
+                ring_idx = np.concatenate(parts)
+                best_idx = np.concatenate([best_idx, ring_idx])
+                best_dist = np.concatenate([best_dist, self._distances(lat, lon, ring_idx)])
+
+            if len(best_idx) >= k:
+                order = np.argsort(best_dist, kind="stable")[:k]
+                best_idx, best_dist = best_idx[order], best_dist[order]
+                # Every point within `covered` km has been visited after this ring
+                reach_deg = ring * self.cell_deg
+                max_abs_lat = min(abs(lat) + reach_deg, 89.9)
+                covered = reach_deg * KM_PER_DEG_LAT * math.cos(math.radians(max_abs_lat))
+                if best_dist[-1] <= covered:
+                    break
+
+        order = np.argsort(best_dist, kind="stable")[:k]
+        return list(zip(best_idx[order].tolist(), best_dist[order].tolist()))
@@ -0,0 +1,183 @@
+"""
+Multimodal transport graph
+Compiles TRANSPORT_ROUTES into a weighted graph (jeepney, bus and van
+edges between towns, plus walking/tricycle connectors between nearby
+places); HubRouteTable runs Dijkstra from every node, under each
+selectable cost, so routing looks multi-leg routes up instead of
+searching per request.
+"""
+import heapq
+import math
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from data.location_coordinates import (
+    LOCATION_COORDINATES,
+    TRANSPORT_ROUTES,
+    WALKING_SPEED_KMH,
+    WALKING_DISTANCE_THRESHOLD_KM,
+    calculate_tricycle_fare
+)
+from app.models.location_schemas import RouteCost
+from app.services.spatial_index import haversine_km
+from app.utils.log import get_logger
+
+logger = get_logger(__name__)
+
+# Minutes of travel time one peso is worth when optimising the weighted cost
+FARE_MINUTES_PER_PESO = 0.5
+
+# Tricycle minutes per km (same estimate the step builder uses)
+TRICYCLE_MINUTES_PER_KM = 5
+
+@dataclass(frozen=True)
+class TransportEdge:
+    """One leg between two graph nodes"""
+    from_node: str
+    to_node: str
+    mode: str  # walking, tricycle, jeepney, bus, van
+    distance_km: float
+    fare: float
+    time_minutes: int
+
+def edge_cost(time_minutes: float, fare: float, cost: RouteCost) -> float:
+    """Scalar cost of a leg (or whole trip) under the selected objective"""
+    if cost == RouteCost.FARE:
+        return fare
+    if cost == RouteCost.WEIGHTED:
+        return time_minutes + FARE_MINUTES_PER_PESO * fare
+    return time_minutes
+
+def node_name(location: str) -> str:
+    """Map terminals and city names onto their town node (e.g. 'Laoag City Terminal' -> 'Laoag')"""
+    return location.replace(" Terminal", "").replace(" City", "")
+
+
+class TransportGraph:
+    """Adjacency-list graph over LOCATION_COORDINATES and TRANSPORT_ROUTES"""
+
+    def __init__(self, coordinates: Dict = None, routes: Dict = None):
+        coordinates = LOCATION_COORDINATES if coordinates is None else coordinates
+        routes = TRANSPORT_ROUTES if routes is None else routes
+
+        self.coords: Dict[str, Tuple[float, float]] = {}
+        for name, point in coordinates.items():
+            self.coords.setdefault(node_name(name), (point['lat'], point['lon']))
+
+        self.edges: Dict[str, List[TransportEdge]] = {node: [] for node in self.coords}
+        self._add_transit_edges(routes)
+        self._add_connectors(routes)
+
+    def _add_edge(self, edge: TransportEdge):
+        self.edges.setdefault(edge.from_node, []).append(edge)
+        self.edges.setdefault(edge.to_node, [])
+
+    def _add_transit_edges(self, routes: Dict):
+        """Scheduled jeepney/bus/van legs"""
+        for mode in ('jeepney', 'bus', 'van'):
+            for (origin, destination), info in routes.get(mode, {}).items():
+                self._add_edge(TransportEdge(
+                    from_node=node_name(origin),
+                    to_node=node_name(destination),
+                    mode=mode,
+                    distance_km=info['distance_km'],
+                    fare=info['fare'],
+                    time_minutes=info['time_minutes']
+                ))
+
+    def _add_connectors(self, routes: Dict):
+        """Walking/tricycle links between places close enough to not need a bus"""
+        max_tricycle_km = routes.get('tricycle', {}).get('max_distance_km', 5)
+        nodes = list(self.coords.items())
+
+        for i, (a, (a_lat, a_lon)) in enumerate(nodes):
+            for b, (b_lat, b_lon) in nodes[i + 1:]:
+                distance = haversine_km(a_lat, a_lon, b_lat, b_lon)
+                if distance <= WALKING_DISTANCE_THRESHOLD_KM:
+                    mode, fare = 'walking', 0.0
+                    time_minutes = int(round((distance / WALKING_SPEED_KMH) * 60))
+                elif distance <= max_tricycle_km:
+                    mode, fare = 'tricycle', calculate_tricycle_fare(distance)
+                    time_minutes = int(round(distance * TRICYCLE_MINUTES_PER_KM))
+                else:
+                    continue
+
+                for src, dst in ((a, b), (b, a)):
+                    self._add_edge(TransportEdge(src, dst, mode, round(distance, 2), fare, time_minutes))
+
+    def shortest_paths_from(self, from_location: str, cost: RouteCost = RouteCost.TIME) -> Dict[str, List[TransportEdge]]:
+        """
+        Cheapest paths from one place to every reachable node (Dijkstra)
+        Returns {node: [legs]}, with [] for the start node itself
+        """
+        start = node_name(from_location)
+        if start not in self.coords:
+            return {}
+
+        best = {start: 0.0}
+        came_from: Dict[str, TransportEdge] = {}
+        counter = 0
+        frontier = [(0.0, counter, start)]
+        closed = set()
+
+        while frontier:
+            dist, _, node = heapq.heappop(frontier)
+            if node in closed:
+                continue
+            closed.add(node)
+
+            for edge in self.edges.get(node, ()):
+                candidate = dist + edge_cost(edge.time_minutes, edge.fare, cost)
+                if candidate < best.get(edge.to_node, math.inf):
+                    best[edge.to_node] = candidate
+                    came_from[edge.to_node] = edge
+                    counter += 1
+                    heapq.heappush(frontier, (candidate, counter, edge.to_node))
+
+        paths = {start: []}
+        for node in closed:
+            if node == start:
+                continue
+            path = []
+            current = node
+            while current != start:
+                edge = came_from[current]
+                path.append(edge)
+                current = edge.from_node
+            path.reverse()
+            paths[node] = path
+        return paths
+
+
+class HubRouteTable:
+    """
+    All-pairs itineraries between graph nodes for every RouteCost
+    Built once with repeated Dijkstra; lookups are a dict read.
+    """
+
+    def __init__(self, graph: TransportGraph):
+        started = time.perf_counter()
+
+        self.paths: Dict[RouteCost, Dict[Tuple[str, str], Tuple[TransportEdge, ...]]] = {}
+        for cost in RouteCost:
+            table = {}
+            for source in graph.coords:
+                for target, path in graph.shortest_paths_from(source, cost).items():
+                    table[(source, target)] = tuple(path)
+            self.paths[cost] = table
+
+        self.build_ms = (time.perf_counter() - started) * 1000
+        logger.info(
+            "Hub route table built: %d hubs, %d pairs per cost in %.1f ms",
+            len(graph.coords), len(self.paths[RouteCost.TIME]), self.build_ms
+        )
+
+    def path(self, from_location: str, to_location: str, cost: RouteCost = RouteCost.TIME) -> Optional[List[TransportEdge]]:
+        """
+        Precomputed legs between two places
+        Returns [] when both names resolve to the same node, None when
+        either end is unknown or no path exists.
+        """
+        legs = self.paths[cost].get((node_name(from_location), node_name(to_location)))
+        return None if legs is None else list(legs)
@@ -1,13 +1,14 @@
 def add_routing_info(items):
-    """Add routing availability info to items"""
-    from app.services.routing_service import get_routing_service
-    
-    routing_service = get_routing_service()
+    """
+    Add routing availability info to items
+    Coordinates (lat, lon, coord_source) are resolved when the catalog is
+    loaded, so this only reads the flag.
+    """
+    from app.services.geocoding import COORD_NONE
     
     for item in items:
         # Check if this destination has coordinates
-        coords = routing_service.get_destination_coordinates(item.get('id', ''))
-        item['has_routing'] = coords is not None
+        item['has_routing'] = item.get('coord_source', COORD_NONE) != COORD_NONE
         item['destination_id'] = item.get('id', '')
     
     return items
\ No newline at end of file
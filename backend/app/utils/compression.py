@@ -0,0 +1,129 @@
+"""
+Negotiated response compression
+gzip is always available; brotli ("br") and zstd are used when their
+optional packages are installed (pip install brotli zstandard). The
+client's Accept-Encoding picks among them, in COMPRESSION_ENCODINGS
+preference order, and bodies under COMPRESSION_MIN_BYTES are sent as is.
+
+Responses whose bytes are cached (catalog lists) compress through
+EncodedBody.variant() so each encoding is computed once per catalog
+version; everything else goes through CompressionMiddleware.
+"""
+import gzip
+from typing import Callable, Dict, Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.config import COMPRESSION_ENCODINGS, COMPRESSION_MIN_BYTES
+
+try:
+    import brotli
+except ImportError:  # Optional dependency
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # Optional dependency
+    zstandard = None
+
+_compressors: Dict[str, Callable[[bytes], bytes]] = {
+    "gzip": lambda body: gzip.compress(body, compresslevel=6, mtime=0),
+}
+if brotli is not None:
+    _compressors["br"] = lambda body: brotli.compress(body, quality=5)
+if zstandard is not None:
+    _compressors["zstd"] = lambda body: zstandard.ZstdCompressor(level=3).compress(body)
+
+# Server preference among the encodings that are actually available
+AVAILABLE_ENCODINGS = tuple(name for name in COMPRESSION_ENCODINGS if name in _compressors)
+
+# Media types worth compressing (text/event-stream is streamed, never buffered)
+_COMPRESSIBLE = ("application/json", "text/", "application/x-ndjson")
+
+def negotiate(accept_encoding: Optional[str]) -> Optional[str]:
+    """Best available encoding the client accepts (q > 0), or None for identity"""
+    if not accept_encoding:
+        return None
+
+    accepted: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip().lower()] = quality
+
+    wildcard = accepted.get("*", 0.0)
+    for name in AVAILABLE_ENCODINGS:
+        if accepted.get(name, wildcard) > 0:
+            return name
+    return None
+
+def compress(body: bytes, encoding: str) -> bytes:
+    return _compressors[encoding](body)
+
+def response_encoding(accept_encoding: Optional[str], size: int) -> Optional[str]:
+    """Encoding to use for a body of `size` bytes, or None to send it uncompressed"""
+    if size < COMPRESSION_MIN_BYTES:
+        return None
+    return negotiate(accept_encoding)
+
+class CompressionMiddleware:
+    """
+    Compress complete (non-streamed) responses for clients that accept it
+    Streamed responses (SSE, NDJSON export) and responses that already set
+    Content-Encoding pass through unchanged.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate(Headers(scope=scope).get("accept-encoding"))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start: Optional[Message] = None
+        passthrough = False
+
+        async def send_compressed(message: Message):
+            nonlocal start, passthrough
+            if passthrough:
+                await send(message)
+                return
+            if message["type"] == "http.response.start":
+                start = message
+                return
+
+            headers = MutableHeaders(raw=start["headers"])
+            body = message.get("body", b"")
+            if (
+                message.get("more_body", False)
+                or "content-encoding" in headers
+                or len(body) < COMPRESSION_MIN_BYTES
+                or not headers.get("content-type", "").startswith(_COMPRESSIBLE)
+            ):
+                # Leave it alone; after the first chunk everything is forwarded as is
+                passthrough = True
+                await send(start)
+                await send(message)
+                return
+
+            body = compress(body, encoding)
+            headers["Content-Encoding"] = encoding
+            headers["Content-Length"] = str(len(body))
+            headers.add_vary_header("Accept-Encoding")
+            await send(start)
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, send_compressed)
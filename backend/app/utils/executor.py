@@ -0,0 +1,40 @@
+"""
+Shared executor for blocking work
+Search (pyswip/pandas) and routing calls are CPU-bound and would otherwise
+stall the single uvicorn event loop, so async handlers hand them off here.
+"""
+import asyncio
+import contextvars
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from app.config import BLOCKING_WORKERS
+
+_executor: Optional[ThreadPoolExecutor] = None
+
+def get_executor() -> ThreadPoolExecutor:
+    """Get or create the blocking-work thread pool (size: BLOCKING_WORKERS)"""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=max(1, BLOCKING_WORKERS),
+            thread_name_prefix="blocking"
+        )
+    return _executor
+
+async def run_blocking(func, *args, **kwargs):
+    """
+    Run a blocking callable in the shared executor and await its result
+    The caller's context variables (e.g. per-request debug flag) are carried over.
+    """
+    loop = asyncio.get_running_loop()
+    ctx = contextvars.copy_context()
+    return await loop.run_in_executor(get_executor(), functools.partial(ctx.run, func, *args, **kwargs))
+
+def shutdown_executor():
+    """Stop the executor (called on application shutdown)"""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
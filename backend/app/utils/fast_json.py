@@ -0,0 +1,23 @@
+"""
+Fast JSON encoding to bytes
+Uses orjson when it is installed (optional dependency) and otherwise
+pydantic-core's encoder, which ships with pydantic. Output is compact
+UTF-8, the same shape FastAPI's JSONResponse produces.
+"""
+from typing import Any
+
+from pydantic_core import to_json
+
+try:
+    import orjson
+except ImportError:  # Optional: pip install orjson
+    orjson = None
+
+def dumps(value: Any) -> bytes:
+    """Encode a JSON-ready value (dicts, lists, str, numbers, None, datetimes)"""
+    if orjson is not None:
+        return orjson.dumps(value)
+    return to_json(value)
+
+def encoder_name() -> str:
+    return "orjson" if orjson is not None else "pydantic-core"
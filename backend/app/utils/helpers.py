@@ -1,12 +1,34 @@
 """
 Helper utility functions
 """
-import pandas as pd
+import math
+from typing import Optional, Sequence, Tuple
+
+def is_missing(value):
+    """True for None and NaN (empty cells), without needing pandas"""
+    return value is None or (isinstance(value, float) and math.isnan(value))
+
+def parse_fields(fields: Optional[str], allowed: Sequence[str]) -> Tuple[str, ...]:
+    """
+    Parse a comma-separated `fields` projection parameter
+    Missing or empty means every allowed field; repeats are dropped.
+    Raises ValueError naming the unknown fields, if any.
+    """
+    requested = tuple(dict.fromkeys(f.strip() for f in (fields or "").split(",") if f.strip()))
+    if not requested:
+        return tuple(allowed)
+    
+    unknown = [f for f in requested if f not in allowed]
+    if unknown:
+        raise ValueError(f"Unknown field(s): {', '.join(unknown)}. Allowed: {', '.join(allowed)}")
+    return requested
 
 def clean_nan_values(data):
     """
     Replace pandas NaN values with None for proper JSON serialization
     """
+    import pandas as pd
+
     if isinstance(data, dict):
         return {k: None if pd.isna(v) else v for k, v in data.items()}
     elif isinstance(data, list):
@@ -20,7 +42,9 @@ def df_to_dict_clean(df, orient='records'):
     """
     Convert DataFrame to dict with NaN values replaced by None
     """
+    import pandas as pd
+
     if df.empty:
         return [] if orient == 'records' else {}
     df_clean = df.where(pd.notna(df), None)
-    return df_clean.to_dict(orient)
\ No newline at end of file
+    return df_clean.to_dict(orient)
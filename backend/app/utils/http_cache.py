@@ -0,0 +1,76 @@
+"""
+HTTP caching helpers (ETag / If-None-Match / Cache-Control)
+For responses whose bytes are built once and kept (e.g. per catalog
+version): a client that already holds the current copy gets a 304 with
+no body, everyone else gets the stored bytes as they are, compressed
+once per encoding when the client accepts it.
+"""
+import hashlib
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+
+from fastapi import Request, Response
+
+from app.utils.compression import compress, response_encoding
+
+@dataclass(frozen=True)
+class EncodedBody:
+    """Response bytes plus their strong ETag (a hash of the bytes and any varying headers)"""
+    body: bytes
+    etag: str
+    _variants: Dict[str, bytes] = field(default_factory=dict, compare=False, repr=False)
+
+    @classmethod
+    def of(cls, body: bytes, headers_key: str = "") -> "EncodedBody":
+        digest = hashlib.blake2b(body, digest_size=12)
+        digest.update(headers_key.encode())
+        return cls(body, '"' + digest.hexdigest() + '"')
+
+    def variant(self, encoding: str) -> bytes:
+        """The body compressed with `encoding`, computed on first use and kept alongside it"""
+        body = self._variants.get(encoding)
+        if body is None:
+            body = self._variants.setdefault(encoding, compress(self.body, encoding))
+        return body
+
+def _encoded_etag(etag: str, encoding: Optional[str]) -> str:
+    """Each content-coding is its own representation, so it gets its own tag"""
+    return etag if encoding is None else f'{etag[:-1]}-{encoding}"'
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """
+    True if the request's If-None-Match names this ETag (weak comparison, as
+    RFC 9110 requires), in any content-coding
+    """
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    for candidate in header.split(","):
+        candidate = candidate.strip().removeprefix("W/")
+        if candidate == etag or (candidate.startswith(etag[:-1] + "-") and candidate.endswith('"')):
+            return True
+    return False
+
+def conditional_response(
+    request: Request,
+    encoded: EncodedBody,
+    max_age: int,
+    media_type: str = "application/json",
+    headers: Optional[Dict[str, str]] = None
+) -> Response:
+    """304 if the client's copy is current, else the stored bytes; both carry ETag and Cache-Control"""
+    encoding = response_encoding(request.headers.get("accept-encoding"), len(encoded.body))
+    headers = {
+        **(headers or {}),
+        "ETag": _encoded_etag(encoded.etag, encoding),
+        "Cache-Control": f"public, max-age={max_age}, must-revalidate",
+        "Vary": "Accept-Encoding",
+    }
+    if etag_matches(request, encoded.etag):
+        return Response(status_code=304, headers=headers)
+    if encoding is None:
+        return Response(content=encoded.body, media_type=media_type, headers=headers)
+    headers["Content-Encoding"] = encoding
+    return Response(content=encoded.variant(encoding), media_type=media_type, headers=headers)
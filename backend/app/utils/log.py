@@ -0,0 +1,115 @@
+"""
+Structured, non-blocking logging
+Records are handed to a QueueHandler and written to stdout by a background
+QueueListener thread, so the event loop never waits on console I/O.
+Debug detail is level-gated and can be switched on for a single request.
+"""
+import json
+import logging
+import queue
+import sys
+from contextvars import ContextVar
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+
+from app.config import LOG_LEVEL, LOG_FORMAT
+
+ROOT_LOGGER = "locatour"
+
+# Set per request (e.g. ChatRequest.debug) to surface debug detail at INFO level
+request_debug: ContextVar[bool] = ContextVar("request_debug", default=False)
+
+_listener: Optional[QueueListener] = None
+
+
+class StructuredFormatter(logging.Formatter):
+    """One JSON object per line; `extra={...}` fields are included as keys"""
+    
+    _RESERVED = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+    
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": self.formatTime(record, "%Y-%m-%dT%H:%M:%S"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in self._RESERVED and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class Lazy:
+    """Defers building an expensive log argument until the record is formatted"""
+    
+    __slots__ = ("func",)
+    
+    def __init__(self, func):
+        self.func = func
+    
+    def __str__(self) -> str:
+        return str(self.func())
+
+
+class _DeferredQueueHandler(QueueHandler):
+    """Enqueue records unformatted so formatting happens on the listener thread"""
+    
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+def get_logger(name: str) -> logging.Logger:
+    """Get a logger under the application namespace"""
+    return logging.getLogger(f"{ROOT_LOGGER}.{name}")
+
+
+def debug_enabled(logger: logging.Logger) -> bool:
+    """True when debug output would be emitted for the current request"""
+    return request_debug.get() or logger.isEnabledFor(logging.DEBUG)
+
+
+def log_debug(logger: logging.Logger, msg: str, *args, **kwargs):
+    """
+    Emit debug detail, formatted lazily
+    
+    Goes out at DEBUG when the logger is configured for it, otherwise at INFO
+    when the current request asked for debug output; dropped in all other
+    cases without formatting any arguments.
+    """
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(msg, *args, **kwargs)
+    elif request_debug.get():
+        logger.info(msg, *args, **kwargs)
+
+
+def setup_logging():
+    """Route application logs through a queue to a background stdout writer"""
+    global _listener
+    if _listener is not None:
+        return
+    
+    handler = logging.StreamHandler(sys.stdout)
+    if LOG_FORMAT == "json":
+        handler.setFormatter(StructuredFormatter())
+    else:
+        handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+    
+    log_queue = queue.SimpleQueue()
+    _listener = QueueListener(log_queue, handler, respect_handler_level=True)
+    _listener.start()
+    
+    root = logging.getLogger(ROOT_LOGGER)
+    root.setLevel(LOG_LEVEL)
+    root.addHandler(_DeferredQueueHandler(log_queue))
+    root.propagate = False
+
+
+def shutdown_logging():
+    """Flush queued records and stop the background writer"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
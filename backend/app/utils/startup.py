@@ -0,0 +1,156 @@
+"""
+Startup profiling
+The lifespan wraps each startup step in startup_phase(); with
+STARTUP_PROFILE=1 the phase table is printed once warm-up has finished.
+
+Run as a module to profile a whole cold start (import, lifespan and
+service warm-up) against STARTUP_TARGET_MS; exits 1 when over target:
+
+    python -m app.utils.startup [--threshold MS] [--target MS]
+
+Importing app.main should stay cheap: pandas is only needed by the Excel
+import/export tool, and pyswip is loaded when the Prolog service is built.
+"""
+import argparse
+import asyncio
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+
+from app.config import BASE_DIR, STARTUP_IMPORT_THRESHOLD_MS, STARTUP_TARGET_MS
+
+# (phase name, milliseconds) in the order the phases ran
+_phases: List[Tuple[str, float]] = []
+
+@contextmanager
+def startup_phase(name: str):
+    """Record how long the enclosed startup step takes"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        _phases.append((name, (time.perf_counter() - started) * 1000))
+
+def startup_phases() -> List[Tuple[str, float]]:
+    return list(_phases)
+
+def format_phases(phases: List[Tuple[str, float]]) -> str:
+    """Phase timing table"""
+    width = max([len(name) for name, _ in phases] + [5])
+    lines = [f"  {name:<{width}} {ms:9.1f} ms" for name, ms in phases]
+    lines.append(f"  {'total':<{width}} {sum(ms for _, ms in phases):9.1f} ms")
+    return "\n".join(lines)
+
+@dataclass
+class ImportNode:
+    """One module from `python -X importtime`"""
+    name: str
+    self_ms: float
+    cumulative_ms: float
+    children: List["ImportNode"] = field(default_factory=list)
+
+def parse_importtime(output: str) -> List[ImportNode]:
+    """
+    Build the import tree from `-X importtime` output
+    Modules are listed after their own imports, indented two spaces per
+    level, so each line adopts the pending lines one level deeper.
+    """
+    pending = {}  # indent -> nodes waiting for their parent
+    for line in output.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        if not self_us.strip().isdigit():  # Header line
+            continue
+        indent = len(name) - len(name.lstrip())
+        node = ImportNode(
+            name.strip(),
+            int(self_us) / 1000,
+            int(cumulative_us) / 1000,
+            pending.pop(indent + 2, [])
+        )
+        pending.setdefault(indent, []).append(node)
+    return pending[min(pending)] if pending else []
+
+def format_import_tree(roots: List[ImportNode], threshold_ms: float) -> str:
+    """Imports costing at least threshold_ms (cumulative), slowest first"""
+    lines = []
+
+    def walk(nodes: List[ImportNode], depth: int):
+        for node in sorted(nodes, key=lambda n: n.cumulative_ms, reverse=True):
+            if node.cumulative_ms < threshold_ms:
+                continue
+            lines.append(
+                f"  {node.cumulative_ms:9.1f} ms {node.self_ms:8.1f} ms  {'  ' * depth}{node.name}"
+            )
+            walk(node.children, depth + 1)
+
+    walk(roots, 0)
+    return "\n".join(lines)
+
+def import_tree(module: str = "app.main") -> List[ImportNode]:
+    """Import `module` in a fresh interpreter with -X importtime"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BASE_DIR, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+    return parse_importtime(result.stderr)
+
+async def _run_lifespan(timeout: float) -> Optional[float]:
+    """Start the app (lifespan and warm-up) and shut it down; returns warm-up ms"""
+    from app.main import app
+    from app.services.registry import get_registry
+
+    registry = get_registry()
+    async with app.router.lifespan_context(app):
+        deadline = time.perf_counter() + timeout
+        while not registry.warmed_up and time.perf_counter() < deadline:
+            await asyncio.sleep(0.01)
+    return registry.warmup_ms
+
+def profile(threshold_ms: float = STARTUP_IMPORT_THRESHOLD_MS, target_ms: float = STARTUP_TARGET_MS) -> bool:
+    """Print the import tree and startup phases; True if the cold start is within target"""
+    roots = import_tree()
+    print(f"Import tree (cumulative / self, >= {threshold_ms:g} ms):")
+    print(format_import_tree(roots, threshold_ms))
+
+    started = time.perf_counter()
+    import app.main  # noqa: F401
+    import_ms = (time.perf_counter() - started) * 1000
+
+    started = time.perf_counter()
+    warmup_ms = asyncio.run(_run_lifespan(timeout=max(target_ms / 1000, 30)))
+    startup_ms = (time.perf_counter() - started) * 1000
+
+    # Run as `-m`, this file is __main__; the lifespan records into app.utils.startup
+    from app.utils import startup
+
+    print("\nLifespan phases:")
+    print(format_phases(startup.startup_phases()))
+    if warmup_ms is None:
+        print("  warm-up did not finish")
+        return False
+    print(f"  warm-up {warmup_ms:.1f} ms (services, concurrently, after the lifespan returned)")
+
+    cold_start_ms = import_ms + startup_ms
+    within = cold_start_ms <= target_ms
+    print(
+        f"\nCold start: {cold_start_ms:.1f} ms "
+        f"(import {import_ms:.1f} ms, startup to ready {startup_ms:.1f} ms), "
+        f"target {target_ms:g} ms {'✓' if within else '✗'}"
+    )
+    return within
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Profile API cold start")
+    parser.add_argument("--threshold", type=float, default=STARTUP_IMPORT_THRESHOLD_MS,
+                        help="hide imports cheaper than this (ms, cumulative)")
+    parser.add_argument("--target", type=float, default=STARTUP_TARGET_MS,
+                        help="cold-start target (ms)")
+    args = parser.parse_args()
+    sys.exit(0 if profile(args.threshold, args.target) else 1)
@@ -0,0 +1,113 @@
+"""
+Throughput of concurrent routing requests by executor size
+Sends bursts of route, nearby and itinerary requests (6:1:1) through an
+in-process ASGI client: first with the handlers calling the blocking
+work inline (as before run_blocking), then on BLOCKING_WORKERS threads
+for each size given. Each run also polls a trivial endpoint and reports
+its worst latency, i.e. how long the event loop stalled. Route caches
+are cleared and origins are random, so every request is computed. Chat
+search is left out: its Prolog queries share one engine lock, so it
+cannot scale with threads. Uses the catalog in the configured database.
+
+    python -m benchmarks.blocking_workers [--requests N] [--workers 1,2,4,8]     (from backend/)
+"""
+import argparse
+import asyncio
+import random
+import time
+
+import httpx
+from fastapi import FastAPI
+
+from app.database import init_db
+from app.routes import location
+from app.services.catalog_store import init_catalog_store
+from app.services.geocoding import COORD_NONE
+from app.services.routing_service import get_routing_service
+from app.utils import executor
+
+async def _inline(func, *args, **kwargs):
+    return func(*args, **kwargs)
+
+def _app() -> FastAPI:
+    app = FastAPI()
+    app.include_router(location.router)
+
+    @app.get("/ping")
+    async def ping():
+        return {}
+
+    return app
+
+async def _burst(client: httpx.AsyncClient, requests: int, destinations, seed: int):
+    """(seconds for the burst, worst /ping latency in seconds)"""
+    rng = random.Random(seed)
+    get_routing_service().invalidate_catalog()
+
+    async def one(n: int):
+        lat, lon = rng.uniform(17.9, 18.5), rng.uniform(120.4, 120.9)
+        if n % 8 == 0:
+            response = await client.get("/api/location/nearby", params={
+                "latitude": lat, "longitude": lon, "radius_km": 20
+            })
+        elif n % 8 == 1:
+            response = await client.post("/api/location/itinerary", json={
+                "latitude": lat, "longitude": lon, "destination_ids": rng.sample(destinations, 5)
+            })
+        else:
+            response = await client.post("/api/location/route", json={
+                "latitude": lat, "longitude": lon, "destination_id": rng.choice(destinations)
+            })
+        response.raise_for_status()
+
+    done = asyncio.Event()
+
+    async def ping() -> float:
+        worst = 0.0
+        while not done.is_set():
+            started = time.perf_counter()
+            await client.get("/ping")
+            worst = max(worst, time.perf_counter() - started)
+            await asyncio.sleep(0.005)
+        return worst
+
+    pinger = asyncio.create_task(ping())
+    started = time.perf_counter()
+    await asyncio.gather(*(one(n) for n in range(requests)))
+    elapsed = time.perf_counter() - started
+    done.set()
+    return elapsed, await pinger
+
+async def run(requests: int, workers):
+    await init_db()
+    store = await init_catalog_store()
+    destinations = [item_id for item_id, item in store.snapshot.items.items() if item['coord_source'] != COORD_NONE]
+    get_routing_service()
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=_app()), base_url="http://bench") as client:
+        # Warm up imports and lazily built tables outside the timed runs
+        await _burst(client, 20, destinations, seed=0)
+
+        print(f"{requests} concurrent routing requests:")
+        print(f"  {'executor':>12} {'seconds':>8} {'req/s':>8} {'max ping':>9}")
+        runs = [("inline", None)] + [(f"{n} thread(s)", n) for n in workers]
+        run_blocking = location.run_blocking
+        for label, size in runs:
+            executor.shutdown_executor()
+            if size is None:
+                location.run_blocking = _inline
+            else:
+                location.run_blocking = run_blocking
+                executor.BLOCKING_WORKERS = size
+            elapsed, worst_ping = await _burst(client, requests, destinations, seed=1)
+            print(f"  {label:>12} {elapsed:8.3f} {requests / elapsed:8.0f} {worst_ping * 1000:7.1f}ms")
+        location.run_blocking = run_blocking
+    executor.shutdown_executor()
+    await store.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark routing throughput by executor size")
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--workers", default="1,2,4,8", help="comma-separated executor sizes")
+    args = parser.parse_args()
+    asyncio.run(run(args.requests, [int(n) for n in args.workers.split(",")]))
@@ -0,0 +1,65 @@
+"""
+Serialisation cost per chat result card
+Compares the previous path (ChatResponse validation plus FastAPI's
+jsonable_encoder and json.dumps) with encoding each card and with cards
+already cached on the catalog snapshot (app/services/chat_cards.py).
+Uses the catalog in the configured database.
+
+    python -m benchmarks.chat_cards [--rounds N]     (from backend/)
+"""
+import argparse
+import asyncio
+import json
+import time
+from datetime import datetime
+from typing import Any, Dict, List
+
+from fastapi.encoders import jsonable_encoder
+
+from app.database import init_db
+from app.models.schemas import ChatResponse
+from app.services.catalog_store import init_catalog_store
+from app.services.chat_cards import chat_response_body, encode_cards
+from app.services.prolog_service import get_prolog_service
+from app.utils.add_routing_info import add_routing_info
+from app.utils.fast_json import dumps, encoder_name
+
+async def _load():
+    await init_db()
+    return await init_catalog_store()
+
+def run(rounds: int):
+    snapshot = asyncio.run(_load()).snapshot
+    service = get_prolog_service()
+    items = add_routing_info([service.get_item_from_excel(row['id'], snapshot) for row in snapshot.rows])
+    timestamp = datetime.utcnow()
+
+    def per_card_us(func, cards: List[Dict[str, Any]]) -> float:
+        started = time.perf_counter()
+        for _ in range(rounds):
+            func(cards)
+        return (time.perf_counter() - started) / rounds / len(cards) * 1e6
+
+    def previous(cards):
+        response = ChatResponse(response="...", matched_items=cards, session_id="s", timestamp=timestamp)
+        json.dumps(jsonable_encoder(response), ensure_ascii=False, separators=(",", ":")).encode()
+
+    def cold(cards):
+        chat_response_body("...", [dumps(card) for card in cards], "s", timestamp)
+
+    def cached(cards):
+        chat_response_body("...", encode_cards(snapshot, cards), "s", timestamp)
+
+    print(f"Serialisation per result card ({encoder_name()}, {rounds} rounds):")
+    print(f"  {'cards':>5} {'previous':>10} {'encode':>10} {'cached':>10}")
+    for count in (1, 3, 10):
+        cards = items[:count]
+        print(
+            f"  {count:>5} {per_card_us(previous, cards):8.1f}us {per_card_us(cold, cards):8.1f}us "
+            f"{per_card_us(cached, cards):8.2f}us"
+        )
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark chat response serialisation")
+    parser.add_argument("--rounds", type=int, default=2000)
+    run(parser.parse_args().rounds)
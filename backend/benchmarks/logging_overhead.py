@@ -0,0 +1,83 @@
+"""
+Per-turn cost of search diagnostics on the calling thread
+Compares the print() lines search_with_context used to write on every
+chat turn with the log_debug calls that replaced them: dropped at INFO,
+and queued for the background writer when a request sets the debug
+flag. Output goes to /dev/null, so only the caller's cost is measured.
+
+    python -m benchmarks.logging_overhead [--turns N]     (from backend/)
+"""
+import argparse
+import contextlib
+import logging
+import os
+import sys
+import time
+
+from app.utils.log import ROOT_LOGGER, Lazy, get_logger, log_debug, request_debug, setup_logging, shutdown_logging
+
+QUERY = "beaches in pagudpud"
+KEYWORDS = ["beach", "pagudpud"]
+LOCATION = "pagudpud"
+RANKED = [({"name": f"Item {i}", "photo_url": "assets/item.jpg"}, 20 - i, []) for i in range(20)]
+
+def printed_turn():
+    """The prints of one plain search turn, as search_with_context wrote them"""
+    print(f"\n{'='*60}")
+    print(f"Session: s (Turn 1)")
+    print(f"Query: {QUERY}")
+    print(f"Processed keywords: {KEYWORDS}")
+    print(f"Detected location: {LOCATION}")
+    print(f"Is follow-up: False (asking_alternatives=False)")
+    results = [item for item, score, matched in RANKED[:3]]
+    print(f"\nTop {len(results)} result(s):")
+    for i, (item, score, matched) in enumerate(RANKED[:3], 1):
+        photo_status = "✓ has photo" if item.get('photo_url') else "✗ no photo"
+        print(f"  {i}. {item['name']} (score: {score}) [{photo_status}]")
+    print(f"{'='*60}\n")
+
+def logged_turn(logger):
+    """The log_debug calls that replaced them"""
+    log_debug(
+        logger, "Search turn: query=%r keywords=%s location=%s",
+        QUERY, KEYWORDS, LOCATION, extra={"session_id": "s", "turn": 1}
+    )
+    log_debug(logger, "Is follow-up: %s (asking_alternatives=%s)", False, False)
+    log_debug(
+        logger, "Top %d result(s): %s", 3,
+        Lazy(lambda: "; ".join(
+            f"{item['name']} (score: {score}, photo: {'yes' if item.get('photo_url') else 'no'})"
+            for item, score, matched in RANKED[:3]
+        )),
+        extra={"session_id": "s"}
+    )
+
+def per_turn_us(turn, turns: int) -> float:
+    started = time.perf_counter()
+    for _ in range(turns):
+        turn()
+    return (time.perf_counter() - started) / turns * 1e6
+
+def run(turns: int):
+    report = sys.stdout
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        # The log writer binds sys.stdout when it is set up
+        setup_logging()
+        logging.getLogger(ROOT_LOGGER).setLevel(logging.INFO)
+        logger = get_logger("benchmark")
+        previous = per_turn_us(printed_turn, turns)
+        at_info = per_turn_us(lambda: logged_turn(logger), turns)
+        token = request_debug.set(True)
+        with_flag = per_turn_us(lambda: logged_turn(logger), turns)
+        request_debug.reset(token)
+        shutdown_logging()
+
+    print(f"Search diagnostics per chat turn ({turns} turns, output to {os.devnull}):", file=report)
+    print(f"  print() lines:              {previous:6.2f}us", file=report)
+    print(f"  log_debug at INFO:          {at_info:6.2f}us", file=report)
+    print(f"  log_debug, request debug:   {with_flag:6.2f}us (queued; written off-thread)", file=report)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the per-turn cost of search diagnostics")
+    parser.add_argument("--turns", type=int, default=20000)
+    run(parser.parse_args().turns)
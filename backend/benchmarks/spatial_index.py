@@ -0,0 +1,62 @@
+"""
+GridIndex build and query times at a large point count
+Random points around Ilocos Norte; a sample of queries is first checked
+against a brute-force haversine scan, then radius and k-nearest queries
+are timed against a full vectorized scan of every point.
+
+    python -m benchmarks.spatial_index [--points N] [--queries N]     (from backend/)
+"""
+import argparse
+import random
+import time
+
+import numpy as np
+
+from app.services.spatial_index import GridIndex, haversine_many, to_radians
+
+BOUNDS = ((17.5, 18.7), (120.3, 121.0))  # (lat range, lon range)
+CELL_KM = 2.0
+
+def _random_points(rng: random.Random, n: int):
+    (lat_lo, lat_hi), (lon_lo, lon_hi) = BOUNDS
+    return [(rng.uniform(lat_lo, lat_hi), rng.uniform(lon_lo, lon_hi)) for _ in range(n)]
+
+def run(points: int, queries: int):
+    rng = random.Random(31)
+    coords = _random_points(rng, points)
+    origins = _random_points(rng, queries)
+
+    started = time.perf_counter()
+    index = GridIndex(coords, cell_km=CELL_KM)
+    build_ms = (time.perf_counter() - started) * 1000
+    lat_rad, lon_rad, cos_lat = to_radians(coords)
+
+    # Same answers as scanning every point
+    for lat, lon in origins[:20]:
+        distances = haversine_many(lat, lon, lat_rad, lon_rad, cos_lat)
+        order = np.argsort(distances, kind="stable")
+        assert [i for i, _ in index.query_radius(lat, lon, 2.0)] == [i for i in order if distances[i] <= 2.0]
+        assert [i for i, _ in index.query_knn(lat, lon, 10)] == list(order[:10])
+
+    def per_query_ms(query) -> float:
+        started = time.perf_counter()
+        for lat, lon in origins:
+            query(lat, lon)
+        return (time.perf_counter() - started) / len(origins) * 1000
+
+    print(f"GridIndex over {points} points ({CELL_KM} km cells): built in {build_ms:.0f} ms")
+    scan = per_query_ms(lambda lat, lon: haversine_many(lat, lon, lat_rad, lon_rad, cos_lat))
+    print(f"  full scan (vectorized):  {scan:7.3f} ms/query")
+    for radius in (1.0, 2.0, 5.0):
+        hits = sum(len(index.query_radius(lat, lon, radius)) for lat, lon in origins) / len(origins)
+        ms = per_query_ms(lambda lat, lon: index.query_radius(lat, lon, radius))
+        print(f"  radius {radius:.0f} km:             {ms:7.3f} ms/query (~{hits:.0f} hits)")
+    ms = per_query_ms(lambda lat, lon: index.query_knn(lat, lon, 10))
+    print(f"  10 nearest:              {ms:7.3f} ms/query")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the nearby-places grid index")
+    parser.add_argument("--points", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+    run(args.points, args.queries)
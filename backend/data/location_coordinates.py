@@ -245,16 +245,33 @@ LOCATION_DESCRIPTIONS = {
 WALKING_SPEED_KMH = 5  # Average walking speed
 WALKING_DISTANCE_THRESHOLD_KM = 1.0  # Consider walking if less than 1km
 
+# Distance tariffs: the base fare covers the first included_km, then per_km
+FARE_TARIFFS = {
+    "tricycle": {
+        "base_fare": TRANSPORT_ROUTES["tricycle"]["base_fare"],
+        "included_km": 0,
+        "per_km": TRANSPORT_ROUTES["tricycle"]["per_km"],
+    },
+    "jeepney": {"base_fare": 12.00, "included_km": 4, "per_km": 1.5},
+    "van": {"base_fare": 20.00, "included_km": 5, "per_km": 2.0},  # Premium service
+    "bus": {"base_fare": 18.00, "included_km": 5, "per_km": 1.8},
+}
+
 # Fare calculation functions
+def calculate_distance_fare(mode, distance_km):
+    """Fare for one leg of `mode` under FARE_TARIFFS"""
+    tariff = FARE_TARIFFS[mode]
+    if distance_km <= tariff["included_km"]:
+        return float(tariff["base_fare"])
+    additional = (distance_km - tariff["included_km"]) * tariff["per_km"]
+    return round(tariff["base_fare"] + additional, 2)
+
 def calculate_tricycle_fare(distance_km):
     """
     Calculate tricycle fare based on distance
     Base fare: ₱15, then ₱10 per km
     """
-    base = TRANSPORT_ROUTES["tricycle"]["base_fare"]
-    per_km = TRANSPORT_ROUTES["tricycle"]["per_km"]
-    fare = base + (distance_km * per_km)
-    return round(fare, 2)
+    return calculate_distance_fare("tricycle", distance_km)
 
 def calculate_jeepney_fare(distance_km):
     """
@@ -262,11 +279,7 @@ def calculate_jeepney_fare(distance_km):
     Base fare: ₱12 for first 4km
     Additional: ₱1.50 per km after 4km
     """
-    if distance_km <= 4:
-        return 12.00
-    else:
-        additional = (distance_km - 4) * 1.5
-        return round(12 + additional, 2)
+    return calculate_distance_fare("jeepney", distance_km)
 
 def calculate_van_fare(distance_km):
     """
@@ -274,11 +287,7 @@ def calculate_van_fare(distance_km):
     Base fare: ₱20 for first 5km
     Additional: ₱2.00 per km after 5km (premium service)
     """
-    if distance_km <= 5:
-        return 20.00
-    else:
-        additional = (distance_km - 5) * 2.0
-        return round(20 + additional, 2)
+    return calculate_distance_fare("van", distance_km)
 
 def calculate_bus_fare(distance_km):
     """
@@ -286,11 +295,7 @@ def calculate_bus_fare(distance_km):
     Base fare: ₱18 for first 5km
     Additional: ₱1.80 per km after 5km
     """
-    if distance_km <= 5:
-        return 18.00
-    else:
-        additional = (distance_km - 5) * 1.8
-        return round(18 + additional, 2)
+    return calculate_distance_fare("bus", distance_km)
 
 def get_location_description(location_name):
     """Get a list of descriptions for a location"""
@@ -0,0 +1,160 @@
+"""
+Shared fixtures
+Run from backend/:  python -m pytest -q
+"""
+import re
+import sys
+import types
+from collections import Counter
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+def _split_args(text):
+    """Split Prolog text on top-level commas (outside quotes and parentheses)"""
+    parts, depth, quoted, start, i = [], 0, False, 0, 0
+    while i < len(text):
+        ch = text[i]
+        if quoted:
+            if ch == "'":
+                if text[i + 1:i + 2] == "'":
+                    i += 1
+                else:
+                    quoted = False
+        elif ch == "'":
+            quoted = True
+        elif ch == "(":
+            depth += 1
+        elif ch == ")":
+            depth -= 1
+        elif ch == "," and depth == 0:
+            parts.append(text[start:i].strip())
+            start = i + 1
+        i += 1
+    parts.append(text[start:].strip())
+    return parts
+
+
+def _unquote(atom):
+    return atom[1:-1].replace("''", "'") if atom.startswith("'") else atom
+
+
+def _is_var(arg):
+    return arg == "_" or arg[:1].isupper()
+
+
+class StubProlog:
+    """
+    Stand-in for pyswip.Prolog that understands the queries the Prolog
+    service sends: dynamic, assertz, retractall, the find_by_* rules of
+    SNAPSHOT_RULES, plus `aggregate_all(count, Goal, N)` where Goal is one
+    fact pattern, optionally followed by `, M:visible(G, V)`
+    Facts are kept as lists of argument texts per (module, name).
+    """
+
+    _CALL = re.compile(r"(\w+):(\w+)\((.*)\)$", re.S)
+    _COUNT = re.compile(r"aggregate_all\(count, (.*), N\)$", re.S)
+
+    def __init__(self):
+        self.facts = {}
+
+    def _parse(self, goal):
+        module, name, args = self._CALL.match(goal).groups()
+        return module, name, _split_args(args)
+
+    def _matching(self, module, name, pattern):
+        return [
+            args for args in self.facts.get((module, name), [])
+            if len(args) == len(pattern) and all(_is_var(p) or p == a for p, a in zip(pattern, args))
+        ]
+
+    def visible(self, module, generation, version):
+        """visible/2 of SNAPSHOT_RULES"""
+        version = int(version)
+        live = [int(f) for g, f in self.facts.get((module, "live"), []) if g == generation]
+        dead = [int(t) for g, t in self.facts.get((module, "dead"), []) if g == generation]
+        return any(f <= version for f in live) and not any(t <= version for t in dead)
+
+    def _count(self, goal):
+        goals = _split_args(goal[1:-1] if goal.startswith("(") else goal)
+        module, name, pattern = self._parse(goals[0])
+        matches = self._matching(module, name, pattern)
+        if len(goals) == 2:
+            _, _, (_, version) = self._parse(goals[1])
+            matches = [args for args in matches if self.visible(module, args[0], version)]
+        return len(matches)
+
+    def _find(self, module, rule, version, key):
+        found = []
+        if rule == "find_by_keyword":
+            found = [(g, item_id) for g, item_id, keyword in self.facts.get((module, "has_keyword"), []) if keyword == key]
+        elif rule == "find_by_name":
+            found = [(g, item_id) for g, item_id, name, _, _ in self.facts.get((module, "item"), [])
+                     if _unquote(key) in _unquote(name)]
+        elif rule == "find_by_location":
+            found = [(g, item_id) for g, item_id, _, _, location in self.facts.get((module, "item"), []) if location == key]
+        return [{"ID": _unquote(item_id)} for g, item_id in found if self.visible(module, g, version)]
+
+    def query(self, query):
+        match = self._COUNT.match(query)
+        if match:
+            return iter([{"N": self._count(match.group(1))}])
+
+        for goal in _split_args(query):
+            if goal.startswith("dynamic("):
+                continue
+            if goal.startswith("retractall("):
+                module, name, pattern = self._parse(goal[len("retractall("):-1])
+                doomed = self._matching(module, name, pattern)
+                self.facts[(module, name)] = [args for args in self.facts.get((module, name), []) if args not in doomed]
+                continue
+            if goal.startswith("assertz("):
+                module, _, clause = goal[len("assertz("):-1].partition(":")
+                if clause.startswith("("):
+                    continue  # Query rule
+                _, name, args = self._parse(f"{module}:{clause}")
+                self.facts.setdefault((module, name), []).append(args)
+                continue
+            module, rule, (version, key, _) = self._parse(goal)
+            return iter(self._find(module, rule, version, key))
+        return iter([{}])
+
+
+@pytest.fixture
+def prolog_engine(monkeypatch):
+    """The real pyswip when it is installed, otherwise StubProlog"""
+    try:
+        import pyswip  # noqa: F401
+    except ImportError:
+        stub = types.ModuleType("pyswip")
+        stub.Prolog = StubProlog
+        monkeypatch.setitem(sys.modules, "pyswip", stub)
+        return "stub"
+    return "swipl"
+
+
+@pytest.fixture
+def catalog_env(tmp_path, monkeypatch, prolog_engine):
+    """
+    A fresh catalog database (seeded from the workbook on first use) in a
+    temporary directory, with the catalog, Prolog and routing singletons reset
+    The test must `await database.engine.dispose()` before its event loop ends.
+    """
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    from app import database
+    from app.services import catalog_store, prolog_service, routing_service
+
+    app_engine = database.engine
+    test_engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'chatbot.db'}")
+    monkeypatch.setattr(database, "engine", test_engine)
+    database.async_session.configure(bind=test_engine)
+    monkeypatch.setattr(catalog_store, "CATALOG_REFRESH_SECONDS", 0)
+    monkeypatch.setattr(catalog_store, "_catalog_store", None)
+    monkeypatch.setattr(prolog_service, "_prolog_service", None)
+    monkeypatch.setattr(routing_service, "_routing_service", None)
+    yield tmp_path
+    database.async_session.configure(bind=app_engine)
@@ -0,0 +1,73 @@
+"""
+haversine_many must agree with the scalar reference haversine_km
+"""
+import random
+
+import numpy as np
+import pytest
+
+from app.services.spatial_index import haversine_km, haversine_many, to_radians
+
+EDGE_CASES = [
+    (90.0, 0.0),      # North pole
+    (-90.0, 0.0),     # South pole
+    (90.0, 123.0),    # Same pole, another longitude
+    (0.0, 180.0),     # Antimeridian, both signs
+    (0.0, -180.0),
+    (10.0, 179.999),
+    (10.0, -179.999),
+    (0.0, 0.0),
+    (-0.0, 0.0),
+    (18.1978, 120.5936),  # Laoag
+    (18.1978, 120.5936),  # Identical point
+]
+
+ORIGINS = [
+    (18.1978, 120.5936),
+    (90.0, 0.0),
+    (-90.0, 45.0),
+    (0.0, 180.0),
+    (10.0, -179.999),
+    (0.0, 0.0),
+]
+
+
+def _random_points(n, seed):
+    rng = random.Random(seed)
+    return [(rng.uniform(-90, 90), rng.uniform(-180, 180)) for _ in range(n)]
+
+
+@pytest.mark.parametrize("origin", ORIGINS + _random_points(20, seed=32))
+def test_haversine_many_matches_scalar(origin):
+    points = EDGE_CASES + _random_points(500, seed=str(origin))
+    lat_rad, lon_rad, cos_lat = to_radians(points)
+
+    expected = np.array([haversine_km(origin[0], origin[1], lat, lon) for lat, lon in points])
+    for distances in (
+        haversine_many(origin[0], origin[1], lat_rad, lon_rad, cos_lat),
+        haversine_many(origin[0], origin[1], lat_rad, lon_rad),
+    ):
+        np.testing.assert_allclose(distances, expected, rtol=1e-9, atol=1e-6)
+
+
+def test_identical_points_are_zero_apart():
+    lat_rad, lon_rad, cos_lat = to_radians(EDGE_CASES)
+    for index, (lat, lon) in enumerate(EDGE_CASES):
+        assert haversine_many(lat, lon, lat_rad, lon_rad, cos_lat)[index] == pytest.approx(0, abs=1e-6)
+        assert haversine_km(lat, lon, lat, lon) == 0
+
+
+def test_antimeridian_and_poles():
+    # 0.002 degrees of longitude across the antimeridian at 10N, not ~360
+    lat_rad, lon_rad, cos_lat = to_radians([(10.0, -179.999)])
+    assert haversine_many(10.0, 179.999, lat_rad, lon_rad, cos_lat)[0] == pytest.approx(
+        haversine_km(10.0, 179.999, 10.0, -179.999)
+    )
+    assert haversine_km(10.0, 179.999, 10.0, -179.999) < 0.25
+
+    # Every longitude at a pole is the same point; pole to pole is half the circumference
+    lat_rad, lon_rad, cos_lat = to_radians([(90.0, 0.0), (-90.0, 0.0)])
+    distances = haversine_many(90.0, 77.0, lat_rad, lon_rad, cos_lat)
+    assert distances[0] == pytest.approx(0, abs=1e-6)
+    assert distances[1] == pytest.approx(haversine_km(90.0, 0.0, -90.0, 0.0))
+    assert distances[1] == pytest.approx(np.pi * 6371.0)
@@ -0,0 +1,112 @@
+"""
+The matched-items backfill runs in chunks, once, and never double-counts a chat
+"""
+import asyncio
+import json
+from datetime import datetime
+
+from sqlalchemy import delete, func, select
+
+from app import database
+from app.database import (
+    ChatHistory, ChatMatchedItem, DataMigration, ItemImpression,
+    MATCHED_ITEMS_BACKFILL, async_session, init_db, record_matched_items
+)
+
+LEGACY = [
+    ["TS01", "CU02"],
+    [],
+    ["TS01"],
+    None,
+    "not json",
+    ["CU02", "TS03", "TS01"],
+    ["TS03"],
+]
+
+
+async def _counts():
+    async with async_session() as db:
+        rows = (await db.execute(
+            select(ChatMatchedItem.chat_id, ChatMatchedItem.rank, ChatMatchedItem.item_id)
+            .order_by(ChatMatchedItem.chat_id, ChatMatchedItem.rank)
+        )).all()
+        impressions = dict((await db.execute(
+            select(ItemImpression.item_id, ItemImpression.impressions)
+        )).all())
+        migration = await db.get(DataMigration, MATCHED_ITEMS_BACKFILL)
+    return [tuple(row) for row in rows], impressions, migration
+
+
+def test_backfill_chunks_once_and_skips_normalised_chats(catalog_env, monkeypatch):
+    monkeypatch.setattr(database, "HISTORY_BACKFILL_BATCH_SIZE", 2)
+
+    async def scenario():
+        try:
+            # A fresh install has nothing to backfill but still records completion
+            await init_db()
+            _, _, migration = await _counts()
+            assert migration.completed_at is not None
+
+            # An install from before the normalised tables: legacy JSON only,
+            # plus one chat recorded after them (it already has its rows)
+            async with async_session() as db:
+                await db.execute(delete(DataMigration))
+                for items in LEGACY:
+                    matched = items if isinstance(items, str) or items is None else json.dumps(items)
+                    db.add(ChatHistory(session_id="s", user_message="q", bot_response="a", matched_items=matched))
+                recent = ChatHistory(session_id="s", user_message="q", bot_response="a", matched_items='["CU09"]')
+                db.add(recent)
+                await db.flush()
+                await record_matched_items(db, recent.id, ["CU09"], datetime.utcnow())
+                await db.commit()
+
+            await init_db()
+            rows, impressions, migration = await _counts()
+            assert migration.completed_at is not None
+            assert [item_id for _, _, item_id in rows] == ["TS01", "CU02", "TS01", "CU02", "TS03", "TS01", "TS03", "CU09"]
+            assert impressions == {"TS01": 3, "CU02": 2, "TS03": 2, "CU09": 1}
+
+            # Completed: later starts add nothing
+            await init_db()
+            again_rows, again_impressions, again = await _counts()
+            assert (again_rows, again_impressions) == (rows, impressions)
+            assert again.completed_at == migration.completed_at
+        finally:
+            await database.engine.dispose()
+
+    asyncio.run(scenario())
+
+
+def test_interrupted_backfill_resumes_without_duplicates(catalog_env, monkeypatch):
+    monkeypatch.setattr(database, "HISTORY_BACKFILL_BATCH_SIZE", 2)
+
+    async def scenario():
+        try:
+            await init_db()
+            async with async_session() as db:
+                for items in LEGACY:
+                    if isinstance(items, list):
+                        db.add(ChatHistory(session_id="s", user_message="q", bot_response="a",
+                                           matched_items=json.dumps(items)))
+                await db.flush()
+                # Interrupted after writing one chat's rows, before recording any progress
+                first = (await db.execute(select(ChatHistory.id).order_by(ChatHistory.id).limit(1))).scalar()
+                await record_matched_items(db, first, LEGACY[0], datetime.utcnow())
+                migration = await db.get(DataMigration, MATCHED_ITEMS_BACKFILL)
+                migration.completed_at = None
+                migration.last_id = 0
+                await db.commit()
+
+            await init_db()
+            async with async_session() as db:
+                per_chat = (await db.execute(
+                    select(ChatMatchedItem.chat_id, func.count()).group_by(ChatMatchedItem.chat_id)
+                )).all()
+            _, impressions, migration = await _counts()
+            assert migration.completed_at is not None
+            assert sorted(count for _, count in per_chat) == [1, 1, 2, 3]
+            assert impressions == {"TS01": 3, "CU02": 2, "TS03": 2}
+        finally:
+            await database.engine.dispose()
+
+    asyncio.run(scenario())
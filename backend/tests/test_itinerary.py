@@ -0,0 +1,75 @@
+"""
+The itinerary time budget bounds the leg matrix and the exact solver, not just 2-opt
+"""
+import asyncio
+import itertools
+import random
+import time
+
+from app import database
+from app.database import init_db
+from app.services import routing_service
+from app.services.catalog_store import close_catalog_store, init_catalog_store
+from app.services.geocoding import COORD_NONE
+from app.services.itinerary import held_karp, path_cost
+from app.services.routing_service import get_routing_service
+
+ORIGIN = (18.1978, 120.5936)  # Laoag
+
+
+def _random_matrix(n, seed):
+    rng = random.Random(seed)
+    return [[0.0 if i == j else rng.uniform(1, 100) for j in range(n + 1)] for i in range(n + 1)]
+
+
+def test_held_karp_is_optimal_and_gives_up_at_the_deadline():
+    matrix = _random_matrix(6, seed=38)
+    best = min(itertools.permutations(range(1, 7)), key=lambda order: path_cost(matrix, order))
+
+    assert path_cost(matrix, held_karp(matrix)) == path_cost(matrix, best)
+    assert held_karp(matrix, deadline=time.perf_counter() + 60) == held_karp(matrix)
+    assert held_karp(matrix, deadline=time.perf_counter()) is None
+
+
+def test_exhausted_budget_while_building_legs_still_returns_a_full_itinerary(catalog_env, monkeypatch):
+    async def scenario():
+        await init_db()
+        store = await init_catalog_store()
+        try:
+            service = get_routing_service()
+            stops = [
+                item_id for item_id, item in store.snapshot.items.items()
+                if item['coord_source'] != COORD_NONE
+            ][:8]
+
+            calls = []
+            route_to_item = service._route_to_item
+
+            def slow_route_to_item(*args, **kwargs):
+                calls.append(args[2])
+                time.sleep(0.005)
+                return route_to_item(*args, **kwargs)
+
+            monkeypatch.setattr(service, "_route_to_item", slow_route_to_item)
+            plan = service.plan_itinerary(*ORIGIN, stops, time_budget_ms=10)
+
+            assert plan.method == "nearest-neighbour" and not plan.optimal
+            assert sorted(plan.order) == sorted(stops)
+            # Each leg starts where the previous one arrived
+            names = [store.snapshot.items[stop_id]['name'] for stop_id in plan.order]
+            assert [leg.destination_name for leg in plan.legs] == names
+            assert [leg.steps[0].from_location for leg in plan.legs[1:]] == names[:-1]
+            # First legs, the legs routed before the deadline, then one per stop at most
+            assert len(calls) < len(stops) * len(stops)
+
+            # With time to spare, the exact solver runs; its deadline is checked too
+            service.invalidate_catalog()
+            monkeypatch.setattr(service, "_route_to_item", route_to_item)
+            assert service.plan_itinerary(*ORIGIN, stops).method == "exact"
+            monkeypatch.setattr(routing_service, "held_karp", lambda matrix, deadline: None)
+            assert service.plan_itinerary(*ORIGIN, stops).method == "2-opt"
+        finally:
+            await close_catalog_store()
+            await database.engine.dispose()
+
+    asyncio.run(scenario())
@@ -0,0 +1,138 @@
+"""
+Catalog edits must leave exactly one copy of every item's Prolog facts
+visible to the published snapshot, however many edits came before, and
+must not keep facts that no live snapshot can see any more
+"""
+import asyncio
+import gc
+import random
+from collections import Counter
+
+from app import database
+from app.database import init_db
+from app.services.catalog_store import close_catalog_store, init_catalog_store
+from app.services.excel_to_prolog import FACT_PREDICATES, item_facts, sanitize_atom
+from app.services.prolog_service import KB_MODULE, get_prolog_service
+
+
+def _pattern(name, arity, item_id="_"):
+    """Versioned fact pattern: any generation, the given item ID"""
+    return f"{KB_MODULE}:{name}({', '.join(['G', item_id] + ['_'] * (arity - 1))})"
+
+
+def _count(service, goal):
+    return service._query(f"aggregate_all(count, {goal}, N)")[0]["N"]
+
+
+def _visible_counts(service, kb_version, item_id):
+    """Clauses per fact predicate for one item that a KB version sees"""
+    atom = sanitize_atom(item_id)
+    return {
+        name: _count(service, f"({_pattern(name, arity, atom)}, {KB_MODULE}:visible(G, {kb_version}))")
+        for name, arity in FACT_PREDICATES
+    }
+
+
+def _expected_counts(row):
+    """Clauses per fact predicate that item_facts generates for a row"""
+    generated = Counter(fact.split("(", 1)[0] for fact in item_facts(row))
+    return {name: generated[name] for name, _ in FACT_PREDICATES}
+
+
+def _assert_kb_matches(snapshot):
+    service = get_prolog_service()
+    kb_version = service.load_snapshot_kb(snapshot)
+    for row in snapshot.rows:
+        counts = _visible_counts(service, kb_version, row["id"])
+        assert counts["item"] == 1, row["id"]
+        assert counts == _expected_counts(row), row["id"]
+
+
+def _assert_only_published_facts_stored(store):
+    """Once older snapshots are gone, the KB holds the published snapshot's facts and nothing else"""
+    service = get_prolog_service()
+    gc.collect()
+    with service._kb_build_lock:
+        service._drop_retired_generations()
+
+    expected = Counter()
+    for row in store.rows:
+        expected.update(_expected_counts(row))
+    for name, arity in FACT_PREDICATES:
+        assert _count(service, _pattern(name, arity)) == expected[name], name
+
+
+async def _with_store(edits):
+    await init_db()
+    store = await init_catalog_store()
+    get_prolog_service()
+    try:
+        await edits(store)
+        _assert_kb_matches(store.snapshot)
+        _assert_only_published_facts_stored(store)
+    finally:
+        await close_catalog_store()
+        await database.engine.dispose()
+
+
+def test_repeated_updates_keep_one_copy_of_each_fact(catalog_env):
+    async def edits(store):
+        item_id = store.rows[0]["id"]
+        for n in range(25):
+            await store.update(item_id, {
+                "name": f"Renamed {n}",
+                "description_keywords": ", ".join(f"kw{k}" for k in range(n % 4 + 1)),
+            })
+        assert store.get(item_id)["name"] == "Renamed 24"
+
+    asyncio.run(_with_store(edits))
+
+
+def test_random_upserts_and_deletes_leave_no_duplicate_clauses(catalog_env):
+    async def edits(store):
+        rng = random.Random(41)
+        new_ids = 0
+        for _ in range(80):
+            ids = [row["id"] for row in store.rows]
+            action = rng.random()
+            if action < 0.5:
+                item_id = rng.choice(ids)
+                assert await store.update(item_id, {
+                    "name": f"Edited {rng.randrange(1000)}",
+                    "location": rng.choice(["Laoag", "Paoay, Ilocos Norte", "Vigan"]),
+                    "related_items": rng.choice([None, "A, B", "n/a"]),
+                }) is not None
+            elif action < 0.75:
+                new_ids += 1
+                item_id = f"TX{new_ids:02d}"
+                assert await store.create({
+                    "id": item_id, "name": f"New {new_ids}", "type": "tourist_spot",
+                    "location": "Laoag", "description_keywords": "beach, sand",
+                }) is not None
+                # Creating it again is refused and adds nothing
+                assert await store.create({"id": item_id, "name": "Again", "type": "tourist_spot"}) is None
+            else:
+                item_id = rng.choice(ids)
+                assert await store.delete(item_id)
+                assert not await store.delete(item_id)
+
+    asyncio.run(_with_store(edits))
+
+
+def test_edit_asserts_one_item_and_older_snapshots_keep_their_facts(catalog_env):
+    async def edits(store):
+        service = get_prolog_service()
+        item = store.rows[0]
+        stored_before = _count(service, _pattern("item", 4))
+
+        before = store.snapshot
+        await store.update(item["id"], {"name": "Renamed", "description_keywords": "zzunique"})
+
+        # Only the edited item got a new generation
+        assert _count(service, _pattern("item", 4)) == stored_before + 1
+        # A search still holding the old snapshot sees the old facts
+        _assert_kb_matches(before)
+        assert service.query_by_keywords(["zzunique"], before) == []
+        assert service.query_by_keywords(["zzunique"]) == [item["id"]]
+
+    asyncio.run(_with_store(edits))
@@ -0,0 +1,42 @@
+"""
+Cached route plans must never outlive the catalog version they were computed from
+"""
+import asyncio
+
+from app import database
+from app.database import init_db
+from app.services.catalog_store import close_catalog_store, init_catalog_store
+from app.services.geocoding import COORD_NONE
+from app.services.routing_service import get_routing_service
+
+ORIGIN = (18.1978, 120.5936)  # Laoag
+
+
+def test_plan_from_an_older_snapshot_is_not_served_after_an_edit(catalog_env):
+    async def scenario():
+        await init_db()
+        store = await init_catalog_store()
+        try:
+            service = get_routing_service()
+            old = store.snapshot
+            item_id = next(
+                item_id for item_id, item in old.items.items()
+                if item['type'] == 'tourist_spot' and item['coord_source'] != COORD_NONE
+                and item['geo_location'] not in (item['name'], 'Pagudpud')
+            )
+
+            await store.update(item_id, {"location": "Pagudpud, Ilocos Norte", "nearest_hub": "Pagudpud"})
+            # A request that read the old snapshot finishes after the edit was published
+            stale = service._route_to_item(*ORIGIN, item_id, old.items[item_id], old.version)
+
+            route = service.calculate_route(*ORIGIN, item_id)
+            service.invalidate_catalog()
+            fresh = service.calculate_route(*ORIGIN, item_id)
+
+            assert route.destination_location != stale.destination_location
+            assert route == fresh
+        finally:
+            await close_catalog_store()
+            await database.engine.dispose()
+
+    asyncio.run(scenario())